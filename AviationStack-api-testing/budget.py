@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+# Upstream requests per second and burst allowed by your plan (0 disables the limit)
+UPSTREAM_RATE_PER_SECOND = float(os.getenv("UPSTREAM_RATE_PER_SECOND", 5))
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", 5))
+# Upstream requests per calendar month (UTC) on your plan, e.g. 100 on the free plan (0 = unlimited)
+MONTHLY_QUOTA = int(os.getenv("AVIATIONSTACK_MONTHLY_QUOTA", 0))
+# Share of the monthly quota kept for live endpoints once reference data has used the rest
+LIVE_RESERVE_FRACTION = float(os.getenv("LIVE_RESERVE_FRACTION", 0.1))
+# Longest a request waits for a rate limit token before it is refused
+QUEUE_DEADLINE_SECONDS = float(os.getenv("UPSTREAM_QUEUE_SECONDS", 3))
+# Where the monthly usage counter is kept across restarts
+USAGE_FILE = os.getenv("USAGE_FILE", "aviationstack_usage.json")
+# Changes to the counter are written at most this often, and on shutdown
+USAGE_SAVE_SECONDS = float(os.getenv("USAGE_SAVE_SECONDS", 5))
+
+# Priority classes, lower goes first: live flight data ahead of reference data
+LIVE = 0
+REFERENCE = 1
+LIVE_ENDPOINTS = {"flights", "timetable", "flightsfuture"}
+
+
+def priority(endpoint: str) -> int:
+    return LIVE if endpoint in LIVE_ENDPOINTS else REFERENCE
+
+
+class BudgetExceeded(HTTPException):
+    """The request would exceed the upstream rate or quota"""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(status_code=429, detail=detail,
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+def _month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _seconds_to_next_month() -> float:
+    now = datetime.now(timezone.utc)
+    next_month = datetime(now.year + now.month // 12, now.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return (next_month - now).total_seconds()
+
+
+class UpstreamBudget:
+    """Token bucket with a priority queue, plus a persisted monthly usage counter
+
+    When no token is free, requests queue by priority class and then arrival.
+    A request whose expected wait exceeds its deadline is refused at once
+    rather than after waiting.
+    """
+
+    def __init__(self, rate: float, burst: float, monthly_quota: int, usage_file: str):
+        self.rate = rate
+        self.burst = burst
+        self.monthly_quota = monthly_quota
+        self.usage_file = usage_file
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.month = _month()
+        self.used = 0
+        # AviationStack said the quota is used up, whatever our counter says
+        self.exhausted = False
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._drainer = None
+        # The counter changed since it was last written
+        self._dirty = False
+        self._stopping = None
+        self.sent = 0
+        self.queued = 0
+        self.refused = 0
+
+    def load(self) -> None:
+        try:
+            with open(self.usage_file) as f:
+                usage = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {self.usage_file}, starting the monthly count at 0: {e}")
+            return
+        if usage.get("month") == _month():
+            self.month = usage["month"]
+            self.used = int(usage.get("used", 0))
+            self.exhausted = bool(usage.get("exhausted", False))
+
+    def _write(self, usage: dict) -> None:
+        temp_path = f"{self.usage_file}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(usage, f)
+            os.replace(temp_path, self.usage_file)
+        except OSError as e:
+            print(f"⚠️ Could not save upstream usage to {self.usage_file}: {e}")
+
+    def start_saver(self) -> asyncio.Task:
+        """Write the counter in the background until stop_saver(); await the task to finish"""
+        self._stopping = asyncio.Event()
+        return asyncio.create_task(self._run_saver())
+
+    async def _run_saver(self) -> None:
+        """Write the counter every USAGE_SAVE_SECONDS while it changes, and once more when stopped
+
+        Runs for the app's lifetime, so upstream calls never wait on the file.
+        """
+        stopped = False
+        while not stopped:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), USAGE_SAVE_SECONDS)
+                stopped = True
+            except asyncio.TimeoutError:
+                pass
+            if self._dirty:
+                self._dirty = False
+                # Snapshot on the event loop; the blocking write runs in a thread
+                usage = {"month": self.month, "used": self.used, "exhausted": self.exhausted}
+                await asyncio.to_thread(self._write, usage)
+
+    def stop_saver(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def _roll_month(self) -> None:
+        month = _month()
+        if month != self.month:
+            self.month = month
+            self.used = 0
+            self.exhausted = False
+
+    def _check_quota(self, request_priority: int) -> None:
+        self._roll_month()
+        if self.exhausted or (self.monthly_quota and self.used >= self.monthly_quota):
+            self.refused += 1
+            raise BudgetExceeded("Monthly AviationStack quota exhausted", _seconds_to_next_month())
+        reserve = self.monthly_quota * LIVE_RESERVE_FRACTION
+        if request_priority > LIVE and self.monthly_quota and self.monthly_quota - self.used <= reserve:
+            self.refused += 1
+            raise BudgetExceeded("Remaining monthly AviationStack quota is reserved for live flight data",
+                                 _seconds_to_next_month())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _count(self) -> None:
+        self.used += 1
+        self.sent += 1
+        self._dirty = True
+
+    async def _drain(self) -> None:
+        """Hand tokens to queued requests, highest priority first, as they refill"""
+        try:
+            while self._waiters:
+                self._refill()
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    continue
+                _, _, waiter = heapq.heappop(self._waiters)
+                if not waiter.done():
+                    self.tokens -= 1
+                    waiter.set_result(None)
+        finally:
+            self._drainer = None
+
+    async def acquire(self, endpoint: str) -> None:
+        """Wait for budget to send one request to ``endpoint``, or raise BudgetExceeded"""
+        request_priority = priority(endpoint)
+        self._check_quota(request_priority)
+        if self.rate <= 0:
+            self._count()
+            return
+
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            self._count()
+            return
+
+        # Tokens needed before this request's turn: everyone queued at its priority or above
+        ahead = sum(1 for p, _, waiter in self._waiters if p <= request_priority and not waiter.done())
+        expected_wait = (ahead + 1 - self.tokens) / self.rate
+        if expected_wait > QUEUE_DEADLINE_SECONDS:
+            self.refused += 1
+            raise BudgetExceeded("Upstream rate limit reached, retry later", expected_wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (request_priority, next(self._sequence), waiter))
+        self.queued += 1
+        if self._drainer is None:
+            self._drainer = asyncio.create_task(self._drain())
+        try:
+            await asyncio.wait_for(waiter, QUEUE_DEADLINE_SECONDS)
+        except asyncio.TimeoutError:
+            self.refused += 1
+            raise BudgetExceeded("Upstream rate limit reached, retry later", 1 / self.rate)
+        # The month may have been used up while this request waited
+        self._check_quota(request_priority)
+        self._count()
+
+    def limited_upstream(self, error_code: str) -> BudgetExceeded:
+        """Record that AviationStack itself refused a request for rate or quota"""
+        if error_code == "usage_limit_reached":
+            self.exhausted = True
+            self._dirty = True
+            return BudgetExceeded("Monthly AviationStack quota exhausted", _seconds_to_next_month())
+        # Back off until the bucket refills
+        self.tokens = 0
+        self.updated = time.monotonic()
+        return BudgetExceeded("AviationStack rate limit reached, retry later", 1 / self.rate if self.rate > 0 else 1)
+
+    def stats(self) -> dict:
+        self._roll_month()
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "waiting": sum(1 for _, _, waiter in self._waiters if not waiter.done()),
+            "month": self.month,
+            "monthly_quota": self.monthly_quota or None,
+            "used": self.used,
+            "remaining": max(0, self.monthly_quota - self.used) if self.monthly_quota else None,
+            "exhausted": self.exhausted,
+            "sent": self.sent,
+            "queued": self.queued,
+            "refused": self.refused,
+        }
+
+
+budget = UpstreamBudget(UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST, MONTHLY_QUOTA, USAGE_FILE)
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+import upstream
+from budget import BudgetExceeded
+
+# Cached responses kept in this process; least recently used are evicted first
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1000))
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+
+# Per-endpoint (ttl, stale) in seconds. A response is served as fresh for ttl
+# seconds, then for up to stale more seconds while it is refreshed in the
+# background; after that the next request waits for the upstream again.
+CACHE_POLICIES = {
+    # Live data tolerates a few seconds of staleness
+    "flights": (5, 10),
+    "timetable": (15, 15),
+    "flightsfuture": (3600, 3600),
+    "routes": (6 * 3600, 24 * 3600),
+    "airplanes": (6 * 3600, 24 * 3600),
+    # Reference data is near-static
+    "airports": (24 * 3600, 7 * 24 * 3600),
+    "airlines": (24 * 3600, 7 * 24 * 3600),
+    "aircraft_types": (24 * 3600, 7 * 24 * 3600),
+    "taxes": (24 * 3600, 7 * 24 * 3600),
+    "cities": (24 * 3600, 7 * 24 * 3600),
+    "countries": (24 * 3600, 7 * 24 * 3600),
+}
+
+# Overrides as "endpoint=ttl:stale,...", e.g. CACHE_POLICIES="flights=10:20,taxes=0:0"
+for _override in filter(None, os.getenv("CACHE_POLICIES", "").split(",")):
+    _endpoint, _, _policy = _override.partition("=")
+    _ttl, _, _stale = _policy.partition(":")
+    CACHE_POLICIES[_endpoint.strip()] = (float(_ttl), float(_stale or 0))
+
+
+class ResponseCache:
+    """Bounded LRU of upstream JSON bodies with stale-while-revalidate"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.degraded = 0
+        self.evictions = 0
+
+    def _store(self, key, body) -> None:
+        self._entries[key] = (body, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _refresh(self, key, endpoint: str, params: dict) -> None:
+        try:
+            status_code, body = await upstream.fetch(endpoint, params)
+            if upstream.is_success(status_code, body):
+                self._store(key, body)
+                self.refreshes += 1
+            else:
+                self.refresh_failures += 1
+        except Exception as e:
+            # Keep serving the stale entry until it expires
+            self.refresh_failures += 1
+            print(f"⚠️ Background refresh of /{endpoint} failed: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def _revalidate(self, key, endpoint: str, params: dict) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, endpoint, params))
+        # Hold a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get(self, endpoint: str, params: dict):
+        """(status code, body, cache status, age in seconds) for an upstream GET
+
+        Cache status is HIT, STALE (served while refreshing), MISS, BYPASS or
+        DEGRADED (expired, served because the upstream budget is exhausted).
+        Only successful responses are cached; expired ones are kept for
+        DEGRADED until evicted.
+        """
+        ttl, stale = CACHE_POLICIES.get(endpoint, (0, 0))
+        if not CACHE_ENABLED or ttl <= 0:
+            self.bypasses += 1
+            status_code, body = await upstream.fetch(endpoint, params)
+            return status_code, body, "BYPASS", None
+
+        key = upstream.request_key(endpoint, params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            body, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return 200, body, "HIT", age
+            if age < ttl + stale:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._revalidate(key, endpoint, params)
+                return 200, body, "STALE", age
+
+        self.misses += 1
+        try:
+            status_code, body = await upstream.fetch(endpoint, params)
+        except BudgetExceeded:
+            if entry is None:
+                raise
+            # Out of upstream budget: an expired response beats none
+            self.degraded += 1
+            body, stored_at = entry
+            return 200, body, "DEGRADED", time.monotonic() - stored_at
+        if upstream.is_success(status_code, body):
+            self._store(key, body)
+        return status_code, body, "MISS", None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": CACHE_ENABLED,
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "degraded": self.degraded,
+            "evictions": self.evictions,
+        }
+
+
+responses = ResponseCache(CACHE_MAX_ENTRIES)
@@ -1,20 +1,38 @@
 from fastapi import FastAPI, Query, HTTPException
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from typing import Optional
-import requests
 import os
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables before reading settings
 load_dotenv()
 
+import upstream
+from budget import budget
+from cache import responses
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for all upstream calls, closed cleanly on shutdown
+    budget.load()
+    saver = budget.start_saver()
+    await upstream.start()
+    yield
+    await upstream.close()
+    # The saver writes any unsaved usage before it exits
+    budget.stop_saver()
+    await saver
+
+
 app = FastAPI(
     title="AviationStack API Proxy",
     version="1.0.0",
-    description="Interactive Swagger UI for testing AviationStack API endpoints using your configured access key"
+    description="Interactive Swagger UI for testing AviationStack API endpoints using your configured access key",
+    lifespan=lifespan
 )
 
-BASE_URL = "https://api.aviationstack.com/v1"
-
 # Get API key from environment variable
 AVIATIONSTACK_API_KEY = os.getenv("AVIATIONSTACK_API_KEY")
 
@@ -22,6 +40,25 @@ if not AVIATIONSTACK_API_KEY:
     raise ValueError("AVIATIONSTACK_API_KEY not found in environment variables. Please set it in your .env file.")
 
 
+async def proxy(endpoint: str, params: dict) -> JSONResponse:
+    """Serve an upstream endpoint through the response cache"""
+    _, body, cache_status, age = await responses.get(endpoint, params)
+    headers = {"X-Cache": cache_status}
+    if age is not None:
+        headers["Age"] = str(int(age))
+    return JSONResponse(body, headers=headers)
+
+
+@app.get("/metrics", summary="Proxy cache and upstream statistics")
+async def get_metrics():
+    """Response cache, request coalescing and upstream budget counters for this process"""
+    return {
+        "cache": responses.stats(),
+        "upstream": upstream.single_flight.stats(),
+        "budget": budget.stats()
+    }
+
+
 @app.get("/flights", summary="Get real-time or historical flight data")
 async def get_flights(
     flight_iata: Optional[str] = Query(None, description="IATA flight code"),
@@ -42,8 +79,7 @@ async def get_flights(
     # Remove None values
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/flights", params=params)
-    return response.json()
+    return await proxy("flights", params)
 
 
 @app.get("/routes", summary="Get airline route data")
@@ -61,8 +97,7 @@ async def get_routes(
     }
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/routes", params=params)
-    return response.json()
+    return await proxy("routes", params)
 
 
 @app.get("/airports", summary="Get airport information")
@@ -76,8 +111,7 @@ async def get_airports(
     }
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/airports", params=params)
-    return response.json()
+    return await proxy("airports", params)
 
 
 @app.get("/airlines", summary="Get airline information")
@@ -91,8 +125,7 @@ async def get_airlines(
     }
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/airlines", params=params)
-    return response.json()
+    return await proxy("airlines", params)
 
 
 @app.get("/airplanes", summary="Get airplane details")
@@ -106,8 +139,7 @@ async def get_airplanes(
     }
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/airplanes", params=params)
-    return response.json()
+    return await proxy("airplanes", params)
 
 
 @app.get("/aircraft_types", summary="Get aircraft type information")
@@ -115,8 +147,7 @@ async def get_aircraft_types():
     """Retrieve a list of aircraft types (model names and IATA codes)"""
     params = {"access_key": AVIATIONSTACK_API_KEY}
     
-    response = requests.get(f"{BASE_URL}/aircraft_types", params=params)
-    return response.json()
+    return await proxy("aircraft_types", params)
 
 
 @app.get("/taxes", summary="Get aviation tax data")
@@ -124,8 +155,7 @@ async def get_taxes():
     """Retrieve a list of aviation taxes and associated codes"""
     params = {"access_key": AVIATIONSTACK_API_KEY}
     
-    response = requests.get(f"{BASE_URL}/taxes", params=params)
-    return response.json()
+    return await proxy("taxes", params)
 
 
 @app.get("/cities", summary="Get city data")
@@ -139,8 +169,7 @@ async def get_cities(
     }
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/cities", params=params)
-    return response.json()
+    return await proxy("cities", params)
 
 
 @app.get("/countries", summary="Get country data")
@@ -154,8 +183,7 @@ async def get_countries(
     }
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.get(f"{BASE_URL}/countries", params=params)
-    return response.json()
+    return await proxy("countries", params)
 
 
 @app.get("/timetable", summary="Get flight timetable")
@@ -170,8 +198,7 @@ async def get_timetable(
         "type": type
     }
     
-    response = requests.get(f"{BASE_URL}/timetable", params=params)
-    return response.json()
+    return await proxy("timetable", params)
 
 
 @app.get("/flightsfuture", summary="Get future flight schedules")
@@ -188,8 +215,7 @@ async def get_flights_future(
         "date": date
     }
     
-    response = requests.get(f"{BASE_URL}/flightsfuture", params=params)
-    return response.json()
+    return await proxy("flightsfuture", params)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+# Settings are read when the modules are imported, so set them first:
+# no rate limit or monthly quota, and a throwaway usage file
+os.environ.setdefault("AVIATIONSTACK_API_KEY", "test-key")
+os.environ["UPSTREAM_RATE_PER_SECOND"] = "0"
+os.environ["AVIATIONSTACK_MONTHLY_QUOTA"] = "0"
+os.environ["USAGE_FILE"] = os.path.join(tempfile.mkdtemp(), "aviationstack_usage.json")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache  # noqa: E402
+import main  # noqa: E402
+import upstream  # noqa: E402
+
+FLIGHTS = {"pagination": {"count": 1}, "data": [{"flight": {"iata": "AA100"}}]}
+
+
+class MockUpstream:
+    """Stands in for AviationStack: counts requests and answers after ``delay`` seconds"""
+
+    def __init__(self):
+        self.calls = 0
+        self.completed = 0
+        self.delay = 0.0
+        self.respond = lambda request: httpx.Response(200, json=FLIGHTS)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        self.completed += 1
+        # respond may raise, e.g. httpx.ConnectError, to fail the request
+        return self.respond(request)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def mock_upstream(monkeypatch):
+    """Run the app lifespan with the upstream client pointed at a MockUpstream
+
+    The response cache is off so every request reaches the coalescing layer,
+    whose counters start from zero.
+    """
+    monkeypatch.setattr(cache, "CACHE_ENABLED", False)
+    monkeypatch.setattr(upstream, "COALESCE_REQUESTS", True)
+    monkeypatch.setattr(upstream, "single_flight", upstream.SingleFlight())
+    mock = MockUpstream()
+    async with main.lifespan(main.app):
+        await upstream._client.aclose()
+        # Closed by the lifespan on exit like the real client
+        upstream._client = httpx.AsyncClient(base_url=upstream.BASE_URL, transport=httpx.MockTransport(mock.handle))
+        yield mock
+
+
+@pytest.fixture
+async def client():
+    """Client calling the proxy app in-process"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://proxy") as client:
+        yield client
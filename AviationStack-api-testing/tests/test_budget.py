@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+import pytest
+
+import budget as budget_module
+import upstream
+from budget import BudgetExceeded, UpstreamBudget
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def usage_file(tmp_path):
+    return str(tmp_path / "usage.json")
+
+
+async def test_tokens_are_spent_then_requests_queue(usage_file):
+    budget = UpstreamBudget(rate=20, burst=2, monthly_quota=0, usage_file=usage_file)
+
+    await budget.acquire("flights")
+    await budget.acquire("flights")
+    assert budget.queued == 0
+
+    await budget.acquire("flights")
+
+    assert budget.queued == 1
+    assert budget.sent == 3
+
+
+async def test_live_waiters_are_served_before_reference_ones(usage_file):
+    budget = UpstreamBudget(rate=20, burst=1, monthly_quota=0, usage_file=usage_file)
+    await budget.acquire("airports")
+    served = []
+
+    async def request(endpoint):
+        await budget.acquire(endpoint)
+        served.append(endpoint)
+
+    # Reference requests queue first; the live one arrives last but goes ahead
+    waiters = [asyncio.create_task(request(endpoint)) for endpoint in ("airports", "airlines", "flights")]
+    await asyncio.gather(*waiters)
+
+    assert served == ["flights", "airports", "airlines"]
+
+
+async def test_request_over_its_deadline_is_refused_at_once(usage_file, monkeypatch):
+    monkeypatch.setattr(budget_module, "QUEUE_DEADLINE_SECONDS", 0.5)
+    budget = UpstreamBudget(rate=1, burst=1, monthly_quota=0, usage_file=usage_file)
+    await budget.acquire("flights")
+
+    with pytest.raises(BudgetExceeded) as refused:
+        await budget.acquire("flights")
+
+    assert refused.value.status_code == 429
+    assert refused.value.headers == {"Retry-After": "1"}
+    assert budget.refused == 1
+    assert budget.queued == 0
+
+
+async def test_refusal_reaches_the_client_as_429_with_retry_after(usage_file, monkeypatch, mock_upstream, client):
+    monkeypatch.setattr(budget_module, "QUEUE_DEADLINE_SECONDS", 0.5)
+    monkeypatch.setattr(upstream, "budget", UpstreamBudget(rate=0.5, burst=1, monthly_quota=0, usage_file=usage_file))
+
+    assert (await client.get("/flights", params={"flight_iata": "AA1"})).status_code == 200
+    response = await client.get("/flights", params={"flight_iata": "AA2"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert mock_upstream.calls == 1
+
+
+async def test_live_reserve_refuses_reference_endpoints_only(usage_file):
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=10, usage_file=usage_file)
+    for _ in range(9):
+        await budget.acquire("airports")
+
+    with pytest.raises(BudgetExceeded, match="reserved for live flight data"):
+        await budget.acquire("airports")
+    await budget.acquire("flights")
+    with pytest.raises(BudgetExceeded, match="quota exhausted"):
+        await budget.acquire("flights")
+
+    assert budget.used == 10
+    assert budget.refused == 2
+
+
+async def test_upstream_quota_refusal_marks_the_month_exhausted(usage_file):
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=0, usage_file=usage_file)
+
+    refusal = budget.limited_upstream("usage_limit_reached")
+
+    assert refusal.status_code == 429
+    assert budget.exhausted
+    with pytest.raises(BudgetExceeded, match="quota exhausted"):
+        await budget.acquire("flights")
+
+
+async def test_upstream_rate_refusal_empties_the_bucket(usage_file):
+    budget = UpstreamBudget(rate=4, burst=4, monthly_quota=0, usage_file=usage_file)
+
+    refusal = budget.limited_upstream("rate_limit_reached")
+
+    assert refusal.headers == {"Retry-After": "1"}
+    assert budget.tokens == 0
+    assert not budget.exhausted
+
+
+async def test_usage_survives_a_save_and_load(usage_file):
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=100, usage_file=usage_file)
+    saver = budget.start_saver()
+    for _ in range(3):
+        await budget.acquire("flights")
+    budget.limited_upstream("usage_limit_reached")
+    budget.stop_saver()
+    await saver
+
+    restarted = UpstreamBudget(rate=0, burst=1, monthly_quota=100, usage_file=usage_file)
+    restarted.load()
+
+    assert (restarted.month, restarted.used, restarted.exhausted) == (budget.month, 3, True)
+
+
+async def test_saver_writes_changes_without_waiting_for_shutdown(usage_file, monkeypatch):
+    monkeypatch.setattr(budget_module, "USAGE_SAVE_SECONDS", 0.05)
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=0, usage_file=usage_file)
+    saver = budget.start_saver()
+    try:
+        await budget.acquire("flights")
+        await asyncio.sleep(0.2)
+        with open(usage_file) as f:
+            assert json.load(f)["used"] == 1
+    finally:
+        budget.stop_saver()
+        await saver
+
+
+async def test_last_months_usage_is_not_loaded(usage_file):
+    with open(usage_file, "w") as f:
+        json.dump({"month": "2000-01", "used": 99, "exhausted": True}, f)
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=100, usage_file=usage_file)
+
+    budget.load()
+
+    assert (budget.used, budget.exhausted) == (0, False)
+
+
+async def test_new_month_resets_the_count(usage_file):
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=10, usage_file=usage_file)
+    budget.month, budget.used, budget.exhausted = "2000-01", 10, True
+
+    await budget.acquire("flights")
+
+    assert budget.month != "2000-01"
+    assert (budget.used, budget.exhausted) == (1, False)
+
+
+async def test_unreadable_usage_file_starts_from_zero(usage_file):
+    with open(usage_file, "w") as f:
+        f.write("not json")
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=100, usage_file=usage_file)
+
+    budget.load()
+
+    assert budget.used == 0
+
+
+def test_rate_refusal_without_a_rate_still_says_when_to_retry(usage_file):
+    budget = UpstreamBudget(rate=0, burst=1, monthly_quota=0, usage_file=usage_file)
+
+    assert budget.limited_upstream("rate_limit_reached").headers == {"Retry-After": "1"}
+
+
+def test_budget_exceeded_rounds_retry_after_up():
+    assert BudgetExceeded("wait", 0.2).headers == {"Retry-After": "1"}
+    assert BudgetExceeded("wait", 2.1).headers == {"Retry-After": "3"}
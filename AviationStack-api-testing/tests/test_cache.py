@@ -0,0 +1,191 @@
+import asyncio
+import importlib
+
+import httpx
+import pytest
+
+import cache
+import main
+import upstream
+from budget import UpstreamBudget
+
+pytestmark = pytest.mark.anyio
+
+TTL = 0.2
+STALE = 0.3
+
+
+@pytest.fixture
+def responses(mock_upstream, monkeypatch):
+    """An empty cache in front of the mock upstream; /flights is fresh for TTL, then stale for STALE"""
+    monkeypatch.setattr(cache, "CACHE_ENABLED", True)
+    monkeypatch.setitem(cache.CACHE_POLICIES, "flights", (TTL, STALE))
+    responses = cache.ResponseCache(100)
+    monkeypatch.setattr(main, "responses", responses)
+    # Each upstream response says which call produced it
+    mock_upstream.respond = lambda request: httpx.Response(200, json={"data": [mock_upstream.calls]})
+    return responses
+
+
+def get_flight(client, flight_iata="AA100"):
+    return client.get("/flights", params={"flight_iata": flight_iata})
+
+
+async def settle(responses):
+    """Wait for background refreshes to finish"""
+    while responses._tasks:
+        await asyncio.sleep(0.01)
+
+
+async def test_miss_then_hit(responses, mock_upstream, client):
+    miss = await get_flight(client)
+    hit = await get_flight(client)
+
+    assert miss.headers["X-Cache"] == "MISS"
+    assert "Age" not in miss.headers
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["Age"] == "0"
+    assert hit.json() == miss.json() == {"data": [1]}
+    assert mock_upstream.calls == 1
+
+
+async def test_params_are_cached_separately(responses, mock_upstream, client):
+    await get_flight(client, "AA100")
+
+    response = await get_flight(client, "BA200")
+
+    assert response.headers["X-Cache"] == "MISS"
+    assert mock_upstream.calls == 2
+
+
+async def test_stale_entry_is_served_while_one_refresh_runs(responses, mock_upstream, client):
+    await get_flight(client)
+    await asyncio.sleep(TTL + 0.05)
+    mock_upstream.delay = 0.1
+
+    stale = await asyncio.gather(*(get_flight(client) for _ in range(5)))
+
+    assert [response.headers["X-Cache"] for response in stale] == ["STALE"] * 5
+    assert all(response.json() == {"data": [1]} for response in stale)
+    assert "Age" in stale[0].headers
+    await settle(responses)
+    assert mock_upstream.calls == 2
+
+    refreshed = await get_flight(client)
+
+    assert refreshed.headers["X-Cache"] == "HIT"
+    assert refreshed.json() == {"data": [2]}
+    assert responses.stats()["refreshes"] == 1
+
+
+async def test_failed_refresh_keeps_the_stale_entry(responses, mock_upstream, client):
+    await get_flight(client)
+    await asyncio.sleep(TTL + 0.05)
+    mock_upstream.respond = lambda request: httpx.Response(200, json={"error": {"code": "function_access_restricted"}})
+
+    stale = await get_flight(client)
+    await settle(responses)
+    again = await get_flight(client)
+
+    assert stale.headers["X-Cache"] == again.headers["X-Cache"] == "STALE"
+    assert again.json() == {"data": [1]}
+    assert responses.stats()["refresh_failures"] >= 1
+
+
+async def test_expired_entry_is_fetched_again(responses, mock_upstream, client):
+    await get_flight(client)
+    await asyncio.sleep(TTL + STALE + 0.05)
+
+    response = await get_flight(client)
+
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json() == {"data": [2]}
+    assert mock_upstream.calls == 2
+
+
+async def test_endpoint_without_a_ttl_bypasses_the_cache(responses, mock_upstream, client, monkeypatch):
+    monkeypatch.setitem(cache.CACHE_POLICIES, "taxes", (0, 0))
+
+    first = await client.get("/taxes")
+    second = await client.get("/taxes")
+
+    assert first.headers["X-Cache"] == second.headers["X-Cache"] == "BYPASS"
+    assert mock_upstream.calls == 2
+
+
+async def test_disabled_cache_bypasses_every_endpoint(responses, mock_upstream, client, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_ENABLED", False)
+
+    await get_flight(client)
+    response = await get_flight(client)
+
+    assert response.headers["X-Cache"] == "BYPASS"
+    assert mock_upstream.calls == 2
+
+
+async def test_upstream_error_bodies_are_not_cached(responses, mock_upstream, client):
+    mock_upstream.respond = lambda request: httpx.Response(200, json={"error": {"code": "invalid_access_key"}})
+
+    first = await get_flight(client)
+    second = await get_flight(client)
+
+    assert first.headers["X-Cache"] == second.headers["X-Cache"] == "MISS"
+    assert mock_upstream.calls == 2
+    assert responses.stats()["size"] == 0
+
+
+async def test_upstream_failures_are_not_cached(responses, mock_upstream, client):
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    mock_upstream.respond = refuse
+    assert (await get_flight(client)).status_code == 502
+    mock_upstream.respond = lambda request: httpx.Response(200, json={"data": []})
+
+    response = await get_flight(client)
+
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+
+
+async def test_expired_entry_is_served_degraded_when_the_budget_is_spent(responses, mock_upstream, client,
+                                                                      monkeypatch, tmp_path):
+    await get_flight(client)
+    await asyncio.sleep(TTL + STALE + 0.05)
+    spent = UpstreamBudget(rate=0, burst=1, monthly_quota=0, usage_file=str(tmp_path / "usage.json"))
+    spent.exhausted = True
+    monkeypatch.setattr(upstream, "budget", spent)
+
+    degraded = await get_flight(client)
+    uncached = await get_flight(client, "BA200")
+
+    assert degraded.status_code == 200
+    assert degraded.headers["X-Cache"] == "DEGRADED"
+    assert degraded.json() == {"data": [1]}
+    assert "Age" in degraded.headers
+    assert uncached.status_code == 429
+    assert mock_upstream.calls == 1
+
+
+async def test_least_recently_used_entries_are_evicted(responses, mock_upstream, client):
+    responses.capacity = 2
+    for flight_iata in ("AA1", "AA2", "AA1", "AA3"):
+        await get_flight(client, flight_iata)
+
+    assert (await get_flight(client, "AA1")).headers["X-Cache"] == "HIT"
+    assert (await get_flight(client, "AA2")).headers["X-Cache"] == "MISS"
+    assert responses.stats()["evictions"] >= 1
+
+
+def test_policy_overrides_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CACHE_POLICIES", "flights=10:20, taxes=0:0,airports=60")
+    try:
+        importlib.reload(cache)
+
+        assert cache.CACHE_POLICIES["flights"] == (10.0, 20.0)
+        assert cache.CACHE_POLICIES["taxes"] == (0.0, 0.0)
+        assert cache.CACHE_POLICIES["airports"] == (60.0, 0.0)
+        assert cache.CACHE_POLICIES["airlines"] == (24 * 3600, 7 * 24 * 3600)
+    finally:
+        monkeypatch.delenv("CACHE_POLICIES")
+        importlib.reload(cache)
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from conftest import FLIGHTS
+
+pytestmark = pytest.mark.anyio
+
+
+def get_flight(client, flight_iata="AA100"):
+    return client.get("/flights", params={"flight_iata": flight_iata})
+
+
+async def test_concurrent_identical_requests_share_one_upstream_call(mock_upstream, client):
+    mock_upstream.delay = 0.2
+
+    responses = await asyncio.gather(*(get_flight(client) for _ in range(10)))
+
+    assert [response.status_code for response in responses] == [200] * 10
+    assert all(response.json() == FLIGHTS for response in responses)
+    assert mock_upstream.calls == 1
+
+
+async def test_different_requests_are_not_coalesced(mock_upstream, client):
+    mock_upstream.delay = 0.1
+
+    responses = await asyncio.gather(get_flight(client, "AA100"), get_flight(client, "BA200"))
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert mock_upstream.calls == 2
+
+
+async def test_waiters_get_the_shared_error(mock_upstream, client):
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    mock_upstream.delay = 0.2
+    mock_upstream.respond = refuse
+
+    responses = await asyncio.gather(*(get_flight(client) for _ in range(5)))
+
+    assert [response.status_code for response in responses] == [502] * 5
+    assert {response.json()["detail"] for response in responses} == {"Could not reach AviationStack: ConnectError"}
+    assert mock_upstream.calls == 1
+
+
+async def test_cancelled_caller_does_not_cancel_the_shared_call(mock_upstream, client):
+    mock_upstream.delay = 0.3
+    first = asyncio.create_task(get_flight(client))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(get_flight(client))
+    await asyncio.sleep(0.05)
+
+    # The first caller started the upstream call, then goes away
+    first.cancel()
+    response = await second
+
+    assert first.cancelled()
+    assert response.status_code == 200
+    assert response.json() == FLIGHTS
+    assert mock_upstream.calls == 1
+    assert mock_upstream.completed == 1
+
+
+async def test_metrics_report_the_coalescing_ratio(mock_upstream, client):
+    mock_upstream.delay = 0.2
+
+    await asyncio.gather(*(get_flight(client) for _ in range(5)), get_flight(client, "BA200"))
+    stats = (await client.get("/metrics")).json()["upstream"]
+
+    assert stats["upstream_calls"] == 2
+    assert stats["coalesced"] == 4
+    assert stats["coalescing_ratio"] == round(4 / 6, 3)
+    assert stats["in_flight"] == 0
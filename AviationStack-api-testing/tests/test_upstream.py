@@ -0,0 +1,69 @@
+import httpx
+import pytest
+
+import main
+import upstream
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lifespan_opens_and_closes_the_client():
+    assert upstream._client is None
+
+    async with main.lifespan(main.app):
+        client = upstream._client
+        assert isinstance(client, httpx.AsyncClient)
+        assert not client.is_closed
+
+    assert upstream._client is None
+    assert client.is_closed
+
+
+async def test_upstream_timeout_returns_504(mock_upstream, client):
+    def time_out(request):
+        raise httpx.ReadTimeout("Timed out", request=request)
+
+    mock_upstream.respond = time_out
+
+    response = await client.get("/flights", params={"flight_iata": "AA100"})
+
+    assert response.status_code == 504
+    assert response.json() == {"detail": "AviationStack did not respond in time"}
+
+
+async def test_upstream_transport_error_returns_502(mock_upstream, client):
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    mock_upstream.respond = refuse
+
+    response = await client.get("/airports", params={"search": "JFK"})
+
+    assert response.status_code == 502
+    assert response.json() == {"detail": "Could not reach AviationStack: ConnectError"}
+
+
+async def test_non_json_upstream_response_returns_502(mock_upstream, client):
+    mock_upstream.respond = lambda request: httpx.Response(503, text="<html>Service Unavailable</html>")
+
+    response = await client.get("/airlines", params={"search": "Delta"})
+
+    assert response.status_code == 502
+    assert response.json() == {"detail": "AviationStack returned a non-JSON response (503)"}
+
+
+async def test_requests_go_to_the_upstream_with_the_access_key(mock_upstream, client):
+    sent = []
+
+    def record(request):
+        sent.append(request)
+        return httpx.Response(200, json={"data": []})
+
+    mock_upstream.respond = record
+
+    response = await client.get("/flights", params={"dep_iata": "JFK"})
+
+    assert response.status_code == 200
+    assert sent[0].url.path.endswith("/flights")
+    assert sent[0].url.params["dep_iata"] == "JFK"
+    assert sent[0].url.params["access_key"] == main.AVIATIONSTACK_API_KEY
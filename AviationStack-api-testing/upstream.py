@@ -0,0 +1,145 @@
+import asyncio
+import importlib.util
+import os
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from budget import budget
+
+# Point at a local mock server for testing, e.g. http://127.0.0.1:9000/v1
+BASE_URL = os.getenv("AVIATIONSTACK_BASE_URL", "https://api.aviationstack.com/v1")
+
+# Timeouts in seconds
+CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", 30))
+
+# Connection pool shared by all requests
+MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", 20))
+KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", 30))
+
+# Identical concurrent requests share one upstream call
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+# HTTP/2 needs the h2 package (httpx[http2]); without it requests use HTTP/1.1
+HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def request_key(endpoint: str, params: dict) -> tuple:
+    """Endpoint plus sorted params; the access key does not change the response"""
+    return (endpoint, tuple(sorted(
+        (name, str(value)) for name, value in params.items()
+        if name != "access_key" and value is not None
+    )))
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the key share its outcome"""
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _finished(task: asyncio.Task) -> None:
+        # Retrieve the outcome so an error nobody is left waiting for is not logged
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, call):
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            # A task of its own, so a caller that disconnects doesn't cancel it for the rest
+            task = asyncio.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            task.add_done_callback(self._finished)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        requests = self.calls + self.coalesced
+        return {
+            "enabled": COALESCE_REQUESTS,
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalescing_ratio": round(self.coalesced / requests, 3) if requests else None,
+            "in_flight": len(self._calls),
+        }
+
+
+single_flight = SingleFlight()
+
+
+async def start():
+    """Open the shared client (called from the app lifespan)"""
+    global _client
+    _client = httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=HTTP2,
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+    )
+
+
+async def close():
+    """Close pooled connections on shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch(endpoint: str, params: dict):
+    """GET an AviationStack endpoint; returns (status code, JSON body)
+
+    Callers asking for the same endpoint and params while a call is in flight
+    get that call's result or error instead of sending their own. Each call
+    sent spends upstream budget and raises BudgetExceeded (429) when there is
+    none left.
+    """
+    if not COALESCE_REQUESTS:
+        return await _get(endpoint, params)
+    return await single_flight.do(request_key(endpoint, params), lambda: _get(endpoint, params))
+
+
+async def _get(endpoint: str, params: dict):
+    if _client is None:
+        raise RuntimeError("Upstream client is not started")
+    await budget.acquire(endpoint)
+    try:
+        response = await _client.get(f"/{endpoint}", params=params)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="AviationStack did not respond in time")
+    except httpx.TransportError as e:
+        raise HTTPException(status_code=502, detail=f"Could not reach AviationStack: {type(e).__name__}")
+
+    try:
+        body = response.json()
+    except ValueError:
+        raise HTTPException(status_code=502, detail=f"AviationStack returned a non-JSON response ({response.status_code})")
+
+    # Rate and quota refusals become 429s and tell the budget to hold back
+    error = body.get("error") if isinstance(body, dict) else None
+    error_code = error.get("code") if isinstance(error, dict) else None
+    if error_code == "usage_limit_reached":
+        raise budget.limited_upstream(error_code)
+    if response.status_code == 429 or error_code == "rate_limit_reached":
+        raise budget.limited_upstream("rate_limit_reached")
+    return response.status_code, body
+
+
+def is_success(status_code: int, body) -> bool:
+    """AviationStack reports failures as an "error" object in the body"""
+    return 200 <= status_code < 300 and not (isinstance(body, dict) and "error" in body)
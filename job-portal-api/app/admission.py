@@ -0,0 +1,209 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+
+# Requests served at once per route class; further requests wait for a slot
+READ_CONCURRENCY = int(os.getenv("READ_CONCURRENCY", 64))
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", 16))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", 4))
+# Longest a request may wait for a slot; requests expected to wait longer are
+# turned away at once with 503 instead of timing out later
+QUEUE_BUDGET_MS = float(os.getenv("QUEUE_BUDGET_MS", 250))
+# Per-client token bucket: sustained requests per second and burst size (0 disables)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 20))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 60))
+# Identify clients by X-Forwarded-For; only enable behind a proxy that sets it
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+# Buckets kept for the most recently seen clients; idle ones are dropped first
+MAX_TRACKED_CLIENTS = 10000
+# Probes and scrapes must keep working while the API sheds load
+EXEMPT_PATHS = ("/health", "/metrics")
+# Weight of the newest request in the moving average of service time
+SERVICE_TIME_SMOOTHING = 0.1
+
+def route_class(method: str, path: str) -> str:
+    """'read', 'write' or 'upload' (file uploads and NDJSON bulk imports)"""
+    if method in ("GET", "HEAD"):
+        return "read"
+    if path.endswith("/upload-resume") or path.endswith("/bulk"):
+        return "upload"
+    return "write"
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests; the rest queue FIFO within the latency budget"""
+
+    def __init__(self, limit: int, budget_seconds: float):
+        self.limit = limit
+        self.budget_seconds = budget_seconds
+        self.in_flight = 0
+        self.service_seconds = 0.0
+        self._waiters = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.wait_seconds = 0.0
+
+    def estimated_wait(self) -> float:
+        """Expected wait of a request joining the queue now"""
+        return (len(self._waiters) + 1) * self.service_seconds / self.limit
+
+    async def acquire(self) -> Optional[float]:
+        """Take a slot; if the request is shed instead, return seconds to retry after"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+        estimate = self.estimated_wait()
+        if estimate > self.budget_seconds:
+            self.shed += 1
+            return estimate
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.budget_seconds)
+        except asyncio.TimeoutError:
+            # release() may have handed over the slot just as the budget ran out
+            if not (waiter.done() and not waiter.cancelled()):
+                self.shed += 1
+                return max(self.estimated_wait(), self.budget_seconds)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                # Abandoned: leave the line so free slots are not held for it
+                waiter.cancel()
+                self._waiters.remove(waiter)
+        self.admitted += 1
+        self.queued += 1
+        self.wait_seconds += time.perf_counter() - started
+        return None
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """Free a slot, handing it straight to the longest-waiting request"""
+        if service_seconds is not None:
+            if self.service_seconds:
+                self.service_seconds += SERVICE_TIME_SMOOTHING * (service_seconds - self.service_seconds)
+            else:
+                self.service_seconds = service_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "mean_wait_ms": round(self.wait_seconds * 1000 / self.queued, 2) if self.queued else None,
+            "service_ms": round(self.service_seconds * 1000, 2),
+        }
+
+class TokenBuckets:
+    """Per-client token buckets refilled at ``rate`` tokens per second up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = OrderedDict()
+        self.limited = 0
+
+    def take(self, client: str) -> float:
+        """Spend a token; 0 if one was available, else seconds until one is"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        self._buckets[client] = (tokens - 1 if tokens >= 1 else tokens, now)
+        while len(self._buckets) > MAX_TRACKED_CLIENTS:
+            self._buckets.popitem(last=False)
+        if tokens >= 1:
+            return 0.0
+        self.limited += 1
+        return (1 - tokens) / self.rate
+
+    def stats(self) -> dict:
+        return {
+            "per_second": self.rate,
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "limited": self.limited,
+        }
+
+limiters = {
+    "read": ConcurrencyLimiter(READ_CONCURRENCY, QUEUE_BUDGET_MS / 1000),
+    "write": ConcurrencyLimiter(WRITE_CONCURRENCY, QUEUE_BUDGET_MS / 1000),
+    "upload": ConcurrencyLimiter(UPLOAD_CONCURRENCY, QUEUE_BUDGET_MS / 1000),
+}
+rate_limits = TokenBuckets(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST) if RATE_LIMIT_PER_SECOND > 0 else None
+
+def client_address(scope: dict) -> str:
+    if TRUST_FORWARDED_FOR:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+async def _reject(scope, receive, send, status_code: int, detail: str, retry_after: float) -> None:
+    response = JSONResponse({"detail": detail}, status_code=status_code,
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    await response(scope, receive, send)
+
+class AdmissionMiddleware:
+    """Per-client rate limiting and per-route-class concurrency limits
+
+    Clients over their token bucket get 429. Requests beyond a class's
+    concurrency limit wait in line, but only while their expected wait fits
+    QUEUE_BUDGET_MS; otherwise they get 503 straight away, so the requests
+    that are admitted keep a bounded latency under overload. Both carry
+    Retry-After.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if rate_limits is not None:
+            retry_after = rate_limits.take(client_address(scope))
+            if retry_after:
+                await _reject(scope, receive, send, 429, "Rate limit exceeded", retry_after)
+                return
+
+        limiter = limiters[route_class(scope["method"], scope["path"])]
+        retry_after = await limiter.acquire()
+        if retry_after is not None:
+            await _reject(scope, receive, send, 503, "Server busy, retry later", retry_after)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+def stats() -> dict:
+    """Concurrency limiter and rate limiter counters for this worker process"""
+    return {
+        "queue_budget_ms": QUEUE_BUDGET_MS,
+        "classes": {name: limiter.stats() for name, limiter in limiters.items()},
+        "rate_limit": rate_limits.stats() if rate_limits is not None else None,
+    }
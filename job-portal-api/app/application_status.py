@@ -0,0 +1,52 @@
+from typing import List, Optional
+
+from models import ApplicationStatus
+from outbox import record_events
+
+# Statuses an application may move to from each status; decisions are final
+TRANSITIONS = {
+    ApplicationStatus.PENDING: {ApplicationStatus.REVIEWED, ApplicationStatus.ACCEPTED, ApplicationStatus.REJECTED},
+    ApplicationStatus.REVIEWED: {ApplicationStatus.ACCEPTED, ApplicationStatus.REJECTED},
+    ApplicationStatus.ACCEPTED: set(),
+    ApplicationStatus.REJECTED: set(),
+}
+
+def can_transition(current: ApplicationStatus, status: ApplicationStatus) -> bool:
+    return status in TRANSITIONS[current]
+
+def transition_applications(
+    cursor,
+    status: ApplicationStatus,
+    application_ids: Optional[List[int]] = None,
+    job_id: Optional[int] = None,
+    current_statuses: Optional[List[ApplicationStatus]] = None
+) -> list:
+    """Move the selected applications that may reach ``status`` to it in one statement
+
+    Applications are selected by id or by job, optionally narrowed to
+    ``current_statuses``; the rest are left alone. Returns the updated rows
+    and records their status_changed events in the caller's transaction.
+    """
+    sources = [current.value for current, targets in TRANSITIONS.items()
+               if status in targets and (current_statuses is None or current in current_statuses)]
+    if not sources or application_ids == []:
+        return []
+
+    if application_ids is not None:
+        selector = f"id IN ({','.join('?' * len(application_ids))})"
+        params = list(application_ids)
+    else:
+        selector = "job_id = ?"
+        params = [job_id]
+
+    # The status guard makes the transition check part of the same statement,
+    # so rows changed concurrently are skipped rather than overwritten
+    cursor.execute(f"""
+        UPDATE applications
+        SET status = ?
+        WHERE {selector} AND status IN ({','.join('?' * len(sources))})
+        RETURNING id, job_id, seeker_id, status
+    """, (status.value, *params, *sources))
+    rows = cursor.fetchall()
+    record_events(cursor, "application.status_changed", rows)
+    return rows
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+from database import utc_timestamp
+from job_cache import invalidate_jobs
+from ranking import invalidate_job
+from writer import run_write
+
+# Closed/filled postings untouched for this long move to the archive tables
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", 90))
+# Postings (with all their applications) moved per transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 100))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+# Pause between batches so foreground writes are not starved
+ARCHIVE_BATCH_PAUSE_SECONDS = 0.05
+
+JOB_COLUMNS = ("id, employer_id, title, description, requirements, location, latitude, longitude, "
+               "geo_cell, salary_range, salary_min, salary_max, job_type, experience_required, status, "
+               "created_at, updated_at")
+APPLICATION_COLUMNS = "id, job_id, seeker_id, cover_letter, resume_url, status, applied_at"
+
+def archive_batch(cursor, cutoff: str, limit: int) -> list:
+    """Move up to ``limit`` stale closed/filled postings and their applications"""
+    cursor.execute("""
+        SELECT id FROM job_postings
+        WHERE status IN ('closed', 'filled') AND updated_at <= ?
+        ORDER BY updated_at
+        LIMIT ?
+    """, (cutoff, limit))
+    job_ids = [row["id"] for row in cursor.fetchall()]
+    if not job_ids:
+        return []
+
+    placeholders = ",".join("?" * len(job_ids))
+    cursor.execute(f"""
+        INSERT INTO job_postings_archive ({JOB_COLUMNS})
+        SELECT {JOB_COLUMNS} FROM job_postings WHERE id IN ({placeholders})
+    """, job_ids)
+    cursor.execute(f"""
+        INSERT INTO applications_archive ({APPLICATION_COLUMNS})
+        SELECT {APPLICATION_COLUMNS} FROM applications WHERE job_id IN ({placeholders})
+    """, job_ids)
+
+    # Archived applications keep their resume blob references
+    cursor.execute(f"DELETE FROM applications WHERE job_id IN ({placeholders})", job_ids)
+    cursor.execute(f"DELETE FROM job_application_counts WHERE job_id IN ({placeholders})", job_ids)
+    cursor.execute(f"DELETE FROM job_skills WHERE job_id IN ({placeholders})", job_ids)
+    cursor.execute(f"DELETE FROM job_postings WHERE id IN ({placeholders})", job_ids)
+    return job_ids
+
+async def archive_stale_jobs(retention_days: float = ARCHIVE_RETENTION_DAYS,
+                             batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Archive every posting past the retention window, one bounded batch at a time"""
+    cutoff = utc_timestamp(-retention_days * 86400)
+    archived = 0
+    while True:
+        job_ids = await run_write(lambda cursor: archive_batch(cursor, cutoff, batch_size))
+        for job_id in job_ids:
+            invalidate_job(job_id)
+        invalidate_jobs(job_ids)
+        archived += len(job_ids)
+        if len(job_ids) < batch_size:
+            return archived
+        await asyncio.sleep(ARCHIVE_BATCH_PAUSE_SECONDS)
+
+async def run_archiver(interval: int = ARCHIVE_INTERVAL_SECONDS) -> None:
+    """Background task archiving stale postings periodically"""
+    while True:
+        try:
+            archived = await archive_stale_jobs()
+            if archived:
+                print(f"📦 Archived {archived} closed job postings")
+        except Exception as e:
+            print(f"⚠️ Job archival failed: {e}")
+        await asyncio.sleep(interval)
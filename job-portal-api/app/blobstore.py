@@ -0,0 +1,118 @@
+import asyncio
+import os
+import re
+import time
+from typing import Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from database import utc_timestamp
+from writer import run_write
+from uploads import stream_pdf_upload
+
+# Content-addressed resume storage (override with environment variables)
+STORAGE_DIR = os.getenv("STORAGE_DIR", "/app/storage")
+BLOB_DIR = os.path.join(STORAGE_DIR, "blobs")
+BLOB_URL_PREFIX = "/storage/blobs/"
+# Unreferenced blobs are kept this long before collection, so an upload racing
+# with the last release of the same content never loses its file
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", 3600))
+BLOB_GC_INTERVAL_SECONDS = int(os.getenv("BLOB_GC_INTERVAL_SECONDS", 600))
+
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+_BLOB_URL_RE = re.compile(re.escape(BLOB_URL_PREFIX) + r"([0-9a-f]{64})\.pdf")
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.fullmatch(value))
+
+def blob_path(digest: str) -> str:
+    """Blobs are fanned out by the first two hex digits of their SHA-256"""
+    return os.path.join(BLOB_DIR, digest[:2], f"{digest}.pdf")
+
+def blob_url(digest: str) -> str:
+    return f"{BLOB_URL_PREFIX}{digest}.pdf"
+
+def blob_digest(resume_url: Optional[str]) -> Optional[str]:
+    """Digest referenced by a resume URL, or None for legacy per-record files"""
+    if not resume_url:
+        return None
+    match = _BLOB_URL_RE.fullmatch(resume_url)
+    return match.group(1) if match else None
+
+def _place(tmp_path: str, digest: str) -> None:
+    path = blob_path(digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Re-placing identical content is harmless and revives a blob pending collection
+    os.replace(tmp_path, path)
+
+async def store_pdf_upload(file: UploadFile) -> dict:
+    """Stream a PDF upload into the blob store, deduplicated by content hash"""
+    upload = await stream_pdf_upload(file, BLOB_DIR)
+    await run_in_threadpool(_place, upload["tmp_path"], upload["sha256"])
+    return {"sha256": upload["sha256"], "size": upload["size"], "url": blob_url(upload["sha256"])}
+
+def retain(cursor, digest: str, size: int) -> None:
+    """Add a reference to a blob"""
+    cursor.execute("""
+        INSERT INTO blobs (digest, size, ref_count) VALUES (?, ?, 1)
+        ON CONFLICT(digest) DO UPDATE SET ref_count = blobs.ref_count + 1, released_at = NULL
+    """, (digest, size))
+
+def release(cursor, resume_url: Optional[str]) -> None:
+    """Drop a reference held by a resume URL; unreferenced blobs await collection"""
+    digest = blob_digest(resume_url)
+    if not digest:
+        return
+    cursor.execute("""
+        UPDATE blobs
+        SET ref_count = ref_count - 1,
+            released_at = CASE WHEN ref_count <= 1 THEN CURRENT_TIMESTAMP END
+        WHERE digest = ? AND ref_count > 0
+    """, (digest,))
+
+def replace_reference(cursor, old_url: Optional[str], blob: dict) -> None:
+    """Point a record from its previous resume at a newly stored blob"""
+    retain(cursor, blob["sha256"], blob["size"])
+    release(cursor, old_url)
+
+def _delete_released_blobs(cursor, grace_seconds: int) -> set:
+    """Drop blob rows unreferenced past the grace period; returns the digests left"""
+    cursor.execute("""
+        DELETE FROM blobs
+        WHERE ref_count <= 0 AND released_at <= ?
+    """, (utc_timestamp(-grace_seconds),))
+    cursor.execute("SELECT digest FROM blobs")
+    return {row["digest"] for row in cursor.fetchall()}
+
+def _sweep_files(known: set, grace_seconds: int) -> int:
+    """Remove stored files whose digest is not in ``known``"""
+    # Sweep every file no row points at: collected blobs, interrupted uploads
+    # and uploads whose record was deleted meanwhile. Recently written files
+    # are skipped, which covers an upload re-placing content just collected.
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for root, _, files in os.walk(BLOB_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if name[:-len(".pdf")] in known or os.path.getmtime(path) > cutoff:
+                continue
+            os.unlink(path)
+            removed += 1
+    return removed
+
+async def collect_garbage(grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> int:
+    """Delete blobs that have been unreferenced for longer than the grace period"""
+    known = await run_write(lambda cursor: _delete_released_blobs(cursor, grace_seconds))
+    return await run_in_threadpool(_sweep_files, known, grace_seconds)
+
+async def run_garbage_collector(interval: int = BLOB_GC_INTERVAL_SECONDS) -> None:
+    """Background task collecting unreferenced blobs periodically"""
+    while True:
+        try:
+            removed = await collect_garbage()
+            if removed:
+                print(f"🧹 Removed {removed} unreferenced resume blobs")
+        except Exception as e:
+            print(f"⚠️ Blob garbage collection failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,110 @@
+import os
+
+from fastapi import Request
+from pydantic import ValidationError
+
+from database import DATABASE_BACKEND
+from writer import run_write
+
+# Records inserted per transaction by the NDJSON bulk import endpoints
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 5000))
+# Cap on per-record errors echoed back in one response
+BULK_MAX_REPORTED_ERRORS = 1000
+
+def allocate_ids(cursor, table: str, count: int):
+    """Reserve ids for rows inserted in the current write transaction"""
+    if DATABASE_BACKEND == "postgres":
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(?, 'id')) FROM generate_series(1, ?)",
+                       (table, count))
+        return [row[0] for row in cursor.fetchall()]
+    
+    cursor.execute(f"""
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+            COALESCE((SELECT MAX(id) FROM {table}), 0)
+        )
+    """, (table,))
+    start = cursor.fetchone()[0] + 1
+    return range(start, start + count)
+
+def reject_duplicate_emails(cursor, table: str, batch):
+    """Split a batch into rejected (line, error) pairs and records with unused emails"""
+    emails = sorted({record.email for _, record in batch})
+    placeholders = ",".join("?" * len(emails))
+    cursor.execute(f"SELECT email FROM {table} WHERE email IN ({placeholders})", emails)
+    taken = {row["email"] for row in cursor.fetchall()}
+
+    rejected, accepted = [], []
+    for line, record in batch:
+        if record.email in taken:
+            rejected.append((line, f"Email already registered: {record.email}"))
+        else:
+            taken.add(record.email)
+            accepted.append(record)
+    return rejected, accepted
+
+def _format_error(err: dict) -> str:
+    location = ".".join(str(part) for part in err["loc"])
+    return f"{location}: {err['msg']}" if location else err["msg"]
+
+def _parse_line(model, line: bytes):
+    try:
+        return model.model_validate_json(line), None
+    except ValidationError as e:
+        return None, "; ".join(_format_error(err) for err in e.errors())
+
+async def import_ndjson(request: Request, model, insert_batch) -> dict:
+    """Stream-parse an NDJSON body, validate each line and insert in batches
+
+    ``insert_batch`` receives a write cursor and a list of ``(line_number, record)``
+    pairs and runs on the writer; it inserts them in one transaction and returns
+    a list of ``(line_number, error)`` for records it rejected.
+    """
+    received = 0
+    inserted = 0
+    errors = []
+    batch = []
+    buffer = b""
+
+    async def flush():
+        nonlocal inserted, batch
+        pending = batch
+        rejected = await run_write(lambda cursor: insert_batch(cursor, pending))
+        inserted += len(batch) - len(rejected)
+        errors.extend(rejected)
+        batch = []
+
+    async def handle(line_number: int, line: bytes):
+        nonlocal received
+        if not line.strip():
+            return
+        received += 1
+        record, error = _parse_line(model, line)
+        if error:
+            errors.append((line_number, error))
+            return
+        batch.append((line_number, record))
+        if len(batch) >= BULK_BATCH_SIZE:
+            await flush()
+
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            await handle(line_number, line)
+    if buffer:
+        line_number += 1
+        await handle(line_number, buffer)
+    if batch:
+        await flush()
+
+    errors.sort()
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": [{"line": line, "error": error} for line, error in errors[:BULK_MAX_REPORTED_ERRORS]],
+        "errors_truncated": len(errors) > BULK_MAX_REPORTED_ERRORS
+    }
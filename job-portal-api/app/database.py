@@ -1,18 +1,129 @@
 import sqlite3
 from contextlib import contextmanager
 import os
+import time
+
+from metrics import record_query
+from geo import backfill_locations
+from salary import backfill_salary_ranges, SALARY_REACH_SQL
+from skills import backfill_skill_index
 
 # Use environment variable or default path for persistence
 DATABASE_PATH = os.getenv("DATABASE_PATH", "/app/data/jobportal.db")
+# A postgresql:// URL switches storage from the SQLite file to a Postgres server
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+
+if DATABASE_URL.startswith(("postgres://", "postgresql://")):
+    from postgres import PostgresDatabase
+    
+    DATABASE_BACKEND = "postgres"
+    _postgres = PostgresDatabase(DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE)
+    IntegrityError = _postgres.IntegrityError
+    OperationalError = _postgres.OperationalError
+else:
+    DATABASE_BACKEND = "sqlite"
+    _postgres = None
+    IntegrityError = sqlite3.IntegrityError
+    OperationalError = sqlite3.OperationalError
+
+class TracedCursor(sqlite3.Cursor):
+    """sqlite3 cursor reporting statement and fetch times to the metrics layer"""
+
+    def execute(self, sql, parameters=()):
+        self.sql = sql
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.sql = sql
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+    # SQLite produces rows lazily, so stepping through results is database time too
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_query(self.sql, time.perf_counter() - started, executed=False)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_query(self.sql, time.perf_counter() - started, executed=False)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size or self.arraysize)
+        finally:
+            record_query(self.sql, time.perf_counter() - started, executed=False)
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (and execute shortcuts) are traced"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _add_missing_columns(cursor, table: str, columns: dict) -> None:
+    """Add columns introduced after the table was first created (SQLite has no ADD COLUMN IF NOT EXISTS)"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def backfill_application_counts(cursor) -> None:
+    """Count applications that predate the counter table (runs once, while it is empty)"""
+    cursor.execute("""
+        INSERT INTO job_application_counts (job_id, status, application_count)
+        SELECT job_id, status, COUNT(*) FROM applications
+        WHERE NOT EXISTS (SELECT 1 FROM job_application_counts)
+        GROUP BY job_id, status
+    """)
+
+def utc_timestamp(offset_seconds: float = 0) -> str:
+    """Current UTC time (plus an offset) formatted like CURRENT_TIMESTAMP"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() + offset_seconds))
 
 def init_db():
     """Initialize the database with required tables"""
+    if _postgres is not None:
+        with _postgres.connection() as conn:
+            cursor = conn.cursor()
+            _postgres.create_schema(cursor)
+            backfill_application_counts(cursor)
+            backfill_skill_index(cursor)
+            backfill_salary_ranges(cursor)
+            backfill_locations(cursor)
+        print("✅ Database initialized successfully on PostgreSQL!")
+        return
+    
     # Ensure the directory exists
     os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
     
     conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
+    # WAL lets reader connections run alongside the single writer
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
     # Job Seekers table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS job_seekers (
@@ -49,7 +160,12 @@ def init_db():
             description TEXT NOT NULL,
             requirements TEXT NOT NULL,
             location TEXT NOT NULL,
+            latitude REAL,
+            longitude REAL,
+            geo_cell INTEGER,
             salary_range TEXT NOT NULL,
+            salary_min INTEGER,
+            salary_max INTEGER,
             job_type TEXT NOT NULL,
             experience_required INTEGER NOT NULL,
             status TEXT DEFAULT 'open',
@@ -75,6 +191,245 @@ def init_db():
         )
     """)
     
+    # Normalized skills with inverted indexes (skill -> jobs, skill -> seekers)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_skills (
+            skill_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            PRIMARY KEY (skill_id, job_id),
+            FOREIGN KEY (skill_id) REFERENCES skills(id),
+            FOREIGN KEY (job_id) REFERENCES job_postings(id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_skills_job ON job_skills(job_id)")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seeker_skills (
+            skill_id INTEGER NOT NULL,
+            seeker_id INTEGER NOT NULL,
+            PRIMARY KEY (skill_id, seeker_id),
+            FOREIGN KEY (skill_id) REFERENCES skills(id),
+            FOREIGN KEY (seeker_id) REFERENCES job_seekers(id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seeker_skills_seeker ON seeker_skills(seeker_id)")
+    
+    # Content-addressed resume blobs, reference-counted from resume_url columns
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            digest TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            released_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_seekers_resume_url ON job_seekers(resume_url)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_applications_resume_url ON applications(resume_url)")
+    # Applicant lists and exports of a job, newest first, without a sort
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_applications_job_applied ON applications(job_id, applied_at, id)")
+    
+    # Persistent queue of resume text extraction jobs, one per blob
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resume_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            digest TEXT UNIQUE NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            leased_until TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # A processing job not finished by then (its worker process stopped) is claimed again
+    _add_missing_columns(cursor, "resume_jobs", {"leased_until": "TIMESTAMP"})
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resume_jobs_queue ON resume_jobs(status, available_at)")
+    
+    # Extracted resume text with a full-text search index over it
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resume_texts (
+            digest TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS resume_search
+        USING fts5(text, content='resume_texts', content_rowid='rowid')
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS resume_texts_ai AFTER INSERT ON resume_texts BEGIN
+            INSERT INTO resume_search (rowid, text) VALUES (new.rowid, new.text);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS resume_texts_ad AFTER DELETE ON resume_texts BEGIN
+            INSERT INTO resume_search (resume_search, rowid, text) VALUES ('delete', old.rowid, old.text);
+        END
+    """)
+    
+    # Derived resume data goes away with its blob
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS blobs_ad AFTER DELETE ON blobs BEGIN
+            DELETE FROM resume_texts WHERE digest = old.digest;
+            DELETE FROM resume_jobs WHERE digest = old.digest;
+        END
+    """)
+    
+    # Application counts per job and status, kept current by triggers so the
+    # employer dashboard never scans applications
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_application_counts (
+            job_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            application_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, status)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_postings_employer ON job_postings(employer_id)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS applications_count_ai AFTER INSERT ON applications BEGIN
+            INSERT INTO job_application_counts (job_id, status, application_count)
+            VALUES (new.job_id, new.status, 1)
+            ON CONFLICT(job_id, status) DO UPDATE SET application_count = application_count + 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS applications_count_ad AFTER DELETE ON applications BEGIN
+            UPDATE job_application_counts SET application_count = application_count - 1
+            WHERE job_id = old.job_id AND status = old.status;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS applications_count_au AFTER UPDATE OF status ON applications
+        WHEN old.status IS NOT new.status BEGIN
+            UPDATE job_application_counts SET application_count = application_count - 1
+            WHERE job_id = old.job_id AND status = old.status;
+            INSERT INTO job_application_counts (job_id, status, application_count)
+            VALUES (new.job_id, new.status, 1)
+            ON CONFLICT(job_id, status) DO UPDATE SET application_count = application_count + 1;
+        END
+    """)
+    backfill_application_counts(cursor)
+    
+    # Closed/filled postings past retention and their applications (see archive.py)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_postings_status_updated ON job_postings(status, updated_at)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_postings_archive (
+            id INTEGER PRIMARY KEY,
+            employer_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            requirements TEXT NOT NULL,
+            location TEXT NOT NULL,
+            latitude REAL,
+            longitude REAL,
+            geo_cell INTEGER,
+            salary_range TEXT NOT NULL,
+            salary_min INTEGER,
+            salary_max INTEGER,
+            job_type TEXT NOT NULL,
+            experience_required INTEGER NOT NULL,
+            status TEXT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS applications_archive (
+            id INTEGER PRIMARY KEY,
+            job_id INTEGER NOT NULL,
+            seeker_id INTEGER NOT NULL,
+            cover_letter TEXT NOT NULL,
+            resume_url TEXT,
+            status TEXT,
+            applied_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_applications_archive_job ON applications_archive(job_id)")
+    
+    # Annual salary bounds parsed from salary_range (see salary.py)
+    for table in ("job_postings", "job_postings_archive"):
+        _add_missing_columns(cursor, table, {"salary_min": "INTEGER", "salary_max": "INTEGER"})
+    cursor.execute("DROP INDEX IF EXISTS idx_job_postings_status_salary")
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_job_postings_status_salary_reach
+        ON job_postings(status, ({SALARY_REACH_SQL}), salary_min, experience_required)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_job_postings_status_experience
+        ON job_postings(status, experience_required, salary_max)
+    """)
+    
+    # Coordinates and grid cell of the location (see geo.py)
+    for table in ("job_postings", "job_postings_archive"):
+        _add_missing_columns(cursor, table, {"latitude": "REAL", "longitude": "REAL", "geo_cell": "INTEGER"})
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_postings_geo_cell ON job_postings(geo_cell, status)")
+    
+    # Every change to a posting, read by each worker to invalidate its job caches
+    # (see job_cache.py); rows are pruned once all workers have applied them.
+    # Updates and deletes log each posting; inserts only change listings, so the
+    # code inserting postings logs one row per transaction (job_cache.record_new_jobs)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS job_postings_changes_ai")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_postings_changes_au AFTER UPDATE ON job_postings BEGIN
+            INSERT INTO job_changes (job_id) VALUES (new.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_postings_changes_ad AFTER DELETE ON job_postings BEGIN
+            INSERT INTO job_changes (job_id) VALUES (old.id);
+        END
+    """)
+    
+    # Transactional outbox: application events written with the change itself,
+    # delivered to the configured sinks from per-sink cursors (see outbox.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            application_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_application ON events(application_id, id)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS event_sinks (
+            sink TEXT PRIMARY KEY,
+            last_event_id INTEGER NOT NULL DEFAULT 0,
+            delivered INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            leased_until TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    backfill_skill_index(cursor)
+    backfill_salary_ranges(cursor)
+    backfill_locations(cursor)
+    
     conn.commit()
     conn.close()
     print(f"✅ Database initialized successfully at {DATABASE_PATH}!")
@@ -82,7 +437,12 @@ def init_db():
 @contextmanager
 def get_db_connection():
     """Context manager for database connections"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    if _postgres is not None:
+        with _postgres.connection() as conn:
+            yield conn
+        return
+    
+    conn = sqlite3.connect(DATABASE_PATH, factory=TracedConnection)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -93,6 +453,46 @@ def get_db_connection():
     finally:
         conn.close()
 
+def stream_query(sql: str, params=(), chunk_size: int = 1000):
+    """Yield a query's rows in lists of up to ``chunk_size`` without loading the whole result
+
+    StreamingResponse resumes sync generators on any threadpool thread, so the
+    SQLite connection skips its same-thread check (it is still used by one
+    thread at a time); Postgres rows come from a server-side cursor.
+    """
+    if _postgres is not None:
+        with _postgres.connection() as conn:
+            cursor = conn.cursor(name="stream_query")
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+    
+    conn = sqlite3.connect(DATABASE_PATH, factory=TracedConnection, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        conn.close()
+
+def run_transaction(operation):
+    """Run ``operation(cursor)`` in its own transaction and return its result"""
+    with get_db_connection() as conn:
+        return operation(conn.cursor())
+
+def close_db():
+    """Release pooled database connections"""
+    if _postgres is not None:
+        _postgres.close()
+
 def get_db():
     """Get database connection for dependency injection"""
     with get_db_connection() as conn:
@@ -0,0 +1,48 @@
+import csv
+import io
+import os
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+from database import stream_query
+from models import ExportFormat
+
+# Rows read from the database and encoded per chunk of an export response
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 1000))
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+def _csv_chunks(sql: str, params, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The header goes out before the query runs
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in stream_query(sql, params, EXPORT_CHUNK_ROWS):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def _ndjson_chunks(sql: str, params, mapper):
+    for rows in stream_query(sql, params, EXPORT_CHUNK_ROWS):
+        yield b"".join(orjson.dumps(mapper(row)) + b"\n" for row in rows)
+
+def stream_export(sql: str, params, columns, mapper, export_format: ExportFormat,
+                  filename: str) -> StreamingResponse:
+    """Stream a query's rows as CSV (``columns`` in SELECT order) or NDJSON (``mapper`` objects)
+
+    Rows are fetched and encoded EXPORT_CHUNK_ROWS at a time, so memory use does
+    not grow with the export and the first chunk is sent as soon as it is read.
+    """
+    if export_format == ExportFormat.CSV:
+        chunks = _csv_chunks(sql, params, columns)
+    else:
+        chunks = _ndjson_chunks(sql, params, mapper)
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[export_format], headers={
+        "Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'
+    })
@@ -0,0 +1,163 @@
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Offline city -> coordinates table shipped with the app
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          "gazetteer.csv"))
+# Grid cells are GRID_DEGREES x GRID_DEGREES (about 35 x 27 miles at US latitudes)
+GRID_DEGREES = 0.5
+CELLS_PER_ROW = int(360 / GRID_DEGREES)
+MILES_PER_DEGREE_LATITUDE = 69.09
+EARTH_RADIUS_MILES = 3958.8
+# Largest radius accepted by near searches, which bounds the cells scanned
+MAX_RADIUS_MILES = 250
+
+STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR",
+    "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC", "south dakota": "SD",
+    "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA",
+    "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}
+
+_COORDINATES_RE = re.compile(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*")
+
+def _city_key(city: str) -> str:
+    """Lowercase, drop punctuation and spell out 'St.' so 'St. Louis' == 'Saint Louis'"""
+    city = re.sub(r"[^a-z ]", "", city.lower().replace(".", " "))
+    city = re.sub(r"^st ", "saint ", " ".join(city.split()))
+    return city
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> Tuple[dict, dict]:
+    """(city, state) -> place and city -> most populous place with that name"""
+    by_city_state = {}
+    by_city = {}
+    with open(GAZETTEER_PATH, newline="") as f:
+        for row in csv.DictReader(f):
+            place = (float(row["latitude"]), float(row["longitude"]))
+            key = _city_key(row["city"])
+            by_city_state[(key, row["state"])] = place
+            population = int(row["population"])
+            if key not in by_city or by_city[key][1] < population:
+                by_city[key] = (place, population)
+    return by_city_state, {key: place for key, (place, _) in by_city.items()}
+
+_STATE_CODES = set(STATES.values())
+
+def _state_code(text: str) -> Optional[str]:
+    text = text.strip()
+    if len(text) == 2 and text.upper() in _STATE_CODES:
+        return text.upper()
+    # "Colorado", or a trailing ZIP code as in "CO 80202"
+    return STATES.get(text.lower()) or (_state_code(text.split()[0]) if " " in text else None)
+
+@lru_cache(maxsize=4096)
+def resolve_location(text: str) -> Optional[Tuple[float, float]]:
+    """Coordinates of 'City, ST', 'City, State', a bare city name or 'lat,lon'; None if unknown"""
+    match = _COORDINATES_RE.fullmatch(text)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+
+    by_city_state, by_city = _gazetteer()
+    parts = [part for part in text.split(",") if part.strip()]
+    if len(parts) >= 2:
+        state = _state_code(parts[-1])
+        if state:
+            # A known state pins the city: never substitute a namesake elsewhere
+            return by_city_state.get((_city_key(parts[-2]), state))
+    # A bare (or unrecognized-state) city name means its most populous namesake
+    return by_city.get(_city_key(parts[0])) if parts else None
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """Index of the grid cell containing a point"""
+    row = min(int((latitude + 90) / GRID_DEGREES), int(180 / GRID_DEGREES) - 1)
+    column = int((longitude + 180) / GRID_DEGREES) % CELLS_PER_ROW
+    return row * CELLS_PER_ROW + column
+
+def locate(text: str) -> Tuple[Optional[float], Optional[float], Optional[int]]:
+    """(latitude, longitude, grid cell) stored for a job location; all None if unknown"""
+    place = resolve_location(text)
+    if place is None:
+        return None, None, None
+    return place[0], place[1], grid_cell(*place)
+
+def near_filter(latitude: float, longitude: float, radius: float) -> Tuple[str, list]:
+    """SQL condition (and parameters) matching rows within ``radius`` miles of a point
+
+    Candidate rows come from the grid cells overlapping the search circle's
+    bounding box, so the geo_cell index serves the lookup; an equirectangular
+    distance check (plain arithmetic, accurate to well under 1% at these
+    radii) then trims the corners. Boxes crossing the antimeridian wrap
+    around it. Within a few degrees of the poles the box spans every
+    longitude and the check is only approximate: longitude is scaled by the
+    origin's latitude, which overstates distances poleward of it and
+    understates them equatorward.
+    """
+    lat_delta = radius / MILES_PER_DEGREE_LATITUDE
+    if abs(latitude) + lat_delta >= 90:
+        # The circle contains a pole, so every longitude
+        lon_delta = 180.0
+    else:
+        # Longitude degrees shrink toward the poles: size the box for its widest latitude
+        miles_per_degree_longitude = MILES_PER_DEGREE_LATITUDE * math.cos(math.radians(abs(latitude) + lat_delta))
+        lon_delta = min(radius / miles_per_degree_longitude, 180.0)
+
+    first_row = max(int((latitude - lat_delta + 90) / GRID_DEGREES), 0)
+    last_row = min(int((latitude + lat_delta + 90) / GRID_DEGREES), int(180 / GRID_DEGREES) - 1)
+    first_column = int((longitude - lon_delta + 180) // GRID_DEGREES)
+    last_column = int((longitude + lon_delta + 180) // GRID_DEGREES)
+    columns = {column % CELLS_PER_ROW for column in range(first_column, last_column + 1)}
+    if len(columns) == CELLS_PER_ROW:
+        # Every longitude: the rows form one contiguous range of cells
+        cells_sql = "geo_cell BETWEEN ? AND ?"
+        cells_params = [first_row * CELLS_PER_ROW, (last_row + 1) * CELLS_PER_ROW - 1]
+    else:
+        cells = [row * CELLS_PER_ROW + column for row in range(first_row, last_row + 1) for column in columns]
+        cells_sql = f"geo_cell IN ({','.join('?' * len(cells))})"
+        cells_params = cells
+
+    # Scale longitude differences by the origin's latitude for the distance check,
+    # taking the short way around across the antimeridian
+    x_scale = MILES_PER_DEGREE_LATITUDE * math.cos(math.radians(latitude))
+    lon_difference = "CASE WHEN ABS(longitude - ?) > 180 THEN 360 - ABS(longitude - ?) ELSE ABS(longitude - ?) END"
+    sql = (f"{cells_sql} AND "
+           "((latitude - ?) * ?) * ((latitude - ?) * ?) + "
+           f"(({lon_difference}) * ?) * (({lon_difference}) * ?) <= ?")
+    params = cells_params + [latitude, MILES_PER_DEGREE_LATITUDE, latitude, MILES_PER_DEGREE_LATITUDE,
+                             longitude, longitude, longitude, x_scale,
+                             longitude, longitude, longitude, x_scale, radius * radius]
+    return sql, params
+
+def distance_miles(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Great-circle (haversine) distance between two points"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(longitude2 - longitude1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+def backfill_locations(cursor) -> None:
+    """Geocode postings without coordinates, and re-geocode those placed differently by an older gazetteer or resolver"""
+    cursor.execute("SELECT DISTINCT location, latitude, longitude FROM job_postings")
+    updates = []
+    for location, latitude, longitude in cursor.fetchall():
+        stored = (latitude, longitude) if latitude is not None else None
+        if resolve_location(location) != stored:
+            updates.append((*locate(location), location))
+    if updates:
+        cursor.executemany("UPDATE job_postings SET latitude = ?, longitude = ?, geo_cell = ? WHERE location = ?",
+                           updates)
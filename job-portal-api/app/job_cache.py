@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import orjson
+from fastapi import Request, Response
+
+from database import get_db_connection, utc_timestamp
+from writer import run_write
+
+# Job detail responses kept per worker process
+JOB_CACHE_SIZE = int(os.getenv("JOB_CACHE_SIZE", 1024))
+# Distinct listing queries (filters and page) kept per worker process
+LISTING_CACHE_SIZE = int(os.getenv("LISTING_CACHE_SIZE", 256))
+# Seconds between reads of the job change log, which drops entries for postings
+# changed by other workers or replicas (a worker's own writes invalidate at once);
+# 0 reads it on every request
+CACHE_SYNC_SECONDS = float(os.getenv("CACHE_SYNC_SECONDS", 1))
+# Change log rows are pruned after this long; a worker idle for longer starts afresh
+JOB_CHANGES_RETENTION_SECONDS = int(os.getenv("JOB_CHANGES_RETENTION_SECONDS", 3600))
+# Postgres can commit a lower sequence number after a higher one: numbers
+# skipped by a sync are looked for again until they are this old (rolled-back
+# transactions never fill theirs)
+CHANGE_GAP_SECONDS = 60
+# Most gaps tracked at once; the oldest are given up first
+CHANGE_GAP_LIMIT = 100
+# Change log rows checked for gaps when a worker starts
+CHANGE_LOOKBACK = 1000
+# job_changes.job_id of new postings, which only change listings
+NEW_JOBS = 0
+
+class ResponseCache:
+    """Bounded LRU of encoded JSON response bodies and their ETags"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+job_details = ResponseCache(JOB_CACHE_SIZE)
+job_listings = ResponseCache(LISTING_CACHE_SIZE)
+
+_lock = Lock()
+# Bumped by every invalidation; a response loaded across a bump is not cached
+_epoch = 0
+_last_sync = 0.0
+_last_change = None
+# [first seq, last seq, monotonic time first missed] of numbers not seen yet
+_gaps = []
+
+def invalidate_jobs(job_ids=()) -> None:
+    """Drop the given postings' detail responses and every cached listing"""
+    global _epoch
+    with _lock:
+        for job_id in job_ids:
+            job_details.discard(job_id)
+        job_listings.clear()
+        _epoch += 1
+
+def _clear_all() -> None:
+    global _epoch
+    with _lock:
+        job_details.clear()
+        job_listings.clear()
+        _epoch += 1
+
+def record_new_jobs(cursor) -> None:
+    """Log postings inserted in the caller's write transaction (one row however many)"""
+    cursor.execute("INSERT INTO job_changes (job_id) VALUES (?)", (NEW_JOBS,))
+
+def _track_gaps(seqs, now: float) -> None:
+    """Record numbers missing between ``_last_change`` and the sorted new ``seqs``"""
+    previous = _last_change
+    for seq in seqs:
+        if seq > previous + 1:
+            _gaps.append([previous + 1, seq - 1, now])
+        previous = seq
+
+def _fill_gaps(seqs, now: float) -> None:
+    """Split gaps around the numbers that have now committed, dropping expired ones"""
+    global _gaps
+    remaining = []
+    for first, last, since in _gaps:
+        if now - since > CHANGE_GAP_SECONDS:
+            continue
+        for seq in sorted(seq for seq in seqs if first <= seq <= last):
+            if seq > first:
+                remaining.append([first, seq - 1, since])
+            first = seq + 1
+        if first <= last:
+            remaining.append([first, last, since])
+    _gaps = remaining
+
+def sync() -> None:
+    """Apply postings changed by any process since the last check (see job_changes)"""
+    global _last_sync, _last_change, _gaps
+    now = time.monotonic()
+    if _last_change is not None and now - _last_sync < CACHE_SYNC_SECONDS:
+        return
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if _last_change is None or now - _last_sync > JOB_CHANGES_RETENTION_SECONDS:
+            # First check, or idle long enough to have missed pruned changes
+            cursor.execute("SELECT seq FROM job_changes ORDER BY seq DESC LIMIT 1")
+            row = cursor.fetchone()
+            newest = row[0] if row else 0
+            cursor.execute("SELECT seq FROM job_changes WHERE seq > ? ORDER BY seq",
+                           (newest - CHANGE_LOOKBACK,))
+            seqs = [row[0] for row in cursor.fetchall()]
+            _last_change, _gaps = (seqs[0] if seqs else 0), []
+            _track_gaps(seqs[1:], now)
+            _last_change = newest
+            _clear_all()
+        else:
+            # Only rows after the newest seen, and those a slower transaction may still commit
+            query = "SELECT seq, job_id FROM job_changes WHERE seq > ?"
+            params = [_last_change]
+            for first, last, _ in _gaps:
+                query += " OR seq BETWEEN ? AND ?"
+                params.extend((first, last))
+            cursor.execute(query + " ORDER BY seq", params)
+            rows = cursor.fetchall()
+            if rows:
+                invalidate_jobs({job_id for _, job_id in rows if job_id != NEW_JOBS})
+            _fill_gaps([seq for seq, _ in rows if seq <= _last_change], now)
+            new = [seq for seq, _ in rows if seq > _last_change]
+            _track_gaps(new, now)
+            if new:
+                _last_change = new[-1]
+        del _gaps[:-CHANGE_GAP_LIMIT]
+    _last_sync = now
+
+def _matches(etag: str, if_none_match: str) -> bool:
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+def _response(entry, request: Request, cache: ResponseCache) -> Response:
+    etag, body = entry
+    # Clients may reuse the body but must revalidate it, which the ETag makes cheap
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(etag, request.headers.get("if-none-match", "")):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def cached_json(cache: ResponseCache, key, request: Request, load) -> Response:
+    """Serve ``load()``'s JSON-ready content from the cache, with ETag revalidation"""
+    sync()
+    with _lock:
+        entry = cache.get(key)
+        epoch = _epoch
+    if entry is None:
+        body = orjson.dumps(load(), option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        entry = (f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+        with _lock:
+            # Content read while a posting changed may already be stale
+            if epoch == _epoch:
+                cache.put(key, entry)
+    return _response(entry, request, cache)
+
+def prune_job_changes(cursor, retention_seconds: float = JOB_CHANGES_RETENTION_SECONDS) -> int:
+    """Delete change log rows every worker has had time to apply"""
+    cursor.execute("DELETE FROM job_changes WHERE changed_at < ?", (utc_timestamp(-retention_seconds),))
+    return cursor.rowcount
+
+async def run_change_log_pruner(interval: int = JOB_CHANGES_RETENTION_SECONDS // 2) -> None:
+    """Background task keeping the job change log short"""
+    while True:
+        try:
+            await run_write(prune_job_changes)
+        except Exception as e:
+            print(f"⚠️ Job change log pruning failed: {e}")
+        await asyncio.sleep(interval)
+
+def stats() -> dict:
+    """Hit/miss counters and sizes of the job caches in this worker process"""
+    with _lock:
+        return {"job_details": job_details.stats(), "job_listings": job_listings.stats()}
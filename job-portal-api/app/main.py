@@ -1,10 +1,25 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
 
-from database import init_db
-from routes import jobs, employers, seekers, applications
+from database import init_db, close_db, DATABASE_BACKEND
+from blobstore import STORAGE_DIR, BLOB_DIR, run_garbage_collector
+from resume_worker import run_extraction_worker
+from archive import run_archiver
+from outbox import run_event_dispatcher
+from writer import writer, run_write
+from metrics import MetricsMiddleware, snapshot
+from admission import AdmissionMiddleware, stats as admission_stats
+from uploads import UploadLimitMiddleware
+import job_cache
+from routes import jobs, employers, seekers, applications, storage, resumes, events
+
+# Seconds /health waits for the database before reporting it unavailable
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", 5))
 
 # Initialize database
 init_db()
@@ -38,6 +53,12 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Upload size cap, enforced before request bodies are parsed
+app.add_middleware(UploadLimitMiddleware)
+
+# Rate limiting and load shedding, inside CORS so rejections carry its headers
+app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -47,19 +68,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and SQL tracing (added last, so it wraps everything else)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(seekers.router)
 app.include_router(employers.router)
 app.include_router(jobs.router)
 app.include_router(applications.router)
+app.include_router(resumes.router)
+app.include_router(events.router)
+app.include_router(storage.router)
 
-# Mount storage directories for static file access
-STORAGE_DIR = "app/storage"
+# Mount storage directories for static file access (content-addressed blobs
+# are served by the storage router above; this covers legacy per-record files)
 os.makedirs(f"{STORAGE_DIR}/resumes", exist_ok=True)
 os.makedirs(f"{STORAGE_DIR}/application_resumes", exist_ok=True)
+os.makedirs(BLOB_DIR, exist_ok=True)
 
 app.mount("/storage", StaticFiles(directory=STORAGE_DIR), name="storage")
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start periodic maintenance tasks"""
+    app.state.blob_gc_task = asyncio.create_task(run_garbage_collector())
+    app.state.resume_worker_task = asyncio.create_task(run_extraction_worker())
+    app.state.archiver_task = asyncio.create_task(run_archiver())
+    app.state.change_log_task = asyncio.create_task(job_cache.run_change_log_pruner())
+    app.state.event_dispatcher_task = asyncio.create_task(run_event_dispatcher())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Cancel periodic maintenance tasks and flush queued writes"""
+    app.state.blob_gc_task.cancel()
+    app.state.resume_worker_task.cancel()
+    app.state.archiver_task.cancel()
+    app.state.change_log_task.cancel()
+    app.state.event_dispatcher_task.cancel()
+    await run_in_threadpool(writer.stop)
+    close_db()
+
 @app.get("/", tags=["Root"])
 async def root():
     """API root endpoint with HATEOAS links"""
@@ -71,14 +119,49 @@ async def root():
             "jobs": "/api/jobs",
             "seekers": "/api/seekers",
             "employers": "/api/employers",
-            "applications": "/api/applications"
+            "applications": "/api/applications",
+            "events": "/api/events",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "job-portal-api"}
+    """Readiness check: the database answers a query through the write path"""
+    started = asyncio.get_running_loop().time()
+    try:
+        # Goes through the writer, so a wedged writer or held lock shows up too
+        await asyncio.wait_for(
+            run_write(lambda cursor: cursor.execute("SELECT 1 FROM job_postings LIMIT 1").fetchone()),
+            HEALTH_CHECK_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        return JSONResponse(status_code=503, content={
+            "status": "unhealthy",
+            "service": "job-portal-api",
+            "database": {"backend": DATABASE_BACKEND, "error": str(e) or type(e).__name__}
+        })
+    
+    return {
+        "status": "healthy",
+        "service": "job-portal-api",
+        "database": {
+            "backend": DATABASE_BACKEND,
+            "latency_ms": round((asyncio.get_running_loop().time() - started) * 1000, 2)
+        }
+    }
+
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    """Per-route latency histograms, SQL statement counts and the slow-query log (this worker only)"""
+    metrics = snapshot()
+    metrics["backend"] = DATABASE_BACKEND
+    metrics["caches"] = job_cache.stats()
+    metrics["admission"] = admission_stats()
+    if DATABASE_BACKEND == "sqlite":
+        metrics["writer"] = {"commits": writer.commits, "operations": writer.operations}
+    return metrics
 
 if __name__ == "__main__":
     import uvicorn
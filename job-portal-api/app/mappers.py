@@ -0,0 +1,101 @@
+import json
+
+from fastapi.responses import ORJSONResponse
+
+BASE_URL = "http://localhost:8000"
+
+def _timestamp(value):
+    """Render SQLite 'YYYY-MM-DD HH:MM:SS' timestamps in ISO 8601 like the response models"""
+    if isinstance(value, str):
+        return value.replace(" ", "T", 1)
+    # Postgres returns datetimes, which orjson already renders in ISO 8601
+    return value
+
+def compile_mapper(columns, json_columns=(), timestamp_columns=(), links=None):
+    """Build a database row -> response dict function for a fixed set of columns
+
+    Each column's converter is looked up once here, so mapping a row is a
+    single dict comprehension over precomputed (column, converter) pairs.
+    """
+    fields = tuple(
+        (column, json.loads if column in json_columns else _timestamp if column in timestamp_columns else None)
+        for column in columns
+    )
+
+    def to_dict(row):
+        item = {column: row[column] if convert is None else convert(row[column]) for column, convert in fields}
+        if links:
+            item["links"] = links(item)
+        return item
+
+    return to_dict
+
+def job_links(job: dict) -> dict:
+    """HATEOAS links of a job posting"""
+    return {
+        "self": f"{BASE_URL}/api/jobs/{job['id']}",
+        "employer": f"{BASE_URL}/api/employers/{job['employer_id']}",
+        "applications": f"{BASE_URL}/api/jobs/{job['id']}/applications",
+        "apply": f"{BASE_URL}/api/applications"
+    }
+
+def application_links(application: dict) -> dict:
+    """HATEOAS links of an application"""
+    return {
+        "self": f"{BASE_URL}/api/applications/{application['id']}",
+        "job": f"{BASE_URL}/api/jobs/{application['job_id']}",
+        "seeker": f"{BASE_URL}/api/seekers/{application['seeker_id']}",
+        "update_status": f"{BASE_URL}/api/applications/{application['id']}/status"
+    }
+
+map_job = compile_mapper(
+    ("id", "employer_id", "title", "description", "requirements", "location", "latitude", "longitude",
+     "salary_range", "salary_min", "salary_max", "job_type", "experience_required", "status",
+     "created_at", "updated_at"),
+    json_columns=("requirements",),
+    timestamp_columns=("created_at", "updated_at"),
+    links=job_links
+)
+
+map_seeker = compile_mapper(
+    ("id", "name", "email", "phone", "skills", "experience_years", "resume_url", "created_at"),
+    json_columns=("skills",),
+    timestamp_columns=("created_at",)
+)
+
+map_employer = compile_mapper(
+    ("id", "company_name", "email", "phone", "description", "website", "created_at"),
+    timestamp_columns=("created_at",)
+)
+
+map_application = compile_mapper(
+    ("id", "job_id", "seeker_id", "cover_letter", "resume_url", "status", "applied_at"),
+    timestamp_columns=("applied_at",),
+    links=application_links
+)
+
+# Applications joined with the applicant's name and email (employer views)
+map_job_application = compile_mapper(
+    ("id", "job_id", "seeker_id", "seeker_name", "seeker_email", "cover_letter",
+     "resume_url", "status", "applied_at"),
+    timestamp_columns=("applied_at",)
+)
+
+map_event = compile_mapper(
+    ("id", "event_type", "application_id", "payload", "created_at"),
+    json_columns=("payload",),
+    timestamp_columns=("created_at",)
+)
+
+map_event_sink = compile_mapper(
+    ("sink", "last_event_id", "delivered", "pending", "attempts", "last_error", "available_at", "updated_at"),
+    timestamp_columns=("available_at", "updated_at")
+)
+
+def json_response(content, status_code: int = 200) -> ORJSONResponse:
+    """Serialize trusted, already-shaped DB output directly with orjson
+
+    Returning a response object skips FastAPI's response_model validation,
+    which would otherwise re-validate every row the mapper just built.
+    """
+    return ORJSONResponse(content, status_code=status_code)
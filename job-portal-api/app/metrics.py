@@ -0,0 +1,212 @@
+import contextvars
+import os
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from threading import Lock
+
+from starlette.datastructures import MutableHeaders
+
+# Statements at least this slow are printed and kept in the slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+# Most recent slow statements kept for /metrics
+SLOW_QUERY_LOG_SIZE = 100
+# Distinct normalized statements tracked, so ad-hoc SQL cannot grow memory unbounded
+MAX_TRACKED_STATEMENTS = 500
+# Statements listed per route and overall in /metrics
+TOP_STATEMENTS = 10
+# Upper bounds of the request latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACE_RE = re.compile(r"\s+")
+
+_trace = contextvars.ContextVar("request_trace", default=None)
+_lock = Lock()
+_routes = {}
+_statements = {}
+_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_started_at = time.time()
+
+class RequestTrace:
+    """SQL statements and database time accumulated while serving one request"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.sql = {}
+
+    @property
+    def route(self) -> str:
+        """Route template (known once routing has matched), e.g. GET /api/jobs/{job_id}"""
+        route = self.scope.get("route")
+        if route is not None:
+            path = route.path
+        elif self.scope.get("root_path"):
+            # Mounted apps such as /storage have no route of their own
+            path = self.scope["root_path"] + "/*"
+        elif self.scope.get("endpoint") is not None:
+            # Plain Starlette routes (/docs, /openapi.json) have fixed paths
+            path = self.scope["path"]
+        else:
+            path = "unmatched"
+        return f"{self.scope['method']} {path}"
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Replace literals with ? and collapse IN lists so equivalent statements group together"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_LIST_RE.sub("?, ...", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+def record_query(sql: str, seconds: float, executed: bool = True) -> None:
+    """Attribute a statement's execution (or a later fetch) to the current request"""
+    normalized = normalize_sql(sql)
+    trace = _trace.get()
+    if trace is not None:
+        trace.db_seconds += seconds
+        if executed:
+            trace.statements += 1
+            trace.sql[normalized] = trace.sql.get(normalized, 0) + 1
+
+    slow = executed and seconds * 1000 >= SLOW_QUERY_MS
+    with _lock:
+        stats = _statements.get(normalized)
+        if stats is None and len(_statements) < MAX_TRACKED_STATEMENTS:
+            stats = _statements[normalized] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+        if stats is not None:
+            stats["seconds"] += seconds
+            if executed:
+                stats["count"] += 1
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        if slow:
+            _slow_queries.append({
+                "sql": normalized,
+                "ms": round(seconds * 1000, 2),
+                "route": trace.route if trace is not None else None,
+                "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            })
+    if slow:
+        print(f"🐢 Slow query ({seconds * 1000:.1f} ms): {normalized}")
+
+def _record_request(trace: RequestTrace, status: int, seconds: float) -> None:
+    ms = seconds * 1000
+    with _lock:
+        stats = _routes.get(trace.route)
+        if stats is None:
+            stats = _routes[trace.route] = {
+                "requests": 0, "statuses": {}, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                "seconds": 0.0, "max_seconds": 0.0, "statements": 0, "db_seconds": 0.0, "sql": {},
+            }
+        stats["requests"] += 1
+        stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+        stats["buckets"][next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound),
+                              len(LATENCY_BUCKETS_MS))] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["statements"] += trace.statements
+        stats["db_seconds"] += trace.db_seconds
+        for sql, count in trace.sql.items():
+            if sql in stats["sql"] or len(stats["sql"]) < MAX_TRACKED_STATEMENTS:
+                stats["sql"][sql] = stats["sql"].get(sql, 0) + count
+
+class MetricsMiddleware:
+    """Time each request and attribute the SQL it runs to its route
+
+    Adds a Server-Timing header with the request's database time and
+    statement count so a single response can be inspected from the client.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope)
+        token = _trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing",
+                               f'db;dur={trace.db_seconds * 1000:.2f};desc="{trace.statements} SQL", '
+                               f"total;dur={(time.perf_counter() - started) * 1000:.2f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _trace.reset(token)
+            _record_request(trace, status, time.perf_counter() - started)
+
+def _percentile(buckets: list, requests: int, q: float):
+    """Upper bound of the histogram bucket holding the q-th quantile"""
+    target = q * requests
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS + (None,), buckets):
+        seen += count
+        if seen >= target:
+            return bound
+    return None
+
+def _top_statements(counts: dict, requests: int) -> list:
+    top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:TOP_STATEMENTS]
+    return [{"sql": sql, "count": count, "per_request": round(count / requests, 2)} for sql, count in top]
+
+def snapshot() -> dict:
+    """Per-route latency and SQL statistics plus the slowest statements"""
+    with _lock:
+        routes = {}
+        for route, stats in sorted(_routes.items()):
+            requests = stats["requests"]
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(LATENCY_BUCKETS_MS + ("+Inf",), stats["buckets"]):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            routes[route] = {
+                "requests": requests,
+                "status_codes": {str(code): count for code, count in sorted(stats["statuses"].items())},
+                "latency_ms": {
+                    "mean": round(stats["seconds"] * 1000 / requests, 2),
+                    "max": round(stats["max_seconds"] * 1000, 2),
+                    "p50": _percentile(stats["buckets"], requests, 0.50),
+                    "p95": _percentile(stats["buckets"], requests, 0.95),
+                    "p99": _percentile(stats["buckets"], requests, 0.99),
+                    "buckets": buckets,
+                },
+                "sql_statements_per_request": round(stats["statements"] / requests, 2),
+                "db_ms_per_request": round(stats["db_seconds"] * 1000 / requests, 2),
+                "statements": _top_statements(stats["sql"], requests),
+            }
+
+        statements = sorted(_statements.items(), key=lambda item: item[1]["seconds"], reverse=True)
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - _started_at, 1),
+            "slow_query_ms": SLOW_QUERY_MS,
+            "routes": routes,
+            "statements": [
+                {
+                    "sql": sql,
+                    "count": stats["count"],
+                    "total_ms": round(stats["seconds"] * 1000, 2),
+                    "mean_ms": round(stats["seconds"] * 1000 / stats["count"], 3) if stats["count"] else None,
+                    "max_ms": round(stats["max_seconds"] * 1000, 2),
+                }
+                for sql, stats in statements[:TOP_STATEMENTS * 2]
+            ],
+            "slow_queries": list(reversed(_slow_queries)),
+        }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -14,6 +14,10 @@ class ApplicationStatus(str, Enum):
     ACCEPTED = "accepted"
     REJECTED = "rejected"
 
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
 # Job Seeker Models
 class JobSeekerBase(BaseModel):
     name: str
@@ -67,6 +71,12 @@ class JobPostingCreate(JobPostingBase):
 class JobPosting(JobPostingBase):
     id: int
     employer_id: int
+    # Coordinates of the location from the bundled gazetteer (None when unknown)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    # Annual amounts parsed from salary_range (None when it has no figures)
+    salary_min: Optional[int] = None
+    salary_max: Optional[int] = None
     status: JobStatus
     created_at: datetime
     updated_at: datetime
@@ -82,6 +92,26 @@ class ApplicationCreate(ApplicationBase):
     job_id: int
     seeker_id: int
 
+class ApplicationBatchCreate(ApplicationBase):
+    seeker_id: int
+    job_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+class ApplicationBulkStatusUpdate(BaseModel):
+    status: ApplicationStatus
+    # Either explicit applications...
+    application_ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    # ...or every application to a job, optionally only those in current_status
+    job_id: Optional[int] = None
+    current_status: Optional[ApplicationStatus] = None
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if (self.application_ids is None) == (self.job_id is None):
+            raise ValueError("Provide either application_ids or job_id")
+        if self.current_status is not None and self.job_id is None:
+            raise ValueError("current_status filters by job_id")
+        return self
+
 class Application(ApplicationBase):
     id: int
     job_id: int
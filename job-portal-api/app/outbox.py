@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+import time
+import urllib.request
+
+import orjson
+
+from database import DATABASE_BACKEND, utc_timestamp
+from mappers import map_event
+from writer import run_write
+
+# Comma-separated event destinations: http(s) webhook URLs (batches POSTed as
+# {"events": [...]}), file:<path> (NDJSON appended) and spool:<directory> (one
+# NDJSON file per batch, a local queue for other processes). Without any,
+# events are only served by GET /api/events.
+EVENT_SINKS = [sink.strip() for sink in os.getenv("EVENT_SINKS", "").split(",") if sink.strip()]
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", 100))
+EVENT_POLL_SECONDS = float(os.getenv("EVENT_POLL_SECONDS", 2))
+EVENT_RETRY_DELAY_SECONDS = int(os.getenv("EVENT_RETRY_DELAY_SECONDS", 5))
+EVENT_RETRY_MAX_SECONDS = 300
+EVENT_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("EVENT_WEBHOOK_TIMEOUT_SECONDS", 10))
+# A sink is leased to one worker per batch; the lease outlives a slow delivery
+# but lets another worker take over from one that died mid-batch
+EVENT_LEASE_SECONDS = 60
+# Delivered events older than this are pruned
+EVENT_RETENTION_DAYS = float(os.getenv("EVENT_RETENTION_DAYS", 7))
+EVENT_PRUNE_INTERVAL_SECONDS = 3600
+# Postgres advisory lock key serializing event sequencing
+OUTBOX_LOCK_ID = 4417
+
+_wakeup = asyncio.Event()
+
+def record_events(cursor, event_type: str, applications) -> None:
+    """Add events for application rows to the caller's write transaction"""
+    if not applications:
+        return
+    # Concurrent Postgres transactions would commit event ids out of order, so
+    # they queue events for sequence_events; SQLite writes are serialized already
+    table = "event_queue" if DATABASE_BACKEND == "postgres" else "events"
+    cursor.executemany(f"INSERT INTO {table} (event_type, application_id, payload) VALUES (?, ?, ?)", [
+        (event_type, application["id"], json.dumps({
+            "job_id": application["job_id"],
+            "seeker_id": application["seeker_id"],
+            "status": application["status"],
+        }))
+        for application in applications
+    ])
+
+def record_event(cursor, event_type: str, application) -> None:
+    record_events(cursor, event_type, [application])
+
+def sequence_events(cursor) -> int:
+    """Move committed events from event_queue into events (Postgres); returns how many
+
+    Cursors read events in id order, so an id must never become visible after
+    a higher one. Only this step assigns event ids, one transaction at a time
+    under an advisory lock held until commit, so application writes queue
+    their events without waiting on each other.
+    """
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM event_queue)")
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute("SELECT pg_advisory_xact_lock(?)", (OUTBOX_LOCK_ID,))
+    cursor.execute("""
+        WITH queued AS (
+            DELETE FROM event_queue
+            RETURNING id, event_type, application_id, payload, created_at
+        )
+        INSERT INTO events (event_type, application_id, payload, created_at)
+        SELECT event_type, application_id, payload, created_at FROM queued ORDER BY id
+    """)
+    return cursor.rowcount
+
+def notify_dispatcher() -> None:
+    """Wake the dispatcher after events are committed"""
+    _wakeup.set()
+
+class WebhookSink:
+    def __init__(self, url: str):
+        self.name = url
+        self.url = url
+
+    def deliver(self, events: list) -> None:
+        request = urllib.request.Request(self.url, data=orjson.dumps({"events": events}), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        # Non-2xx responses raise HTTPError, so the batch is retried
+        with urllib.request.urlopen(request, timeout=EVENT_WEBHOOK_TIMEOUT_SECONDS) as response:
+            response.read()
+
+class FileSink:
+    def __init__(self, spec: str):
+        self.name = spec
+        self.path = spec.removeprefix("file:")
+
+    def deliver(self, events: list) -> None:
+        with open(self.path, "ab") as f:
+            f.write(b"".join(orjson.dumps(event) + b"\n" for event in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+class SpoolSink:
+    """Writes each batch to its own file, named so that sorting the names orders the events"""
+
+    def __init__(self, spec: str):
+        self.name = spec
+        self.directory = spec.removeprefix("spool:")
+
+    def deliver(self, events: list) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{events[0]['id']:020d}-{events[-1]['id']:020d}.ndjson"
+        temp_path = os.path.join(self.directory, f".{name}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(b"".join(orjson.dumps(event) + b"\n" for event in events))
+            f.flush()
+            os.fsync(f.fileno())
+        # Consumers never see a partial batch
+        os.replace(temp_path, os.path.join(self.directory, name))
+
+def parse_sink(spec: str):
+    if spec.startswith(("http://", "https://")):
+        return WebhookSink(spec)
+    if spec.startswith("file:"):
+        return FileSink(spec)
+    if spec.startswith("spool:"):
+        return SpoolSink(spec)
+    raise ValueError(f"Unknown event sink: {spec}")
+
+SINKS = [parse_sink(spec) for spec in EVENT_SINKS]
+
+def _register_sinks(cursor, names: list) -> None:
+    """Start cursors for newly configured sinks at the oldest retained event"""
+    cursor.executemany("INSERT INTO event_sinks (sink) VALUES (?) ON CONFLICT(sink) DO NOTHING",
+                       [(name,) for name in names])
+
+def _claim_batch(cursor, sink: str):
+    """Lease a sink that has undelivered events; (attempts so far, next batch) or None"""
+    now = utc_timestamp()
+    cursor.execute("""
+        UPDATE event_sinks SET leased_until = ?
+        WHERE sink = ? AND available_at <= ? AND (leased_until IS NULL OR leased_until <= ?)
+          AND EXISTS (SELECT 1 FROM events WHERE events.id > event_sinks.last_event_id)
+        RETURNING last_event_id, attempts
+    """, (utc_timestamp(EVENT_LEASE_SECONDS), sink, now, now))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    cursor.execute("SELECT * FROM events WHERE id > ? ORDER BY id LIMIT ?", (row["last_event_id"], EVENT_BATCH_SIZE))
+    return row["attempts"], [map_event(event) for event in cursor.fetchall()]
+
+def _ack_batch(cursor, sink: str, last_event_id: int, count: int) -> None:
+    cursor.execute("""
+        UPDATE event_sinks
+        SET last_event_id = ?, delivered = delivered + ?, attempts = 0, last_error = NULL,
+            leased_until = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE sink = ?
+    """, (last_event_id, count, sink))
+
+def _retry_batch(cursor, sink: str, delay: int, error: str) -> None:
+    cursor.execute("""
+        UPDATE event_sinks
+        SET attempts = attempts + 1, last_error = ?, available_at = ?,
+            leased_until = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE sink = ?
+    """, (error, utc_timestamp(delay), sink))
+
+async def _dispatch(sink) -> bool:
+    """Deliver one batch to a sink; True if a full batch went out (more may be waiting)"""
+    claimed = await run_write(lambda cursor: _claim_batch(cursor, sink.name))
+    if claimed is None:
+        return False
+    attempts, events = claimed
+    try:
+        await asyncio.to_thread(sink.deliver, events)
+    except Exception as e:
+        # The cursor stays put, so the same events are retried in order
+        error = f"{type(e).__name__}: {e}"
+        delay = min(EVENT_RETRY_DELAY_SECONDS * 2 ** attempts, EVENT_RETRY_MAX_SECONDS)
+        print(f"⚠️ Event delivery to {sink.name} failed, retrying in {delay}s: {error}")
+        await run_write(lambda cursor: _retry_batch(cursor, sink.name, delay, error))
+        return False
+    await run_write(lambda cursor: _ack_batch(cursor, sink.name, events[-1]["id"], len(events)))
+    return len(events) == EVENT_BATCH_SIZE
+
+def prune_events(cursor, retention_days: float = EVENT_RETENTION_DAYS) -> int:
+    """Delete events past retention that every configured sink has received"""
+    query = "DELETE FROM events WHERE created_at < ?"
+    params = [utc_timestamp(-retention_days * 86400)]
+    if SINKS:
+        placeholders = ",".join("?" * len(SINKS))
+        query += f" AND id <= (SELECT MIN(last_event_id) FROM event_sinks WHERE sink IN ({placeholders}))"
+        params.extend(sink.name for sink in SINKS)
+    cursor.execute(query, params)
+    return cursor.rowcount
+
+async def run_event_dispatcher() -> None:
+    """Background task delivering outbox events to the configured sinks
+
+    Each sink has its own cursor in event_sinks and receives events in id
+    order, in batches of EVENT_BATCH_SIZE; a failed batch is retried with
+    exponential backoff before anything after it is sent. Delivery is at
+    least once: a batch may be repeated if a worker stops between delivering
+    it and recording that, so consumers should deduplicate on the event id.
+    """
+    if SINKS:
+        await run_write(lambda cursor: _register_sinks(cursor, [sink.name for sink in SINKS]))
+    next_prune = time.monotonic()
+    while True:
+        _wakeup.clear()
+        if DATABASE_BACKEND == "postgres":
+            try:
+                await run_write(sequence_events)
+            except Exception as e:
+                print(f"⚠️ Event sequencing failed: {e}")
+        pending = False
+        results = await asyncio.gather(*(_dispatch(sink) for sink in SINKS), return_exceptions=True)
+        for sink, result in zip(SINKS, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Event dispatch to {sink.name} unavailable: {result}")
+            else:
+                pending = pending or result
+
+        if time.monotonic() >= next_prune:
+            try:
+                await run_write(prune_events)
+            except Exception as e:
+                print(f"⚠️ Event pruning failed: {e}")
+            next_prune = time.monotonic() + EVENT_PRUNE_INTERVAL_SECONDS
+
+        if not pending:
+            # Sleep until events are committed here, or poll for other workers' events
+            try:
+                await asyncio.wait_for(_wakeup.wait(), EVENT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
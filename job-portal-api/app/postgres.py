@@ -0,0 +1,452 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+from psycopg2.extensions import DECIMAL, new_type, register_type
+
+from metrics import record_query
+from salary import SALARY_REACH_SQL
+
+# NUMERIC results (e.g. COUNT(*) * 1.0) come back as float, like they do from SQLite
+register_type(new_type(DECIMAL.values, "DECIMAL_AS_FLOAT",
+                       lambda value, cursor: float(value) if value is not None else None))
+
+# Serializes schema creation when several API replicas start together
+SCHEMA_LOCK_ID = 5993
+
+# Same tables as the SQLite schema in database.py. References are not declared
+# as foreign keys there (SQLite leaves them unenforced), so they are not here either.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS job_seekers (
+        id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        phone TEXT NOT NULL,
+        skills TEXT NOT NULL,
+        experience_years INTEGER NOT NULL,
+        resume_url TEXT,
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS employers (
+        id SERIAL PRIMARY KEY,
+        company_name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        phone TEXT NOT NULL,
+        description TEXT NOT NULL,
+        website TEXT,
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_postings (
+        id SERIAL PRIMARY KEY,
+        employer_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        requirements TEXT NOT NULL,
+        location TEXT NOT NULL,
+        latitude DOUBLE PRECISION,
+        longitude DOUBLE PRECISION,
+        geo_cell INTEGER,
+        salary_range TEXT NOT NULL,
+        salary_min INTEGER,
+        salary_max INTEGER,
+        job_type TEXT NOT NULL,
+        experience_required INTEGER NOT NULL,
+        status TEXT DEFAULT 'open',
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS applications (
+        id SERIAL PRIMARY KEY,
+        job_id INTEGER NOT NULL,
+        seeker_id INTEGER NOT NULL,
+        cover_letter TEXT NOT NULL,
+        resume_url TEXT,
+        status TEXT DEFAULT 'pending',
+        applied_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (job_id, seeker_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS skills (
+        id SERIAL PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_skills (
+        skill_id INTEGER NOT NULL,
+        job_id INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, job_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_job_skills_job ON job_skills(job_id)",
+    """
+    CREATE TABLE IF NOT EXISTS seeker_skills (
+        skill_id INTEGER NOT NULL,
+        seeker_id INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, seeker_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_seeker_skills_seeker ON seeker_skills(seeker_id)",
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        size BIGINT NOT NULL,
+        ref_count INTEGER NOT NULL DEFAULT 0,
+        released_at TIMESTAMP(0),
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_job_seekers_resume_url ON job_seekers(resume_url)",
+    "CREATE INDEX IF NOT EXISTS idx_applications_resume_url ON applications(resume_url)",
+    # Applicant lists and exports of a job, newest first, without a sort
+    "CREATE INDEX IF NOT EXISTS idx_applications_job_applied ON applications(job_id, applied_at, id)",
+    """
+    CREATE TABLE IF NOT EXISTS resume_jobs (
+        id SERIAL PRIMARY KEY,
+        digest TEXT UNIQUE NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        available_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+        leased_until TIMESTAMP(0),
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "ALTER TABLE resume_jobs ADD COLUMN IF NOT EXISTS leased_until TIMESTAMP(0)",
+    "CREATE INDEX IF NOT EXISTS idx_resume_jobs_queue ON resume_jobs(status, available_at)",
+    # Full-text search over extracted resume text (FTS5 on SQLite)
+    """
+    CREATE TABLE IF NOT EXISTS resume_texts (
+        digest TEXT PRIMARY KEY,
+        text TEXT NOT NULL,
+        extracted_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+        search TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', text)) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_resume_texts_search ON resume_texts USING GIN (search)",
+    # Derived resume data goes away with its blob
+    """
+    CREATE OR REPLACE FUNCTION blobs_ad() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM resume_texts WHERE digest = OLD.digest;
+        DELETE FROM resume_jobs WHERE digest = OLD.digest;
+        RETURN OLD;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER blobs_ad AFTER DELETE ON blobs
+    FOR EACH ROW EXECUTE FUNCTION blobs_ad()
+    """,
+    # Application counts per job and status for the employer dashboard
+    """
+    CREATE TABLE IF NOT EXISTS job_application_counts (
+        job_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        application_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (job_id, status)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_job_postings_employer ON job_postings(employer_id)",
+    """
+    CREATE OR REPLACE FUNCTION applications_count() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE job_application_counts SET application_count = application_count - 1
+            WHERE job_id = OLD.job_id AND status = OLD.status;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO job_application_counts (job_id, status, application_count)
+            VALUES (NEW.job_id, NEW.status, 1)
+            ON CONFLICT (job_id, status) DO UPDATE
+            SET application_count = job_application_counts.application_count + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER applications_count_ai AFTER INSERT OR DELETE ON applications
+    FOR EACH ROW EXECUTE FUNCTION applications_count()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER applications_count_au AFTER UPDATE OF status ON applications
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION applications_count()
+    """,
+    # Closed/filled postings past retention and their applications (see archive.py)
+    "CREATE INDEX IF NOT EXISTS idx_job_postings_status_updated ON job_postings(status, updated_at)",
+    """
+    CREATE TABLE IF NOT EXISTS job_postings_archive (
+        id INTEGER PRIMARY KEY,
+        employer_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        requirements TEXT NOT NULL,
+        location TEXT NOT NULL,
+        latitude DOUBLE PRECISION,
+        longitude DOUBLE PRECISION,
+        geo_cell INTEGER,
+        salary_range TEXT NOT NULL,
+        salary_min INTEGER,
+        salary_max INTEGER,
+        job_type TEXT NOT NULL,
+        experience_required INTEGER NOT NULL,
+        status TEXT,
+        created_at TIMESTAMP(0),
+        updated_at TIMESTAMP(0),
+        archived_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS applications_archive (
+        id INTEGER PRIMARY KEY,
+        job_id INTEGER NOT NULL,
+        seeker_id INTEGER NOT NULL,
+        cover_letter TEXT NOT NULL,
+        resume_url TEXT,
+        status TEXT,
+        applied_at TIMESTAMP(0),
+        archived_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_applications_archive_job ON applications_archive(job_id)",
+    # Annual salary bounds parsed from salary_range (see salary.py)
+    "ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS salary_min INTEGER",
+    "ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS salary_max INTEGER",
+    "ALTER TABLE job_postings_archive ADD COLUMN IF NOT EXISTS salary_min INTEGER",
+    "ALTER TABLE job_postings_archive ADD COLUMN IF NOT EXISTS salary_max INTEGER",
+    "DROP INDEX IF EXISTS idx_job_postings_status_salary",
+    f"""
+    CREATE INDEX IF NOT EXISTS idx_job_postings_status_salary_reach
+    ON job_postings(status, ({SALARY_REACH_SQL}), salary_min, experience_required)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_job_postings_status_experience
+    ON job_postings(status, experience_required, salary_max)
+    """,
+    # Coordinates and grid cell of the location (see geo.py)
+    "ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION",
+    "ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION",
+    "ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS geo_cell INTEGER",
+    "ALTER TABLE job_postings_archive ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION",
+    "ALTER TABLE job_postings_archive ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION",
+    "ALTER TABLE job_postings_archive ADD COLUMN IF NOT EXISTS geo_cell INTEGER",
+    "CREATE INDEX IF NOT EXISTS idx_job_postings_geo_cell ON job_postings(geo_cell, status)",
+    # Every change to a posting, read by each worker to invalidate its job caches
+    # (see job_cache.py); rows are pruned once all workers have applied them.
+    # Inserts are logged once per transaction by job_cache.record_new_jobs
+    """
+    CREATE TABLE IF NOT EXISTS job_changes (
+        seq BIGSERIAL PRIMARY KEY,
+        job_id INTEGER NOT NULL,
+        changed_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION job_postings_changes() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO job_changes (job_id) VALUES (OLD.id);
+        ELSE
+            INSERT INTO job_changes (job_id) VALUES (NEW.id);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER job_postings_changes AFTER UPDATE OR DELETE ON job_postings
+    FOR EACH ROW EXECUTE FUNCTION job_postings_changes()
+    """,
+    # Transactional outbox: application events written with the change itself,
+    # delivered to the configured sinks from per-sink cursors (see outbox.py)
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id BIGSERIAL PRIMARY KEY,
+        event_type TEXT NOT NULL,
+        application_id INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_events_application ON events(application_id, id)",
+    # Postgres only: writers queue events here and the dispatcher numbers them
+    # into events in commit order (see outbox.sequence_events)
+    """
+    CREATE TABLE IF NOT EXISTS event_queue (
+        id BIGSERIAL PRIMARY KEY,
+        event_type TEXT NOT NULL,
+        application_id INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS event_sinks (
+        sink TEXT PRIMARY KEY,
+        last_event_id BIGINT NOT NULL DEFAULT 0,
+        delivered BIGINT NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        available_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+        leased_until TIMESTAMP(0),
+        updated_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # SQLite's GROUP_CONCAT(value, separator), so aggregate queries run unchanged
+    """
+    CREATE OR REPLACE FUNCTION group_concat_step(acc TEXT, value TEXT, separator TEXT)
+    RETURNS TEXT LANGUAGE SQL IMMUTABLE AS $$
+        SELECT CASE WHEN value IS NULL THEN acc
+                    WHEN acc IS NULL THEN value
+                    ELSE acc || separator || value END
+    $$
+    """,
+    """
+    CREATE OR REPLACE AGGREGATE group_concat(TEXT, TEXT) (
+        SFUNC = group_concat_step,
+        STYPE = TEXT
+    )
+    """,
+)
+
+_PLACEHOLDER_RE = re.compile(r"'(?:[^']|'')*'|\?|%")
+
+@lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """Rewrite sqlite3 qmark placeholders as psycopg2 ones, escaping literal %"""
+    def replace(match):
+        token = match.group(0)
+        if token == "?":
+            return "%s"
+        return token.replace("%", "%%")
+    return _PLACEHOLDER_RE.sub(replace, sql)
+
+class Cursor:
+    """psycopg2 cursor accepting the qmark SQL written for sqlite3"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql: str, params=()):
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(translate(sql), params)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        started = time.perf_counter()
+        try:
+            psycopg2.extras.execute_batch(self._cursor, translate(sql), seq_of_params, page_size=1000)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+class Connection:
+    """Pooled psycopg2 connection with the sqlite3 connection methods routes use"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, name: str = None) -> Cursor:
+        """A named cursor is server-side: rows are fetched as they are read"""
+        # DictRow supports row["column"] and row[0] like sqlite3.Row
+        return Cursor(self._conn.cursor(name=name, cursor_factory=psycopg2.extras.DictCursor))
+
+    def execute(self, sql: str, params=()) -> Cursor:
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+class PostgresDatabase:
+    """Connection pool for a PostgreSQL database shared by many API replicas"""
+
+    IntegrityError = psycopg2.IntegrityError
+    OperationalError = psycopg2.OperationalError
+
+    def __init__(self, dsn: str, min_size: int, max_size: int):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._lock = threading.Lock()
+        # ThreadedConnectionPool raises when exhausted; callers wait for a slot instead
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.min_size, self.max_size, self.dsn,
+                    # CURRENT_TIMESTAMP in UTC, as SQLite stores it
+                    options="-c timezone=UTC"
+                )
+            return self._pool
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for one transaction"""
+        with self._slots:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            try:
+                yield Connection(conn)
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                pool.putconn(conn, close=bool(conn.closed))
+
+    def create_schema(self, cursor) -> None:
+        """Create missing tables, holding a lock until the transaction ends"""
+        cursor.execute("SELECT pg_advisory_xact_lock(?)", (SCHEMA_LOCK_ID,))
+        for statement in SCHEMA:
+            cursor.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import time
+import zlib
+from collections import Counter, OrderedDict
+from threading import Lock
+
+import numpy as np
+
+from blobstore import BLOB_URL_PREFIX
+from skills import normalize_skill
+
+# Hashed bag-of-words feature space shared by jobs and applicants
+N_FEATURES = 2 ** 20
+# Skill/requirement features count more than free-text words
+SKILL_FEATURE_WEIGHT = 2.0
+# Number of jobs whose ranked applicants are kept in memory
+CACHE_SIZE = 256
+# Cached rankings are checked against the job's current applications on every
+# read, so other workers' changes show up at once; this bounds the changes the
+# check cannot see (a seeker's edited skills or swapped resume)
+CACHE_MAX_AGE_SECONDS = float(os.getenv("RANKING_CACHE_MAX_AGE_SECONDS", 300))
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+_cache = OrderedDict()
+_cache_lock = Lock()
+
+def _features(text: str, skills) -> dict:
+    """Hash words of free text and whole skill names into feature counts"""
+    counts = {}
+    for token, count in Counter(_TOKEN_RE.findall(text.lower())).items():
+        feature = zlib.crc32(token.encode()) % N_FEATURES
+        counts[feature] = counts.get(feature, 0.0) + count
+    for skill in skills:
+        feature = zlib.crc32(b"skill:" + normalize_skill(skill).encode()) % N_FEATURES
+        counts[feature] = counts.get(feature, 0.0) + SKILL_FEATURE_WEIGHT
+    return counts
+
+def score_documents(query: dict, documents: list) -> np.ndarray:
+    """Cosine similarity between a query and every document using TF-IDF weights
+
+    Documents are laid out as one sparse COO matrix, so scoring all of them
+    is a single vectorized sparse matrix-vector product.
+    """
+    n_docs = len(documents)
+    if n_docs == 0:
+        return np.zeros(0)
+
+    lengths = np.fromiter((len(d) for d in documents), dtype=np.int64, count=n_docs)
+    rows = np.repeat(np.arange(n_docs), lengths)
+    cols = np.fromiter((f for d in documents for f in d), dtype=np.int64, count=int(lengths.sum()))
+    tf = np.fromiter((c for d in documents for c in d.values()), dtype=np.float64, count=len(cols))
+
+    # Smoothed IDF over the applicant pool, restricted to the features that occur
+    features, inverse = np.unique(cols, return_inverse=True)
+    df = np.bincount(inverse, minlength=len(features))
+    idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+    weights = (1.0 + np.log(tf)) * idf[inverse]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_docs))
+
+    # Query vector over the same features; query terms unseen in the pool cannot match
+    query_weights = np.zeros(len(features))
+    positions = np.searchsorted(features, list(query.keys()))
+    for position, (feature, count) in zip(positions, query.items()):
+        if position < len(features) and features[position] == feature:
+            query_weights[position] = 1.0 + np.log(count)
+    query_weights *= idf
+    query_norm = np.sqrt(query_weights @ query_weights)
+    if query_norm == 0:
+        return np.zeros(n_docs)
+
+    dots = np.bincount(rows, weights=weights * query_weights[inverse], minlength=n_docs)
+    return dots / (np.where(norms == 0, 1.0, norms) * query_norm)
+
+def _ranking_version(cursor, job_id: int) -> tuple:
+    """Cheap fingerprint of a job's ranking inputs, the same in every worker
+
+    Changes with the posting, with applications created or withdrawn, with
+    resume text extracted and with applicants' skill lists growing or shrinking.
+    """
+    cursor.execute("""
+        SELECT j.updated_at, COUNT(a.id) AS applications, COALESCE(SUM(a.id), 0) AS id_sum,
+               COUNT(rt.digest) AS extracted, COALESCE(SUM(LENGTH(js.skills)), 0) AS skills_length
+        FROM job_postings j
+        LEFT JOIN applications a ON a.job_id = j.id
+        LEFT JOIN job_seekers js ON a.seeker_id = js.id
+        LEFT JOIN resume_texts rt
+            ON rt.digest = substr(COALESCE(a.resume_url, js.resume_url), ?, 64)
+        WHERE j.id = ?
+        GROUP BY j.id, j.updated_at
+    """, (len(BLOB_URL_PREFIX) + 1, job_id))
+    row = cursor.fetchone()
+    return (str(row["updated_at"]), row["applications"], int(row["id_sum"]),
+            row["extracted"], int(row["skills_length"]))
+
+def rank_job_applications(cursor, job_id: int):
+    """Return (application_ids, scores) for a job, best match first, cached per job"""
+    version = _ranking_version(cursor, job_id)
+    with _cache_lock:
+        entry = _cache.get(job_id)
+        if entry is not None:
+            cached_version, ranked_at, ranking = entry
+            if cached_version == version and time.monotonic() - ranked_at < CACHE_MAX_AGE_SECONDS:
+                _cache.move_to_end(job_id)
+                return ranking
+
+    cursor.execute("SELECT title, description, requirements FROM job_postings WHERE id = ?",
+                   (job_id,))
+    job = cursor.fetchone()
+    query = _features(f"{job['title']} {job['description']}", json.loads(job["requirements"]))
+
+    # Extracted text of the application resume, or of the profile resume
+    cursor.execute("""
+        SELECT a.id, a.cover_letter, js.skills, rt.text AS resume_text
+        FROM applications a
+        JOIN job_seekers js ON a.seeker_id = js.id
+        LEFT JOIN resume_texts rt
+            ON rt.digest = substr(COALESCE(a.resume_url, js.resume_url), ?, 64)
+        WHERE a.job_id = ?
+    """, (len(BLOB_URL_PREFIX) + 1, job_id))
+    rows = cursor.fetchall()
+
+    application_ids = np.array([row["id"] for row in rows], dtype=np.int64)
+    scores = score_documents(query, [
+        _features(f"{row['cover_letter']} {row['resume_text'] or ''}", json.loads(row["skills"]))
+        for row in rows
+    ])
+    order = np.lexsort((application_ids, -scores))
+    ranking = (application_ids[order], scores[order])
+
+    with _cache_lock:
+        _cache[job_id] = (version, time.monotonic(), ranking)
+        _cache.move_to_end(job_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ranking
+
+def invalidate_job(job_id: int) -> None:
+    """Drop the cached ranking of a job after its posting or applications change"""
+    with _cache_lock:
+        _cache.pop(job_id, None)
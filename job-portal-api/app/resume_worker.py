@@ -0,0 +1,177 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pypdf import PdfReader
+
+from blobstore import blob_path, BLOB_URL_PREFIX
+from database import utc_timestamp
+from ranking import invalidate_job
+from writer import run_write
+
+# Resume text extraction settings (override with environment variables)
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", 2))
+RESUME_MAX_ATTEMPTS = int(os.getenv("RESUME_MAX_ATTEMPTS", 3))
+RESUME_RETRY_DELAY_SECONDS = int(os.getenv("RESUME_RETRY_DELAY_SECONDS", 30))
+RESUME_POLL_SECONDS = float(os.getenv("RESUME_POLL_SECONDS", 5))
+# Seconds a worker process owns a claimed job; a job still processing after
+# that (its worker stopped) is claimed again by any worker
+RESUME_LEASE_SECONDS = int(os.getenv("RESUME_LEASE_SECONDS", 300))
+RESUME_MAX_PAGES = 50
+RESUME_MAX_TEXT_CHARS = 200_000
+
+_wakeup = asyncio.Event()
+
+def extract_pdf_text(path: str) -> str:
+    """Extract plain text from a PDF (runs in a worker process)"""
+    reader = PdfReader(path)
+    pages = [page.extract_text() or "" for page in reader.pages[:RESUME_MAX_PAGES]]
+    return "\n".join(pages)[:RESUME_MAX_TEXT_CHARS]
+
+def _lower_priority() -> None:
+    """Worker processes yield the CPU to the API process"""
+    os.nice(10)
+
+def enqueue_extraction(cursor, digest: str) -> None:
+    """Queue text extraction for a resume blob; content already queued is skipped"""
+    cursor.execute("""
+        INSERT INTO resume_jobs (digest) VALUES (?)
+        ON CONFLICT(digest) DO NOTHING
+    """, (digest,))
+
+def notify_worker() -> None:
+    """Wake the extraction worker after enqueued jobs are committed"""
+    _wakeup.set()
+
+def _claim_jobs(cursor, limit: int) -> list:
+    """Lease queued jobs, and processing ones whose lease ran out, to this worker"""
+    now = utc_timestamp()
+    # A job whose worker stopped on every attempt is not tried again
+    cursor.execute("""
+        UPDATE resume_jobs
+        SET status = 'failed', last_error = 'lease expired', leased_until = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'processing' AND (leased_until IS NULL OR leased_until <= ?) AND attempts >= ?
+    """, (now, RESUME_MAX_ATTEMPTS))
+    claimable = """
+        (status = 'queued' AND available_at <= CURRENT_TIMESTAMP)
+        OR (status = 'processing' AND (leased_until IS NULL OR leased_until <= ?))
+    """
+    cursor.execute(f"""
+        UPDATE resume_jobs
+        SET status = 'processing', attempts = attempts + 1, leased_until = ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT id FROM resume_jobs
+            WHERE {claimable}
+            ORDER BY id
+            LIMIT ?
+        ) AND ({claimable})
+        RETURNING id, digest, attempts
+    """, (utc_timestamp(RESUME_LEASE_SECONDS), now, limit, now))
+    return [dict(row) for row in cursor.fetchall()]
+
+def _complete_job(cursor, job: dict, text: str) -> list:
+    """Store extracted text; returns the jobs whose applicant ranking it affects"""
+    cursor.execute("""
+        INSERT INTO resume_texts (digest, text) VALUES (?, ?)
+        ON CONFLICT(digest) DO NOTHING
+    """, (job["digest"], text))
+    cursor.execute("""
+        UPDATE resume_jobs
+        SET status = 'done', last_error = NULL, leased_until = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, (job["id"],))
+
+    # Resume text feeds the applicant ranking of every job it was used for
+    resume_url = f"{BLOB_URL_PREFIX}{job['digest']}.pdf"
+    cursor.execute("""
+        SELECT job_id FROM applications WHERE resume_url = ?
+        UNION
+        SELECT a.job_id FROM applications a
+        JOIN job_seekers js ON js.id = a.seeker_id
+        WHERE js.resume_url = ?
+    """, (resume_url, resume_url))
+    return [row["job_id"] for row in cursor.fetchall()]
+
+def _fail_job(cursor, job: dict, error: str) -> None:
+    if job["attempts"] >= RESUME_MAX_ATTEMPTS:
+        cursor.execute("""
+            UPDATE resume_jobs
+            SET status = 'failed', last_error = ?, leased_until = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (error, job["id"]))
+    else:
+        # Exponential backoff before the next attempt
+        delay = RESUME_RETRY_DELAY_SECONDS * 2 ** (job["attempts"] - 1)
+        cursor.execute("""
+            UPDATE resume_jobs
+            SET status = 'queued', last_error = ?, leased_until = NULL, updated_at = CURRENT_TIMESTAMP,
+                available_at = ?
+            WHERE id = ?
+        """, (error, utc_timestamp(delay), job["id"]))
+
+class _Extractor:
+    """Process pool running extraction jobs, rebuilt if a worker process dies"""
+
+    def __init__(self):
+        self.pool = self._new_pool()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=RESUME_WORKERS, initializer=_lower_priority)
+
+    async def process(self, job: dict) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            text = await loop.run_in_executor(self.pool, extract_pdf_text, blob_path(job["digest"]))
+        except BrokenProcessPool as e:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._new_pool()
+            error = f"worker process died: {e}"
+            await run_write(lambda cursor: _fail_job(cursor, job, error))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            await run_write(lambda cursor: _fail_job(cursor, job, error))
+        else:
+            for job_id in await run_write(lambda cursor: _complete_job(cursor, job, text)):
+                invalidate_job(job_id)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+async def run_extraction_worker() -> None:
+    """Background task feeding queued resumes to the extraction process pool
+
+    Only as many jobs are claimed as there are free worker processes, so the
+    backlog stays in SQLite instead of piling up in memory, and all database
+    writes go through the writer thread so the event loop only dispatches.
+    """
+    extractor = _Extractor()
+    in_flight = set()
+    try:
+        while True:
+            _wakeup.clear()
+            free_slots = RESUME_WORKERS - len(in_flight)
+            claimed = []
+            if free_slots > 0:
+                try:
+                    claimed = await run_write(lambda cursor: _claim_jobs(cursor, free_slots))
+                except Exception as e:
+                    print(f"⚠️ Resume queue unavailable: {e}")
+
+            for job in claimed:
+                task = asyncio.create_task(extractor.process(job))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            if len(claimed) < free_slots or free_slots == 0:
+                # Sleep until new work is enqueued, a worker frees up, or the next poll
+                wakeup = asyncio.create_task(_wakeup.wait())
+                await asyncio.wait({wakeup, *in_flight}, timeout=RESUME_POLL_SECONDS,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                wakeup.cancel()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        extractor.shutdown()
@@ -1,77 +1,185 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from typing import List, Optional
-from models import Application, ApplicationCreate, ApplicationStatus, ApplicationWithLinks
-from database import get_db_connection
-import os
-import shutil
+from models import (Application, ApplicationCreate, ApplicationBatchCreate,
+                    ApplicationBulkStatusUpdate, ApplicationStatus, ApplicationWithLinks)
+from database import get_db_connection, IntegrityError
+from writer import run_write
+from ranking import invalidate_job
+from mappers import map_application, json_response
+from blobstore import store_pdf_upload, replace_reference, release
+from resume_worker import enqueue_extraction, notify_worker
+from outbox import record_event, record_events, notify_dispatcher
+from application_status import can_transition, transition_applications
 
 router = APIRouter(prefix="/api/applications", tags=["Applications"])
 
-UPLOAD_DIR = "/app/storage/application_resumes"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+def _integrity_error(e: IntegrityError) -> HTTPException:
+    """Map constraint violations on applications to API errors"""
+    if "unique" in str(e).lower():
+        return HTTPException(status_code=400, detail="You have already applied to this job")
+    return HTTPException(status_code=400, detail=str(e))
 
-def add_hateoas_links(app: dict, base_url: str = "http://localhost:8000") -> dict:
-    """Add HATEOAS links to application"""
-    app["links"] = {
-        "self": f"{base_url}/api/applications/{app['id']}",
-        "job": f"{base_url}/api/jobs/{app['job_id']}",
-        "seeker": f"{base_url}/api/seekers/{app['seeker_id']}",
-        "update_status": f"{base_url}/api/applications/{app['id']}/status"
-    }
-    return app
+def _rejection_reason(cursor, job_id: int, seeker_id: int) -> HTTPException:
+    """Explain why a guarded insert matched no job/seeker pair (failure path only)"""
+    cursor.execute("SELECT status FROM job_postings WHERE id = ?", (job_id,))
+    job = cursor.fetchone()
+    if not job:
+        return HTTPException(status_code=404, detail="Job posting not found")
+    if job["status"] != "open":
+        return HTTPException(status_code=400, detail="Job posting is not open for applications")
+    return HTTPException(status_code=404, detail="Job seeker not found")
 
 @router.post("/", response_model=ApplicationWithLinks, status_code=201)
 async def create_application(application: ApplicationCreate):
     """Submit a job application"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Verify job exists and is open
-        cursor.execute("SELECT status FROM job_postings WHERE id = ?", (application.job_id,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail="Job posting not found")
-        if job["status"] != "open":
-            raise HTTPException(status_code=400, detail="Job posting is not open for applications")
+    def write(cursor):
+        # One statement: the SELECT guards job/seeker existence and open status,
+        # UNIQUE(job_id, seeker_id) rejects duplicates, RETURNING replaces the re-SELECT
+        try:
+            cursor.execute("""
+                INSERT INTO applications (job_id, seeker_id, cover_letter)
+                SELECT j.id, s.id, ?
+                FROM job_postings j, job_seekers s
+                WHERE j.id = ? AND j.status = 'open' AND s.id = ?
+                RETURNING *
+            """, (application.cover_letter, application.job_id, application.seeker_id))
+            row = cursor.fetchone()
+        except IntegrityError as e:
+            raise _integrity_error(e)
         
-        # Verify seeker exists
-        cursor.execute("SELECT id FROM job_seekers WHERE id = ?", (application.seeker_id,))
+        if not row:
+            raise _rejection_reason(cursor, application.job_id, application.seeker_id)
+        record_event(cursor, "application.created", row)
+        return row
+    
+    row = await run_write(write)
+    invalidate_job(application.job_id)
+    notify_dispatcher()
+    
+    return json_response(map_application(row), status_code=201)
+
+@router.post("/batch")
+async def create_applications_batch(batch: ApplicationBatchCreate):
+    """Apply one job seeker to many jobs in a single transaction"""
+    job_ids = list(dict.fromkeys(batch.job_ids))
+    
+    def write(cursor):
+        cursor.execute("SELECT id FROM job_seekers WHERE id = ?", (batch.seeker_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Job seeker not found")
         
-        # Check for duplicate application
-        cursor.execute("""
-            SELECT id FROM applications 
-            WHERE job_id = ? AND seeker_id = ?
-        """, (application.job_id, application.seeker_id))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="You have already applied to this job")
+        cursor.execute(f"""
+            INSERT INTO applications (job_id, seeker_id, cover_letter)
+            SELECT j.id, ?, ?
+            FROM job_postings j
+            WHERE j.id IN ({",".join("?" * len(job_ids))}) AND j.status = 'open'
+            ON CONFLICT(job_id, seeker_id) DO NOTHING
+            RETURNING *
+        """, (batch.seeker_id, batch.cover_letter, *job_ids))
+        created = {row["job_id"]: row for row in cursor.fetchall()}
+        record_events(cursor, "application.created", list(created.values()))
         
-        try:
-            cursor.execute("""
-                INSERT INTO applications (job_id, seeker_id, cover_letter)
-                VALUES (?, ?, ?)
-            """, (application.job_id, application.seeker_id, application.cover_letter))
-            
-            app_id = cursor.lastrowid
-            
-            # Fetch the created application
-            cursor.execute("SELECT * FROM applications WHERE id = ?", (app_id,))
-            row = cursor.fetchone()
-            
-            result = {
-                "id": row["id"],
-                "job_id": row["job_id"],
-                "seeker_id": row["seeker_id"],
-                "cover_letter": row["cover_letter"],
-                "resume_url": row["resume_url"],
-                "status": row["status"],
-                "applied_at": row["applied_at"]
-            }
-            
-            return add_hateoas_links(result)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
+        # Classify the jobs that were not applied to
+        remaining = [job_id for job_id in job_ids if job_id not in created]
+        if not remaining:
+            return created, {}
+        cursor.execute(f"""
+            SELECT j.id, j.status, a.id AS existing_application_id
+            FROM job_postings j
+            LEFT JOIN applications a ON a.job_id = j.id AND a.seeker_id = ?
+            WHERE j.id IN ({",".join("?" * len(remaining))})
+        """, (batch.seeker_id, *remaining))
+        skipped = {row["id"]: row for row in cursor.fetchall()}
+        return created, skipped
+    
+    created, skipped = await run_write(write)
+    notify_dispatcher()
+    
+    results = []
+    for job_id in job_ids:
+        if job_id in created:
+            invalidate_job(job_id)
+            results.append({"job_id": job_id, "status": "created",
+                            "application": map_application(created[job_id])})
+        elif job_id not in skipped:
+            results.append({"job_id": job_id, "status": "error", "error": "Job posting not found"})
+        elif skipped[job_id]["existing_application_id"] is not None:
+            results.append({"job_id": job_id, "status": "error",
+                            "error": "You have already applied to this job",
+                            "application_id": skipped[job_id]["existing_application_id"]})
+        else:
+            results.append({"job_id": job_id, "status": "error",
+                            "error": "Job posting is not open for applications"})
+    
+    return json_response({
+        "seeker_id": batch.seeker_id,
+        "created": len(created),
+        "failed": len(job_ids) - len(created),
+        "results": results
+    })
+
+@router.patch("/status")
+async def update_application_statuses(update: ApplicationBulkStatusUpdate):
+    """Move many applications to a status in a single transaction
+
+    Only allowed transitions are applied (see application_status.TRANSITIONS);
+    the others are reported per application.
+    """
+    application_ids = list(dict.fromkeys(update.application_ids or []))
+    
+    def write(cursor):
+        if update.job_id is not None:
+            if update.current_status is not None and not can_transition(update.current_status, update.status):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Cannot change applications from {update.current_status.value} to {update.status.value}"
+                )
+            cursor.execute("SELECT id FROM job_postings WHERE id = ?", (update.job_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Job posting not found")
+            current_statuses = [update.current_status] if update.current_status is not None else None
+            return transition_applications(cursor, update.status, job_id=update.job_id,
+                                           current_statuses=current_statuses), {}
+        
+        updated = transition_applications(cursor, update.status, application_ids=application_ids)
+        
+        # Classify the applications that were not updated
+        updated_ids = {row["id"] for row in updated}
+        remaining = [application_id for application_id in application_ids if application_id not in updated_ids]
+        if not remaining:
+            return updated, {}
+        cursor.execute(f"""
+            SELECT id, status FROM applications
+            WHERE id IN ({",".join("?" * len(remaining))})
+        """, remaining)
+        return updated, {row["id"]: ApplicationStatus(row["status"]) for row in cursor.fetchall()}
+    
+    updated, skipped = await run_write(write)
+    notify_dispatcher()
+    
+    updated_ids = {row["id"] for row in updated}
+    results = [{"application_id": row["id"], "status": "updated"} for row in updated]
+    for application_id in application_ids:
+        if application_id in updated_ids:
+            continue
+        current = skipped.get(application_id)
+        if current is None:
+            results.append({"application_id": application_id, "status": "error", "error": "Application not found"})
+        elif current == update.status:
+            results.append({"application_id": application_id, "status": "unchanged"})
+        else:
+            results.append({"application_id": application_id, "status": "error",
+                            "error": f"Cannot change application from {current.value} to {update.status.value}",
+                            "current_status": current.value})
+    results.sort(key=lambda result: result["application_id"])
+    
+    return json_response({
+        "status": update.status.value,
+        "updated": len(updated),
+        "unchanged": sum(result["status"] == "unchanged" for result in results),
+        "failed": sum(result["status"] == "error" for result in results),
+        "results": results
+    })
 
 @router.get("/", response_model=List[ApplicationWithLinks])
 async def get_all_applications(
@@ -103,20 +211,7 @@ async def get_all_applications(
         cursor.execute(query, params)
         rows = cursor.fetchall()
         
-        applications = [
-            {
-                "id": row["id"],
-                "job_id": row["job_id"],
-                "seeker_id": row["seeker_id"],
-                "cover_letter": row["cover_letter"],
-                "resume_url": row["resume_url"],
-                "status": row["status"],
-                "applied_at": row["applied_at"]
-            }
-            for row in rows
-        ]
-        
-        return [add_hateoas_links(app) for app in applications]
+        return json_response([map_application(row) for row in rows])
 
 @router.get("/{application_id}", response_model=ApplicationWithLinks)
 async def get_application(application_id: int):
@@ -126,73 +221,91 @@ async def get_application(application_id: int):
         cursor.execute("SELECT * FROM applications WHERE id = ?", (application_id,))
         row = cursor.fetchone()
         
+        if not row:
+            # Applications to archived postings live in the archive
+            cursor.execute("SELECT * FROM applications_archive WHERE id = ?", (application_id,))
+            row = cursor.fetchone()
+        
         if not row:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        result = {
-            "id": row["id"],
-            "job_id": row["job_id"],
-            "seeker_id": row["seeker_id"],
-            "cover_letter": row["cover_letter"],
-            "resume_url": row["resume_url"],
-            "status": row["status"],
-            "applied_at": row["applied_at"]
-        }
-        
-        return add_hateoas_links(result)
+        return json_response(map_application(row))
 
 @router.patch("/{application_id}/status")
 async def update_application_status(application_id: int, status: ApplicationStatus):
     """Update application status (for employers to review applications)"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("""
             UPDATE applications 
             SET status = ?
             WHERE id = ?
+            RETURNING id, job_id, seeker_id, status
         """, (status.value, application_id))
+        row = cursor.fetchone()
         
-        if cursor.rowcount == 0:
+        if not row:
             raise HTTPException(status_code=404, detail="Application not found")
-        
-        return {"message": f"Application status updated to {status.value}"}
+        record_event(cursor, "application.status_changed", row)
+    
+    await run_write(write)
+    notify_dispatcher()
+    
+    return {"message": f"Application status updated to {status.value}"}
 
 @router.delete("/{application_id}", status_code=204)
 async def delete_application(application_id: int):
     """Withdraw an application"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM applications WHERE id = ?", (application_id,))
+    def write(cursor):
+        cursor.execute("""
+            DELETE FROM applications WHERE id = ?
+            RETURNING id, job_id, seeker_id, status, resume_url
+        """, (application_id,))
+        row = cursor.fetchone()
         
-        if cursor.rowcount == 0:
+        if not row:
             raise HTTPException(status_code=404, detail="Application not found")
+        
+        release(cursor, row["resume_url"])
+        record_event(cursor, "application.withdrawn", row)
+        return row["job_id"]
+    
+    invalidate_job(await run_write(write))
+    notify_dispatcher()
 
 @router.post("/{application_id}/upload-resume")
 async def upload_application_resume(application_id: int, file: UploadFile = File(...)):
     """Upload resume for a specific application"""
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT id FROM applications WHERE id = ?", (application_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Application not found")
+    
+    # Stream file into the content-addressed blob store
+    blob = await store_pdf_upload(file)
+    resume_url = blob["url"]
+    
+    # Update database, moving the reference from the previous resume
+    def write(cursor):
+        cursor.execute("SELECT resume_url FROM applications WHERE id = ?", (application_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Application not found")
         
-        # Save file
-        filename = f"application_{application_id}_{file.filename}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Update database
-        resume_url = f"/storage/application_resumes/{filename}"
+        replace_reference(cursor, row["resume_url"], blob)
         cursor.execute("UPDATE applications SET resume_url = ? WHERE id = ?", 
                       (resume_url, application_id))
-        
-        return {
-            "message": "Resume uploaded successfully",
-            "resume_url": resume_url,
-            "access_url": f"http://localhost:8000{resume_url}"
-        }
+        enqueue_extraction(cursor, blob["sha256"])
+    
+    await run_write(write)
+    
+    notify_worker()
+    
+    return {
+        "message": "Resume uploaded successfully",
+        "resume_url": resume_url,
+        "access_url": f"http://localhost:8000{resume_url}",
+        "size": blob["size"],
+        "sha256": blob["sha256"],
+        "extraction_status": f"http://localhost:8000/api/resumes/{blob['sha256']}"
+    }
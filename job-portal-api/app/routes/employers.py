@@ -1,39 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List
-from models import Employer, EmployerCreate
+from models import Employer, EmployerCreate, ApplicationStatus
 from database import get_db_connection
+from writer import run_write
+from mappers import map_employer, json_response, BASE_URL
+from bulk import import_ndjson, allocate_ids, reject_duplicate_emails
 
 router = APIRouter(prefix="/api/employers", tags=["Employers"])
 
 @router.post("/", response_model=Employer, status_code=201)
 async def create_employer(employer: EmployerCreate):
     """Create a new employer profile"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute("""
-                INSERT INTO employers (company_name, email, phone, description, website)
-                VALUES (?, ?, ?, ?, ?)
-            """, (employer.company_name, employer.email, employer.phone, 
-                  employer.description, employer.website))
-            
-            employer_id = cursor.lastrowid
-            
-            # Fetch the created employer
-            cursor.execute("SELECT * FROM employers WHERE id = ?", (employer_id,))
-            row = cursor.fetchone()
-            
-            return {
-                "id": row["id"],
-                "company_name": row["company_name"],
-                "email": row["email"],
-                "phone": row["phone"],
-                "description": row["description"],
-                "website": row["website"],
-                "created_at": row["created_at"]
-            }
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
+    def write(cursor):
+        cursor.execute("""
+            INSERT INTO employers (company_name, email, phone, description, website)
+            VALUES (?, ?, ?, ?, ?)
+            RETURNING *
+        """, (employer.company_name, employer.email, employer.phone, 
+              employer.description, employer.website))
+        return cursor.fetchone()
+    
+    try:
+        row = await run_write(write)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return json_response(map_employer(row), status_code=201)
+
+def _insert_employer_batch(cursor, batch):
+    """Insert validated employers in one transaction, rejecting duplicate emails"""
+    rejected, accepted = reject_duplicate_emails(cursor, "employers", batch)
+    ids = allocate_ids(cursor, "employers", len(accepted))
+    
+    cursor.executemany("""
+        INSERT INTO employers (id, company_name, email, phone, description, website)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(employer_id, employer.company_name, employer.email, employer.phone,
+           employer.description, employer.website)
+          for employer_id, employer in zip(ids, accepted)])
+    
+    return rejected
+
+@router.post("/bulk")
+async def bulk_import_employers(request: Request):
+    """Bulk import employers from an NDJSON body (one EmployerCreate per line)"""
+    return await import_ndjson(request, EmployerCreate, _insert_employer_batch)
 
 @router.get("/", response_model=List[Employer])
 async def get_all_employers():
@@ -43,18 +54,7 @@ async def get_all_employers():
         cursor.execute("SELECT * FROM employers ORDER BY created_at DESC")
         rows = cursor.fetchall()
         
-        return [
-            {
-                "id": row["id"],
-                "company_name": row["company_name"],
-                "email": row["email"],
-                "phone": row["phone"],
-                "description": row["description"],
-                "website": row["website"],
-                "created_at": row["created_at"]
-            }
-            for row in rows
-        ]
+        return json_response([map_employer(row) for row in rows])
 
 @router.get("/{employer_id}", response_model=Employer)
 async def get_employer(employer_id: int):
@@ -67,21 +67,64 @@ async def get_employer(employer_id: int):
         if not row:
             raise HTTPException(status_code=404, detail="Employer not found")
         
-        return {
-            "id": row["id"],
-            "company_name": row["company_name"],
-            "email": row["email"],
-            "phone": row["phone"],
-            "description": row["description"],
-            "website": row["website"],
-            "created_at": row["created_at"]
-        }
+        return json_response(map_employer(row))
+
+@router.get("/{employer_id}/dashboard")
+async def get_employer_dashboard(employer_id: int):
+    """Application counts by status for each of an employer's job postings"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, company_name FROM employers WHERE id = ?", (employer_id,))
+        employer = cursor.fetchone()
+        if not employer:
+            raise HTTPException(status_code=404, detail="Employer not found")
+        
+        # Pre-aggregated counters: cost depends on the number of jobs, not applicants
+        cursor.execute("""
+            SELECT j.id, j.title, j.status, c.status AS application_status, c.application_count
+            FROM job_postings j
+            LEFT JOIN job_application_counts c ON c.job_id = j.id AND c.application_count > 0
+            WHERE j.employer_id = ?
+            ORDER BY j.created_at DESC, j.id DESC
+        """, (employer_id,))
+        rows = cursor.fetchall()
+    
+    statuses = [status.value for status in ApplicationStatus]
+    totals = {**dict.fromkeys(statuses, 0), "total": 0}
+    jobs = {}
+    for row in rows:
+        job = jobs.get(row["id"])
+        if job is None:
+            job = jobs[row["id"]] = {
+                "job_id": row["id"],
+                "title": row["title"],
+                "status": row["status"],
+                "applications": {**dict.fromkeys(statuses, 0), "total": 0},
+                "links": {
+                    "job": f"{BASE_URL}/api/jobs/{row['id']}",
+                    "applications": f"{BASE_URL}/api/jobs/{row['id']}/applications"
+                }
+            }
+        if row["application_status"] is not None:
+            count = row["application_count"]
+            job["applications"][row["application_status"]] = count
+            job["applications"]["total"] += count
+            totals[row["application_status"]] = totals.get(row["application_status"], 0) + count
+            totals["total"] += count
+    
+    return json_response({
+        "employer_id": employer["id"],
+        "company_name": employer["company_name"],
+        "job_count": len(jobs),
+        "open_jobs": sum(job["status"] == "open" for job in jobs.values()),
+        "applications": totals,
+        "jobs": list(jobs.values())
+    })
 
 @router.put("/{employer_id}", response_model=Employer)
 async def update_employer(employer_id: int, employer: EmployerCreate):
     """Update an employer profile"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("""
             UPDATE employers 
             SET company_name = ?, email = ?, phone = ?, description = ?, website = ?
@@ -93,24 +136,18 @@ async def update_employer(employer_id: int, employer: EmployerCreate):
             raise HTTPException(status_code=404, detail="Employer not found")
         
         cursor.execute("SELECT * FROM employers WHERE id = ?", (employer_id,))
-        row = cursor.fetchone()
-        
-        return {
-            "id": row["id"],
-            "company_name": row["company_name"],
-            "email": row["email"],
-            "phone": row["phone"],
-            "description": row["description"],
-            "website": row["website"],
-            "created_at": row["created_at"]
-        }
+        return cursor.fetchone()
+    
+    row = await run_write(write)
+    return json_response(map_employer(row))
 
 @router.delete("/{employer_id}", status_code=204)
 async def delete_employer(employer_id: int):
     """Delete an employer profile"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("DELETE FROM employers WHERE id = ?", (employer_id,))
         
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Employer not found")
+    
+    await run_write(write)
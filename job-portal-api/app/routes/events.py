@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from database import get_db_connection, DATABASE_BACKEND
+from writer import run_write
+from outbox import sequence_events
+from mappers import map_event, map_event_sink, json_response
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+@router.get("/")
+async def get_events(
+    since: int = Query(0, ge=0, description="Only events after this id: the previous response's next"),
+    limit: int = Query(100, ge=1, le=1000),
+    application_id: Optional[int] = None,
+    event_type: Optional[str] = None
+):
+    """Application events after a cursor, oldest first"""
+    if DATABASE_BACKEND == "postgres":
+        # Include events committed since the dispatcher last ran
+        await run_write(sequence_events)
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        query = "SELECT * FROM events WHERE id > ?"
+        params = [since]
+        
+        if application_id:
+            query += " AND application_id = ?"
+            params.append(application_id)
+        
+        if event_type:
+            query += " AND event_type = ?"
+            params.append(event_type)
+        
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        events = [map_event(row) for row in cursor.fetchall()]
+    
+    return json_response({"events": events, "next": events[-1]["id"] if events else since})
+
+@router.get("/sinks")
+async def get_event_sinks():
+    """Delivery progress of each event sink"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.sink, s.last_event_id, s.delivered, s.attempts, s.last_error,
+                   s.available_at, s.updated_at,
+                   (SELECT COUNT(*) FROM events e WHERE e.id > s.last_event_id) AS pending
+            FROM event_sinks s
+            ORDER BY s.sink
+        """)
+        return json_response([map_event_sink(row) for row in cursor.fetchall()])
@@ -1,191 +1,234 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Optional, Union
+from datetime import date, datetime, time, timezone
 import json
-from models import JobPosting, JobPostingCreate, JobPostingWithLinks, JobStatus
+from models import (JobPosting, JobPostingCreate, JobPostingWithLinks, JobStatus,
+                    ApplicationStatus, ExportFormat)
 from database import get_db_connection
+from writer import run_write
+from skills import index_job_skills, bulk_index_job_skills, SKILL_OVERLAP_WEIGHT, EXPERIENCE_FIT_WEIGHT
+from bulk import import_ndjson, allocate_ids
+from salary import parse_salary_range, SALARY_REACH_SQL
+from geo import locate, resolve_location, near_filter, distance_miles, MAX_RADIUS_MILES
+from ranking import rank_job_applications, invalidate_job
+from job_cache import cached_json, invalidate_jobs, record_new_jobs, job_details, job_listings
+from mappers import map_job, map_seeker, map_job_application, json_response, BASE_URL
+from export import stream_export
+from outbox import record_events, notify_dispatcher
+from blobstore import release
+from application_status import transition_applications
 
-router = APIRouter(prefix="/api/jobs", tags=["Job Postings"])
+# CSV header of application exports, in SELECT order
+EXPORT_COLUMNS = ("id", "job_id", "seeker_id", "seeker_name", "seeker_email", "cover_letter",
+                  "resume_url", "status", "applied_at")
 
-def add_hateoas_links(job: dict, base_url: str = "http://localhost:8000") -> dict:
-    """Add HATEOAS links to job posting"""
-    job["links"] = {
-        "self": f"{base_url}/api/jobs/{job['id']}",
-        "employer": f"{base_url}/api/employers/{job['employer_id']}",
-        "applications": f"{base_url}/api/jobs/{job['id']}/applications",
-        "apply": f"{base_url}/api/applications"
-    }
-    return job
+router = APIRouter(prefix="/api/jobs", tags=["Job Postings"])
 
 @router.post("/", response_model=JobPostingWithLinks, status_code=201)
 async def create_job_posting(job: JobPostingCreate):
     """Create a new job posting"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
+    def write(cursor):
         # Verify employer exists
         cursor.execute("SELECT id FROM employers WHERE id = ?", (job.employer_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Employer not found")
         
-        try:
-            cursor.execute("""
-                INSERT INTO job_postings 
-                (employer_id, title, description, requirements, location, 
-                 salary_range, job_type, experience_required)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (job.employer_id, job.title, job.description, 
-                  json.dumps(job.requirements), job.location, 
-                  job.salary_range, job.job_type, job.experience_required))
-            
-            job_id = cursor.lastrowid
-            
-            # Fetch the created job
-            cursor.execute("SELECT * FROM job_postings WHERE id = ?", (job_id,))
-            row = cursor.fetchone()
-            
-            result = {
-                "id": row["id"],
-                "employer_id": row["employer_id"],
-                "title": row["title"],
-                "description": row["description"],
-                "requirements": json.loads(row["requirements"]),
-                "location": row["location"],
-                "salary_range": row["salary_range"],
-                "job_type": row["job_type"],
-                "experience_required": row["experience_required"],
-                "status": row["status"],
-                "created_at": row["created_at"],
-                "updated_at": row["updated_at"]
-            }
-            
-            return add_hateoas_links(result)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
+        cursor.execute("""
+            INSERT INTO job_postings 
+            (employer_id, title, description, requirements, location, latitude, longitude,
+             geo_cell, salary_range, salary_min, salary_max, job_type, experience_required)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            RETURNING *
+        """, (job.employer_id, job.title, job.description, 
+              json.dumps(job.requirements), job.location, *locate(job.location),
+              job.salary_range, *parse_salary_range(job.salary_range),
+              job.job_type, job.experience_required))
+        row = cursor.fetchone()
+        
+        index_job_skills(cursor, row["id"], job.requirements)
+        record_new_jobs(cursor)
+        return row
+    
+    try:
+        row = await run_write(write)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    invalidate_jobs([row["id"]])
+    
+    return json_response(map_job(row), status_code=201)
+
+def _insert_job_batch(cursor, batch):
+    """Insert validated job postings in one transaction, rejecting unknown employers"""
+    employer_ids = sorted({job.employer_id for _, job in batch})
+    placeholders = ",".join("?" * len(employer_ids))
+    cursor.execute(f"SELECT id FROM employers WHERE id IN ({placeholders})", employer_ids)
+    known = {row["id"] for row in cursor.fetchall()}
+    
+    rejected = [(line, "Employer not found") for line, job in batch if job.employer_id not in known]
+    accepted = [job for _, job in batch if job.employer_id in known]
+    ids = allocate_ids(cursor, "job_postings", len(accepted))
+    
+    cursor.executemany("""
+        INSERT INTO job_postings 
+        (id, employer_id, title, description, requirements, location, latitude, longitude,
+         geo_cell, salary_range, salary_min, salary_max, job_type, experience_required)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(job_id, job.employer_id, job.title, job.description,
+           json.dumps(job.requirements), job.location, *locate(job.location),
+           job.salary_range, *parse_salary_range(job.salary_range),
+           job.job_type, job.experience_required)
+          for job_id, job in zip(ids, accepted)])
+    bulk_index_job_skills(cursor, [(job_id, job.requirements) for job_id, job in zip(ids, accepted)])
+    if accepted:
+        record_new_jobs(cursor)
+    
+    return rejected
+
+@router.post("/bulk")
+async def bulk_import_jobs(request: Request):
+    """Bulk import job postings from an NDJSON body (one JobPostingCreate per line)"""
+    result = await import_ndjson(request, JobPostingCreate, _insert_job_batch)
+    invalidate_jobs()
+    return result
 
 @router.get("/", response_model=List[JobPostingWithLinks])
 async def get_all_jobs(
+    request: Request,
     status: Optional[JobStatus] = None,
     location: Optional[str] = None,
+    near: Optional[str] = Query(None, description="'City, ST' or 'lat,lon' to search around"),
+    radius: float = Query(25, gt=0, le=MAX_RADIUS_MILES, description="Search radius in miles"),
     job_type: Optional[str] = None,
+    min_salary: Optional[int] = Query(None, ge=0, description="Annual pay range reaches at least this"),
+    max_salary: Optional[int] = Query(None, ge=0, description="Annual pay range starts at or below this"),
+    min_experience: Optional[int] = Query(None, ge=0),
+    max_experience: Optional[int] = Query(None, ge=0),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100)
 ):
     """Get all job postings with optional filters"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM job_postings WHERE 1=1"
-        params = []
-        
-        if status:
-            query += " AND status = ?"
-            params.append(status.value)
-        
-        if location:
-            query += " AND location LIKE ?"
-            params.append(f"%{location}%")
-        
-        if job_type:
-            query += " AND job_type = ?"
-            params.append(job_type)
+    query = "SELECT * FROM job_postings WHERE 1=1"
+    params = []
+    
+    if status:
+        query += " AND status = ?"
+        params.append(status.value)
+    
+    if location:
+        # Case-insensitive on both backends (Postgres LIKE is case-sensitive)
+        query += " AND LOWER(location) LIKE ?"
+        params.append(f"%{location.lower()}%")
+    
+    origin = None
+    if near:
+        origin = resolve_location(near)
+        if origin is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location: {near}")
+        # Grid cell lookup on idx_job_postings_geo_cell, then the radius check
+        condition, condition_params = near_filter(*origin, radius)
+        query += f" AND {condition}"
+        params.extend(condition_params)
+    
+    if job_type:
+        query += " AND job_type = ?"
+        params.append(job_type)
+    
+    # Salary filters match postings whose parsed range overlaps the requested one
+    # (postings without figures never match; open-ended ones have no maximum);
+    # see the status/salary indexes
+    if min_salary is not None:
+        query += f" AND {SALARY_REACH_SQL} >= ?"
+        params.append(min_salary)
+    
+    if max_salary is not None:
+        query += " AND salary_min <= ?"
+        params.append(max_salary)
+    
+    if min_experience is not None:
+        query += " AND experience_required >= ?"
+        params.append(min_experience)
+    
+    if max_experience is not None:
+        query += " AND experience_required <= ?"
+        params.append(max_experience)
+    
+    query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+    params.extend([limit, skip])
+    
+    def load():
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            jobs = [map_job(row) for row in cursor.fetchall()]
         
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, skip])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        jobs = [
-            {
-                "id": row["id"],
-                "employer_id": row["employer_id"],
-                "title": row["title"],
-                "description": row["description"],
-                "requirements": json.loads(row["requirements"]),
-                "location": row["location"],
-                "salary_range": row["salary_range"],
-                "job_type": row["job_type"],
-                "experience_required": row["experience_required"],
-                "status": row["status"],
-                "created_at": row["created_at"],
-                "updated_at": row["updated_at"]
-            }
-            for row in rows
-        ]
-        
-        return [add_hateoas_links(job) for job in jobs]
+        if origin:
+            for job in jobs:
+                job["distance_miles"] = round(distance_miles(*origin, job["latitude"], job["longitude"]), 1)
+        return jobs
+    
+    # The finished query identifies the listing, however its filters were spelled
+    return cached_json(job_listings, (query, tuple(params)), request, load)
 
 @router.get("/{job_id}", response_model=JobPostingWithLinks)
-async def get_job(job_id: int):
+async def get_job(job_id: int, request: Request):
     """Get a specific job posting by ID"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM job_postings WHERE id = ?", (job_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail="Job posting not found")
-        
-        result = {
-            "id": row["id"],
-            "employer_id": row["employer_id"],
-            "title": row["title"],
-            "description": row["description"],
-            "requirements": json.loads(row["requirements"]),
-            "location": row["location"],
-            "salary_range": row["salary_range"],
-            "job_type": row["job_type"],
-            "experience_required": row["experience_required"],
-            "status": row["status"],
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"]
-        }
-        
-        return add_hateoas_links(result)
+    def load():
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM job_postings WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            
+            if not row:
+                # Closed postings past retention live in the archive
+                cursor.execute("SELECT * FROM job_postings_archive WHERE id = ?", (job_id,))
+                row = cursor.fetchone()
+            
+            if not row:
+                raise HTTPException(status_code=404, detail="Job posting not found")
+            
+            return map_job(row)
+    
+    return cached_json(job_details, job_id, request, load)
 
 @router.put("/{job_id}", response_model=JobPostingWithLinks)
 async def update_job(job_id: int, job: JobPostingCreate):
     """Update a job posting"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("""
             UPDATE job_postings 
             SET title = ?, description = ?, requirements = ?, location = ?, 
-                salary_range = ?, job_type = ?, experience_required = ?,
-                updated_at = CURRENT_TIMESTAMP
+                latitude = ?, longitude = ?, geo_cell = ?,
+                salary_range = ?, salary_min = ?, salary_max = ?, job_type = ?,
+                experience_required = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         """, (job.title, job.description, json.dumps(job.requirements), 
-              job.location, job.salary_range, job.job_type, 
-              job.experience_required, job_id))
+              job.location, *locate(job.location), job.salary_range, *parse_salary_range(job.salary_range),
+              job.job_type, job.experience_required, job_id))
         
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job posting not found")
         
-        cursor.execute("SELECT * FROM job_postings WHERE id = ?", (job_id,))
-        row = cursor.fetchone()
+        index_job_skills(cursor, job_id, job.requirements)
         
-        result = {
-            "id": row["id"],
-            "employer_id": row["employer_id"],
-            "title": row["title"],
-            "description": row["description"],
-            "requirements": json.loads(row["requirements"]),
-            "location": row["location"],
-            "salary_range": row["salary_range"],
-            "job_type": row["job_type"],
-            "experience_required": row["experience_required"],
-            "status": row["status"],
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"]
-        }
-        
-        return add_hateoas_links(result)
+        cursor.execute("SELECT * FROM job_postings WHERE id = ?", (job_id,))
+        return cursor.fetchone()
+    
+    row = await run_write(write)
+    invalidate_job(job_id)
+    invalidate_jobs([job_id])
+    
+    return json_response(map_job(row))
 
 @router.patch("/{job_id}/status")
-async def update_job_status(job_id: int, status: JobStatus):
+async def update_job_status(
+    job_id: int,
+    status: JobStatus,
+    reject_open_applications: bool = Query(True, description="When filling a job, reject its pending and reviewed applications")
+):
     """Update job posting status (open/closed/filled)"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("""
             UPDATE job_postings 
             SET status = ?, updated_at = CURRENT_TIMESTAMP
@@ -195,17 +238,64 @@ async def update_job_status(job_id: int, status: JobStatus):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job posting not found")
         
-        return {"message": f"Job status updated to {status.value}"}
+        if status != JobStatus.FILLED or not reject_open_applications:
+            return []
+        # Same transaction: the job is never filled with applicants still waiting
+        return transition_applications(cursor, ApplicationStatus.REJECTED, job_id=job_id,
+                                       current_statuses=[ApplicationStatus.PENDING, ApplicationStatus.REVIEWED])
+    
+    rejected = await run_write(write)
+    invalidate_jobs([job_id])
+    if rejected:
+        notify_dispatcher()
+    
+    return {"message": f"Job status updated to {status.value}", "rejected_applications": len(rejected)}
 
 @router.delete("/{job_id}", status_code=204)
 async def delete_job(job_id: int):
     """Delete a job posting"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("DELETE FROM job_postings WHERE id = ?", (job_id,))
         
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job posting not found")
+        
+        cursor.execute("DELETE FROM job_skills WHERE job_id = ?", (job_id,))
+        
+        # The job's applications go with it, each recorded as withdrawn
+        cursor.execute("""
+            DELETE FROM applications WHERE job_id = ?
+            RETURNING id, job_id, seeker_id, status, resume_url
+        """, (job_id,))
+        withdrawn = cursor.fetchall()
+        for application in withdrawn:
+            release(cursor, application["resume_url"])
+        record_events(cursor, "application.withdrawn", withdrawn)
+        return withdrawn
+    
+    withdrawn = await run_write(write)
+    invalidate_job(job_id)
+    invalidate_jobs([job_id])
+    if withdrawn:
+        notify_dispatcher()
+
+def _utc_text(value: Union[datetime, date]) -> str:
+    """Format a filter bound like stored timestamps (UTC 'YYYY-MM-DD HH:MM:SS'); a date means its midnight"""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+def _applications_table(cursor, job_id: int) -> str:
+    """Table holding a job's applications: archived postings keep theirs in the archive"""
+    cursor.execute("SELECT id FROM job_postings WHERE id = ?", (job_id,))
+    if cursor.fetchone():
+        return "applications"
+    cursor.execute("SELECT id FROM job_postings_archive WHERE id = ?", (job_id,))
+    if cursor.fetchone():
+        return "applications_archive"
+    raise HTTPException(status_code=404, detail="Job posting not found")
 
 @router.get("/{job_id}/applications")
 async def get_job_applications(job_id: int):
@@ -213,32 +303,154 @@ async def get_job_applications(job_id: int):
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
+        # Verify job exists, falling back to the archive
+        applications_table = _applications_table(cursor, job_id)
+        
+        cursor.execute(f"""
+            SELECT a.*, js.name as seeker_name, js.email as seeker_email
+            FROM {applications_table} a
+            JOIN job_seekers js ON a.seeker_id = js.id
+            WHERE a.job_id = ?
+            ORDER BY a.applied_at DESC, a.id DESC
+        """, (job_id,))
+        
+        rows = cursor.fetchall()
+        
+        return json_response([map_job_application(row) for row in rows])
+
+@router.get("/{job_id}/applications/export")
+async def export_job_applications(
+    job_id: int,
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[ApplicationStatus] = None,
+    applied_after: Optional[Union[datetime, date]] = Query(None, description="ISO date or datetime, UTC unless offset"),
+    applied_before: Optional[Union[datetime, date]] = Query(None, description="ISO date or datetime, UTC unless offset")
+):
+    """Stream a job's applications with applicant details as CSV or NDJSON"""
+    with get_db_connection() as conn:
+        applications_table = _applications_table(conn.cursor(), job_id)
+    
+    query = f"""
+        SELECT a.id, a.job_id, a.seeker_id, js.name AS seeker_name, js.email AS seeker_email,
+               a.cover_letter, a.resume_url, a.status, a.applied_at
+        FROM {applications_table} a
+        JOIN job_seekers js ON a.seeker_id = js.id
+        WHERE a.job_id = ?
+    """
+    params = [job_id]
+    
+    if status:
+        query += " AND a.status = ?"
+        params.append(status.value)
+    
+    if applied_after:
+        query += " AND a.applied_at >= ?"
+        params.append(_utc_text(applied_after))
+    
+    if applied_before:
+        query += " AND a.applied_at < ?"
+        params.append(_utc_text(applied_before))
+    
+    query += " ORDER BY a.applied_at DESC, a.id DESC"
+    
+    return stream_export(query, params, EXPORT_COLUMNS, map_job_application, format,
+                         f"job-{job_id}-applications")
+
+@router.get("/{job_id}/applications/ranked")
+async def get_ranked_job_applications(
+    job_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get applications for a job ranked by TF-IDF relevance to the posting"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
         # Verify job exists
         cursor.execute("SELECT id FROM job_postings WHERE id = ?", (job_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Job posting not found")
         
-        cursor.execute("""
+        application_ids, scores = rank_job_applications(cursor, job_id)
+        page_ids = application_ids[skip:skip + limit].tolist()
+        page_scores = scores[skip:skip + limit].tolist()
+        if not page_ids:
+            return json_response([])
+        
+        placeholders = ",".join("?" * len(page_ids))
+        cursor.execute(f"""
             SELECT a.*, js.name as seeker_name, js.email as seeker_email
             FROM applications a
             JOIN job_seekers js ON a.seeker_id = js.id
-            WHERE a.job_id = ?
-            ORDER BY a.applied_at DESC
-        """, (job_id,))
+            WHERE a.id IN ({placeholders})
+        """, page_ids)
+        rows = {row["id"]: row for row in cursor.fetchall()}
+        
+        ranked = []
+        for app_id, score in zip(page_ids, page_scores):
+            if app_id in rows:
+                application = map_job_application(rows[app_id])
+                application["relevance"] = round(score, 4)
+                ranked.append(application)
+        
+        return json_response(ranked)
+
+@router.get("/{job_id}/candidates")
+async def get_job_candidates(
+    job_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Rank job seekers for a job by skill overlap and experience fit"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT experience_required FROM job_postings WHERE id = ?", (job_id,))
+        job = cursor.fetchone()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job posting not found")
+        
+        cursor.execute("SELECT COUNT(*) FROM job_skills WHERE job_id = ?", (job_id,))
+        required_count = cursor.fetchone()[0]
+        if required_count == 0:
+            return json_response([])
+        
+        # Only seekers sharing at least one skill are reached through the index
+        cursor.execute("""
+            SELECT s.*, m.matched_skills,
+                   m.matched * 1.0 / ? * ?
+                   + CASE WHEN s.experience_years < ?
+                          THEN (s.experience_years + 1.0) / (? + 1.0)
+                          ELSE 1.0 END * ? AS score
+            FROM (
+                SELECT ss.seeker_id, COUNT(*) AS matched,
+                       GROUP_CONCAT(sk.name, ?) AS matched_skills
+                FROM job_skills jk
+                JOIN seeker_skills ss ON ss.skill_id = jk.skill_id
+                JOIN skills sk ON sk.id = jk.skill_id
+                WHERE jk.job_id = ?
+                GROUP BY ss.seeker_id
+            ) m
+            JOIN job_seekers s ON s.id = m.seeker_id
+            ORDER BY score DESC, s.id
+            LIMIT ? OFFSET ?
+        """, (required_count, SKILL_OVERLAP_WEIGHT, job["experience_required"],
+              job["experience_required"], EXPERIENCE_FIT_WEIGHT, "\n", job_id, limit, skip))
         
         rows = cursor.fetchall()
         
-        return [
-            {
-                "id": row["id"],
-                "job_id": row["job_id"],
-                "seeker_id": row["seeker_id"],
-                "seeker_name": row["seeker_name"],
-                "seeker_email": row["seeker_email"],
-                "cover_letter": row["cover_letter"],
-                "resume_url": row["resume_url"],
-                "status": row["status"],
-                "applied_at": row["applied_at"]
+        candidates = []
+        for row in rows:
+            candidate = map_seeker(row)
+            candidate["match"] = {
+                "score": round(row["score"], 4),
+                "matched_skills": row["matched_skills"].split("\n"),
+                "required_skills": required_count
             }
-            for row in rows
-        ]
+            candidate["links"] = {
+                "self": f"{BASE_URL}/api/seekers/{row['id']}",
+                "job": f"{BASE_URL}/api/jobs/{job_id}"
+            }
+            candidates.append(candidate)
+        
+        return json_response(candidates)
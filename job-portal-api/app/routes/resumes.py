@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from blobstore import blob_url, is_digest
+from database import get_db_connection, DATABASE_BACKEND, OperationalError
+
+router = APIRouter(prefix="/api/resumes", tags=["Resumes"])
+
+# Best match first; rank is negated bm25 on SQLite FTS5 and ts_rank on Postgres
+if DATABASE_BACKEND == "postgres":
+    SEARCH_SQL = """
+        SELECT digest, ts_headline('english', text, query,
+                                   'StartSel=[, StopSel=], MaxWords=12, MinWords=4') AS snippet,
+               -ts_rank(search, query) AS rank
+        FROM resume_texts, websearch_to_tsquery('english', ?) AS query
+        WHERE search @@ query
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    """
+else:
+    SEARCH_SQL = """
+        SELECT rt.digest, snippet(resume_search, 0, '[', ']', '...', 12) AS snippet,
+               bm25(resume_search) AS rank
+        FROM resume_search
+        JOIN resume_texts rt ON rt.rowid = resume_search.rowid
+        WHERE resume_search MATCH ?
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    """
+
+@router.get("/search")
+async def search_resumes(
+    q: str = Query(..., min_length=1, description="Full-text query over extracted resume text"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search extracted resume text, best match first"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SEARCH_SQL, (q, limit, skip))
+        except OperationalError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+        
+        results = []
+        for row in cursor.fetchall():
+            resume_url = blob_url(row["digest"])
+            cursor.execute("SELECT id FROM job_seekers WHERE resume_url = ?", (resume_url,))
+            seeker_ids = [seeker["id"] for seeker in cursor.fetchall()]
+            cursor.execute("SELECT id FROM applications WHERE resume_url = ?", (resume_url,))
+            application_ids = [application["id"] for application in cursor.fetchall()]
+            
+            results.append({
+                "digest": row["digest"],
+                "snippet": row["snippet"],
+                "score": round(-row["rank"], 4),
+                "resume_url": resume_url,
+                "seeker_ids": seeker_ids,
+                "application_ids": application_ids
+            })
+        
+        return results
+
+@router.get("/{digest}")
+async def get_resume_status(digest: str):
+    """Get the text extraction status of an uploaded resume"""
+    if not is_digest(digest):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT rj.*, length(rt.text) AS text_length
+            FROM resume_jobs rj
+            LEFT JOIN resume_texts rt ON rt.digest = rj.digest
+            WHERE rj.digest = ?
+        """, (digest,))
+        row = cursor.fetchone()
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        
+        return {
+            "digest": row["digest"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "last_error": row["last_error"],
+            "text_length": row["text_length"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "links": {
+                "self": f"http://localhost:8000/api/resumes/{digest}",
+                "file": f"http://localhost:8000{blob_url(digest)}"
+            }
+        }
@@ -1,46 +1,60 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
 from typing import List
 import json
 from models import JobSeeker, JobSeekerCreate
 from database import get_db_connection
-import os
-import shutil
+from writer import run_write
+from skills import index_seeker_skills, bulk_index_seeker_skills, SKILL_OVERLAP_WEIGHT, EXPERIENCE_FIT_WEIGHT
+from bulk import import_ndjson, allocate_ids, reject_duplicate_emails
+from ranking import invalidate_job
+from blobstore import store_pdf_upload, replace_reference, release
+from resume_worker import enqueue_extraction, notify_worker
+from mappers import map_seeker, map_job, json_response
+from outbox import record_events, notify_dispatcher
 
 router = APIRouter(prefix="/api/seekers", tags=["Job Seekers"])
 
-UPLOAD_DIR = "/app/storage/resumes"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 @router.post("/", response_model=JobSeeker, status_code=201)
 async def create_job_seeker(seeker: JobSeekerCreate):
     """Create a new job seeker profile"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute("""
-                INSERT INTO job_seekers (name, email, phone, skills, experience_years)
-                VALUES (?, ?, ?, ?, ?)
-            """, (seeker.name, seeker.email, seeker.phone, 
-                  json.dumps(seeker.skills), seeker.experience_years))
-            
-            seeker_id = cursor.lastrowid
-            
-            # Fetch the created seeker
-            cursor.execute("SELECT * FROM job_seekers WHERE id = ?", (seeker_id,))
-            row = cursor.fetchone()
-            
-            return {
-                "id": row["id"],
-                "name": row["name"],
-                "email": row["email"],
-                "phone": row["phone"],
-                "skills": json.loads(row["skills"]),
-                "experience_years": row["experience_years"],
-                "resume_url": row["resume_url"],
-                "created_at": row["created_at"]
-            }
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
+    def write(cursor):
+        cursor.execute("""
+            INSERT INTO job_seekers (name, email, phone, skills, experience_years)
+            VALUES (?, ?, ?, ?, ?)
+            RETURNING *
+        """, (seeker.name, seeker.email, seeker.phone, 
+              json.dumps(seeker.skills), seeker.experience_years))
+        row = cursor.fetchone()
+        
+        index_seeker_skills(cursor, row["id"], seeker.skills)
+        return row
+    
+    try:
+        row = await run_write(write)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return json_response(map_seeker(row), status_code=201)
+
+def _insert_seeker_batch(cursor, batch):
+    """Insert validated job seekers in one transaction, rejecting duplicate emails"""
+    rejected, accepted = reject_duplicate_emails(cursor, "job_seekers", batch)
+    ids = allocate_ids(cursor, "job_seekers", len(accepted))
+    
+    cursor.executemany("""
+        INSERT INTO job_seekers (id, name, email, phone, skills, experience_years)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(seeker_id, seeker.name, seeker.email, seeker.phone,
+           json.dumps(seeker.skills), seeker.experience_years)
+          for seeker_id, seeker in zip(ids, accepted)])
+    bulk_index_seeker_skills(cursor, [(seeker_id, seeker.skills) for seeker_id, seeker in zip(ids, accepted)])
+    
+    return rejected
+
+@router.post("/bulk")
+async def bulk_import_seekers(request: Request):
+    """Bulk import job seekers from an NDJSON body (one JobSeekerCreate per line)"""
+    return await import_ndjson(request, JobSeekerCreate, _insert_seeker_batch)
 
 @router.get("/", response_model=List[JobSeeker])
 async def get_all_seekers():
@@ -50,19 +64,7 @@ async def get_all_seekers():
         cursor.execute("SELECT * FROM job_seekers ORDER BY created_at DESC")
         rows = cursor.fetchall()
         
-        return [
-            {
-                "id": row["id"],
-                "name": row["name"],
-                "email": row["email"],
-                "phone": row["phone"],
-                "skills": json.loads(row["skills"]),
-                "experience_years": row["experience_years"],
-                "resume_url": row["resume_url"],
-                "created_at": row["created_at"]
-            }
-            for row in rows
-        ]
+        return json_response([map_seeker(row) for row in rows])
 
 @router.get("/{seeker_id}", response_model=JobSeeker)
 async def get_seeker(seeker_id: int):
@@ -75,22 +77,12 @@ async def get_seeker(seeker_id: int):
         if not row:
             raise HTTPException(status_code=404, detail="Job seeker not found")
         
-        return {
-            "id": row["id"],
-            "name": row["name"],
-            "email": row["email"],
-            "phone": row["phone"],
-            "skills": json.loads(row["skills"]),
-            "experience_years": row["experience_years"],
-            "resume_url": row["resume_url"],
-            "created_at": row["created_at"]
-        }
+        return json_response(map_seeker(row))
 
 @router.put("/{seeker_id}", response_model=JobSeeker)
 async def update_seeker(seeker_id: int, seeker: JobSeekerCreate):
     """Update a job seeker profile"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("""
             UPDATE job_seekers 
             SET name = ?, email = ?, phone = ?, skills = ?, experience_years = ?
@@ -101,57 +93,140 @@ async def update_seeker(seeker_id: int, seeker: JobSeekerCreate):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job seeker not found")
         
-        cursor.execute("SELECT * FROM job_seekers WHERE id = ?", (seeker_id,))
-        row = cursor.fetchone()
+        index_seeker_skills(cursor, seeker_id, seeker.skills)
+        
+        cursor.execute("SELECT job_id FROM applications WHERE seeker_id = ?", (seeker_id,))
+        applied = [row["job_id"] for row in cursor.fetchall()]
         
-        return {
-            "id": row["id"],
-            "name": row["name"],
-            "email": row["email"],
-            "phone": row["phone"],
-            "skills": json.loads(row["skills"]),
-            "experience_years": row["experience_years"],
-            "resume_url": row["resume_url"],
-            "created_at": row["created_at"]
-        }
+        cursor.execute("SELECT * FROM job_seekers WHERE id = ?", (seeker_id,))
+        return cursor.fetchone(), applied
+    
+    row, applied = await run_write(write)
+    
+    # Skills feed the applicant rankings of every job this seeker applied to
+    for job_id in applied:
+        invalidate_job(job_id)
+    
+    return json_response(map_seeker(row))
 
 @router.delete("/{seeker_id}", status_code=204)
 async def delete_seeker(seeker_id: int):
     """Delete a job seeker profile"""
+    def write(cursor):
+        cursor.execute("DELETE FROM job_seekers WHERE id = ? RETURNING resume_url", (seeker_id,))
+        row = cursor.fetchone()
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Job seeker not found")
+        
+        release(cursor, row["resume_url"])
+        cursor.execute("DELETE FROM seeker_skills WHERE seeker_id = ?", (seeker_id,))
+        
+        # The seeker's applications go with it, each recorded as withdrawn
+        cursor.execute("""
+            DELETE FROM applications WHERE seeker_id = ?
+            RETURNING id, job_id, seeker_id, status, resume_url
+        """, (seeker_id,))
+        withdrawn = cursor.fetchall()
+        for application in withdrawn:
+            release(cursor, application["resume_url"])
+        record_events(cursor, "application.withdrawn", withdrawn)
+        return withdrawn
+    
+    withdrawn = await run_write(write)
+    for application in withdrawn:
+        invalidate_job(application["job_id"])
+    if withdrawn:
+        notify_dispatcher()
+
+@router.get("/{seeker_id}/matches")
+async def get_seeker_matches(
+    seeker_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Rank open job postings for a seeker by skill overlap and experience fit"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM job_seekers WHERE id = ?", (seeker_id,))
         
-        if cursor.rowcount == 0:
+        cursor.execute("SELECT experience_years FROM job_seekers WHERE id = ?", (seeker_id,))
+        seeker = cursor.fetchone()
+        if not seeker:
             raise HTTPException(status_code=404, detail="Job seeker not found")
+        
+        # Only jobs sharing at least one skill are reached through the index
+        cursor.execute("""
+            SELECT j.*, m.matched_skills, m.required_count,
+                   m.matched * 1.0 / m.required_count * ?
+                   + CASE WHEN ? < j.experience_required
+                          THEN (? + 1.0) / (j.experience_required + 1.0)
+                          ELSE 1.0 END * ? AS score
+            FROM (
+                SELECT jk.job_id, COUNT(*) AS matched,
+                       GROUP_CONCAT(sk.name, ?) AS matched_skills,
+                       (SELECT COUNT(*) FROM job_skills r WHERE r.job_id = jk.job_id) AS required_count
+                FROM seeker_skills ss
+                JOIN job_skills jk ON jk.skill_id = ss.skill_id
+                JOIN skills sk ON sk.id = ss.skill_id
+                WHERE ss.seeker_id = ?
+                GROUP BY jk.job_id
+            ) m
+            JOIN job_postings j ON j.id = m.job_id
+            WHERE j.status = 'open'
+            ORDER BY score DESC, j.id
+            LIMIT ? OFFSET ?
+        """, (SKILL_OVERLAP_WEIGHT, seeker["experience_years"], seeker["experience_years"],
+              EXPERIENCE_FIT_WEIGHT, "\n", seeker_id, limit, skip))
+        
+        rows = cursor.fetchall()
+        
+        jobs = []
+        for row in rows:
+            job = map_job(row)
+            job["match"] = {
+                "score": round(row["score"], 4),
+                "matched_skills": row["matched_skills"].split("\n"),
+                "required_skills": row["required_count"]
+            }
+            jobs.append(job)
+        
+        return json_response(jobs)
 
 @router.post("/{seeker_id}/upload-resume")
 async def upload_resume(seeker_id: int, file: UploadFile = File(...)):
     """Upload resume for a job seeker"""
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    
     # Check if seeker exists
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT id FROM job_seekers WHERE id = ?", (seeker_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Job seeker not found")
+    
+    # Stream file into the content-addressed blob store
+    blob = await store_pdf_upload(file)
+    resume_url = blob["url"]
+    
+    # Update database, moving the reference from the previous resume
+    def write(cursor):
+        cursor.execute("SELECT resume_url FROM job_seekers WHERE id = ?", (seeker_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Job seeker not found")
         
-        # Save file
-        filename = f"seeker_{seeker_id}_{file.filename}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Update database
-        resume_url = f"/storage/resumes/{filename}"
+        replace_reference(cursor, row["resume_url"], blob)
         cursor.execute("UPDATE job_seekers SET resume_url = ? WHERE id = ?", 
                       (resume_url, seeker_id))
-        
-        return {
-            "message": "Resume uploaded successfully",
-            "resume_url": resume_url,
-            "access_url": f"http://localhost:8000{resume_url}"
-        }
+        enqueue_extraction(cursor, blob["sha256"])
+    
+    await run_write(write)
+    
+    notify_worker()
+    
+    return {
+        "message": "Resume uploaded successfully",
+        "resume_url": resume_url,
+        "access_url": f"http://localhost:8000{resume_url}",
+        "size": blob["size"],
+        "sha256": blob["sha256"],
+        "extraction_status": f"http://localhost:8000/api/resumes/{blob['sha256']}"
+    }
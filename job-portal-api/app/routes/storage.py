@@ -0,0 +1,104 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+import os
+import re
+
+from blobstore import blob_path, is_digest
+
+router = APIRouter(prefix="/storage/blobs", tags=["File Storage"])
+
+SEND_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+class BlobResponse(Response):
+    """Serve a byte range of a blob, zero-copy when the server supports it"""
+
+    def __init__(self, path: str, start: int, length: int, status_code: int, headers: dict):
+        super().__init__(status_code=status_code, headers=headers, media_type="application/pdf")
+        self.path = path
+        self.start = start
+        self.length = length
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code,
+                    "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        file = await run_in_threadpool(open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                # The server hands the descriptor to sendfile(2)
+                await send({"type": "http.response.zerocopysend", "file": file,
+                            "offset": self.start, "count": self.length})
+                return
+
+            await run_in_threadpool(file.seek, self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await run_in_threadpool(file.read, min(SEND_CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk,
+                            "more_body": remaining > 0 and bool(chunk)})
+                if not chunk:
+                    break
+        finally:
+            await run_in_threadpool(file.close)
+
+def _parse_range(header: str, size: int):
+    """Return (start, end) for a single byte range, None to serve it all, or raise 416"""
+    match = _RANGE_RE.fullmatch(header.strip())
+    if not match:
+        # Multiple or malformed ranges: ignore and send the whole blob
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+@router.get("/{digest}.pdf")
+@router.head("/{digest}.pdf", include_in_schema=False)
+async def get_blob(digest: str, request: Request):
+    """Download a stored resume by content hash (supports Range and ETag revalidation)"""
+    path = blob_path(digest) if is_digest(digest) else None
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Content never changes for a digest, so the hash is a strong ETag
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range is None:
+        return BlobResponse(path, 0, size, 200, {**headers, "Content-Length": str(size)})
+
+    start, end = byte_range
+    length = end - start + 1
+    return BlobResponse(path, start, length, 206, {
+        **headers,
+        "Content-Length": str(length),
+        "Content-Range": f"bytes {start}-{end}/{size}",
+    })
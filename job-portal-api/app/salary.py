@@ -0,0 +1,67 @@
+import re
+from typing import Optional, Tuple
+
+# Multipliers turning hourly/weekly/monthly pay into an annual figure
+PERIOD_MULTIPLIERS = (
+    (re.compile(r"/\s*h(ou)?r|per\s+hour|hourly", re.I), 2080),
+    (re.compile(r"/\s*w(ee)?k|per\s+week|weekly", re.I), 52),
+    (re.compile(r"/\s*mo(nth)?|per\s+month|monthly", re.I), 12),
+)
+
+# Highest annual pay a posting reaches: salary_max, or unbounded for an open-ended
+# range ("80k+"); NULL without figures. The min_salary filter and its index use it.
+SALARY_REACH_SQL = "COALESCE(salary_max, CASE WHEN salary_min IS NOT NULL THEN 2147483647 END)"
+
+# A number with an optional currency mark before it, a k/m suffix and an open-ended "+"
+_AMOUNT_RE = re.compile(r"([$£€])?\s*(\d[\d,]*(?:\.\d+)?)\s*([km])?\b(\s*\+)?", re.I)
+# What may separate the two ends of a range
+_RANGE_SEPARATOR_RE = re.compile(r"\s*(?:-|–|—|to)\s*", re.I)
+# Numbers neither marked as currency nor abbreviated ("2 positions") only count
+# as pay if they come to at least this much a year
+MIN_ANNUAL_PAY = 5000
+
+def parse_salary_range(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parse free-text pay like '$90,000 - $120,000', '$120-150k' or '$45/hr' into annual (min, max)
+
+    A single amount is both the minimum and the maximum; an open-ended one
+    ('80k+') has no maximum. Text without an amount, such as 'Competitive',
+    gives (None, None).
+    """
+    matches = list(_AMOUNT_RE.finditer(text))
+    amounts = []
+    for i, match in enumerate(matches):
+        currency, number, suffix, plus = match.groups()
+        value = float(number.replace(",", ""))
+        if not suffix and i + 1 < len(matches):
+            # '$120-150k': the upper end's suffix applies to the bare lower end
+            following = matches[i + 1]
+            _, next_number, next_suffix, _ = following.groups()
+            if (next_suffix and _RANGE_SEPARATOR_RE.fullmatch(text[match.end():following.start()])
+                    and value <= float(next_number.replace(",", ""))):
+                suffix = next_suffix
+        if suffix:
+            value *= 1000 if suffix.lower() == "k" else 1_000_000
+        amounts.append((value, bool(currency or suffix), bool(plus)))
+
+    for pattern, multiplier in PERIOD_MULTIPLIERS:
+        if pattern.search(text):
+            amounts = [(value * multiplier, marked, plus) for value, marked, plus in amounts]
+            break
+    amounts = [(value, plus) for value, marked, plus in amounts if marked or value >= MIN_ANNUAL_PAY][:2]
+    if not amounts:
+        return None, None
+
+    values = [value for value, _ in amounts]
+    open_ended = amounts[-1][1]
+    return int(min(values)), None if open_ended else int(max(values))
+
+def backfill_salary_ranges(cursor) -> None:
+    """Parse salary ranges of postings without numeric columns, and re-parse those an older parser got wrong"""
+    cursor.execute("SELECT DISTINCT salary_range, salary_min, salary_max FROM job_postings")
+    updates = []
+    for salary_range, salary_min, salary_max in cursor.fetchall():
+        parsed = parse_salary_range(salary_range)
+        if parsed != (salary_min, salary_max):
+            updates.append((*parsed, salary_range))
+    if updates:
+        cursor.executemany("UPDATE job_postings SET salary_min = ?, salary_max = ? WHERE salary_range = ?", updates)
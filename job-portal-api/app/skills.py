@@ -0,0 +1,72 @@
+import json
+
+# Weights used to rank job/seeker matches
+SKILL_OVERLAP_WEIGHT = 0.7
+EXPERIENCE_FIT_WEIGHT = 0.3
+
+def normalize_skill(skill: str) -> str:
+    """Normalize a skill name so 'Python ' and 'python' index the same"""
+    return " ".join(skill.split()).lower()
+
+def _skill_ids(cursor, skills) -> list:
+    """Resolve skill names to ids, creating missing skills"""
+    names = sorted({normalize_skill(s) for s in skills if s and s.strip()})
+    if not names:
+        return []
+    cursor.executemany("INSERT INTO skills (name) VALUES (?) ON CONFLICT DO NOTHING",
+                       [(name,) for name in names])
+    placeholders = ",".join("?" * len(names))
+    cursor.execute(f"SELECT id FROM skills WHERE name IN ({placeholders})", names)
+    return [row[0] for row in cursor.fetchall()]
+
+def _bulk_index(cursor, table: str, owner_column: str, entries) -> None:
+    """Index many freshly inserted owners at once; entries are (owner_id, skills)"""
+    entries = [(owner_id, {normalize_skill(s) for s in skills if s and s.strip()})
+               for owner_id, skills in entries]
+    names = sorted(set().union(*(names for _, names in entries)))
+    if not names:
+        return
+    cursor.executemany("INSERT INTO skills (name) VALUES (?) ON CONFLICT DO NOTHING",
+                       [(name,) for name in names])
+    cursor.execute("SELECT name, id FROM skills")
+    skill_ids = dict(cursor.fetchall())
+    cursor.executemany(
+        f"INSERT INTO {table} (skill_id, {owner_column}) VALUES (?, ?) ON CONFLICT DO NOTHING",
+        [(skill_ids[name], owner_id) for owner_id, names in entries for name in names]
+    )
+
+def bulk_index_job_skills(cursor, entries) -> None:
+    """Index (job_id, requirements) pairs of newly imported job postings"""
+    _bulk_index(cursor, "job_skills", "job_id", entries)
+
+def bulk_index_seeker_skills(cursor, entries) -> None:
+    """Index (seeker_id, skills) pairs of newly imported job seekers"""
+    _bulk_index(cursor, "seeker_skills", "seeker_id", entries)
+
+def index_job_skills(cursor, job_id: int, requirements) -> None:
+    """Replace the skill index entries of a job posting"""
+    cursor.execute("DELETE FROM job_skills WHERE job_id = ?", (job_id,))
+    cursor.executemany("INSERT INTO job_skills (skill_id, job_id) VALUES (?, ?)",
+                       [(skill_id, job_id) for skill_id in _skill_ids(cursor, requirements)])
+
+def index_seeker_skills(cursor, seeker_id: int, skills) -> None:
+    """Replace the skill index entries of a job seeker"""
+    cursor.execute("DELETE FROM seeker_skills WHERE seeker_id = ?", (seeker_id,))
+    cursor.executemany("INSERT INTO seeker_skills (skill_id, seeker_id) VALUES (?, ?)",
+                       [(skill_id, seeker_id) for skill_id in _skill_ids(cursor, skills)])
+
+def backfill_skill_index(cursor) -> None:
+    """Index job postings and seekers created before the skill tables existed"""
+    cursor.execute("""
+        SELECT id, requirements FROM job_postings
+        WHERE id NOT IN (SELECT job_id FROM job_skills)
+    """)
+    for job_id, requirements in cursor.fetchall():
+        index_job_skills(cursor, job_id, json.loads(requirements))
+
+    cursor.execute("""
+        SELECT id, skills FROM job_seekers
+        WHERE id NOT IN (SELECT seeker_id FROM seeker_skills)
+    """)
+    for seeker_id, skills in cursor.fetchall():
+        index_seeker_skills(cursor, seeker_id, json.loads(skills))
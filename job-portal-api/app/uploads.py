@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+# Upload limits (override with environment variables)
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", 10 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+# Room for multipart boundaries, part headers and a filename around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+MAX_UPLOAD_REQUEST_BYTES = MAX_RESUME_BYTES + MULTIPART_OVERHEAD_BYTES
+
+PDF_MAGIC = b"%PDF-"
+
+def _discard(tmp_file, tmp_path: str) -> None:
+    tmp_file.close()
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+def _finish(tmp_file) -> None:
+    tmp_file.flush()
+    os.fsync(tmp_file.fileno())
+    tmp_file.close()
+
+async def stream_pdf_upload(file: UploadFile, directory: str) -> dict:
+    """Stream a PDF upload to a temp file in chunks without blocking the event loop
+
+    The size cap is enforced while streaming, the first bytes must carry the
+    PDF signature and a SHA-256 digest is computed on the fly. The caller
+    renames the returned temp file into place once it knows the final name.
+    """
+    if not file.filename or not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if file.size is not None and file.size > MAX_RESUME_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_RESUME_BYTES} bytes")
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = await run_in_threadpool(
+        tempfile.mkstemp, dir=directory, prefix=".upload-", suffix=".part"
+    )
+    tmp_file = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0 and not chunk.startswith(PDF_MAGIC):
+                raise HTTPException(status_code=400, detail="File is not a valid PDF")
+            size += len(chunk)
+            if size > MAX_RESUME_BYTES:
+                raise HTTPException(status_code=413, detail=f"File exceeds {MAX_RESUME_BYTES} bytes")
+            digest.update(chunk)
+            await run_in_threadpool(tmp_file.write, chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+        await run_in_threadpool(_finish, tmp_file)
+    except BaseException:
+        await run_in_threadpool(_discard, tmp_file, tmp_path)
+        raise
+
+    return {"tmp_path": tmp_path, "sha256": digest.hexdigest(), "size": size}
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds {MAX_RESUME_BYTES} bytes")
+
+class UploadLimitMiddleware:
+    """Caps request bodies of the upload routes before the multipart parser sees them
+
+    Starlette spools a whole multipart body to a temp file before the route
+    runs, so limits checked in the route come too late to bound network and
+    disk use. A declared Content-Length over the cap is refused without
+    reading the body; otherwise bytes are counted as they arrive and the
+    request fails with 413 once the cap is passed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith("/upload-resume"):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if not value.isdigit() or int(value) > MAX_UPLOAD_REQUEST_BYTES:
+                    error = _too_large()
+                    response = JSONResponse({"detail": error.detail}, status_code=error.status_code,
+                                            headers={"Connection": "close"})
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_UPLOAD_REQUEST_BYTES:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
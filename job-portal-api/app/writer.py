@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from starlette.concurrency import run_in_threadpool
+
+from database import DATABASE_PATH, DATABASE_BACKEND, TracedConnection, run_transaction
+
+# Most write operations applied in one group commit
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", 128))
+# Seconds the writer waits on a lock held by another worker process
+WRITE_BUSY_TIMEOUT_SECONDS = float(os.getenv("WRITE_BUSY_TIMEOUT_SECONDS", 30))
+
+class GroupCommitWriter:
+    """Single writer thread that applies queued write operations in group commits
+
+    Each operation is a callable taking a cursor. Operations queued while the
+    previous commit was in flight are applied together in one transaction, each
+    inside its own savepoint so a failing operation only rolls back itself.
+    Results and exceptions are delivered once the shared commit has succeeded.
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.operations = 0
+
+    def submit(self, operation) -> Future:
+        """Queue a write operation; the future resolves after it is committed"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+        future = Future()
+        # Run in the submitter's context so its SQL is traced against its request
+        context = contextvars.copy_context()
+        self._queue.put((lambda cursor: context.run(operation, cursor), future))
+        return future
+
+    def stop(self) -> None:
+        """Apply everything already queued, then stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database_path, timeout=WRITE_BUSY_TIMEOUT_SECONDS,
+                               isolation_level=None, check_same_thread=False,
+                               factory=TracedConnection)
+        conn.row_factory = sqlite3.Row
+        # WAL commits are durable at checkpoint; readers never block the writer
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                stopping = False
+                while len(batch) < WRITE_BATCH_MAX:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._apply(conn, batch)
+                if stopping:
+                    return
+        finally:
+            conn.close()
+
+    def _apply(self, conn, batch):
+        outcomes = []
+        try:
+            # Take the write lock up front so other worker processes queue on busy_timeout
+            conn.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT operation")
+                cursor = conn.cursor()
+                try:
+                    result = operation(cursor)
+                except BaseException as e:
+                    cursor.close()
+                    conn.execute("ROLLBACK TO operation")
+                    conn.execute("RELEASE operation")
+                    outcomes.append((future, None, e))
+                else:
+                    cursor.close()
+                    conn.execute("RELEASE operation")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for operation, future in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        self.commits += 1
+        self.operations += len(outcomes)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+writer = GroupCommitWriter(DATABASE_PATH)
+
+async def run_write(operation):
+    """Run ``operation(cursor)`` on the writer and await its committed result"""
+    if DATABASE_BACKEND == "postgres":
+        # Postgres arbitrates concurrent writers itself: one pooled transaction each
+        return await run_in_threadpool(run_transaction, operation)
+    return await asyncio.wrap_future(writer.submit(operation))
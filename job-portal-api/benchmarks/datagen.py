@@ -0,0 +1,163 @@
+"""
+Generate a reproducible synthetic job-portal dataset at a configurable scale.
+
+Writes straight through the app's database layer, so it fills whichever
+backend DATABASE_PATH / DATABASE_URL select. The same --seed always yields
+the same rows.
+
+Usage (from job-portal-api/):
+    DATABASE_PATH=/tmp/bench.db python benchmarks/datagen.py --scale large
+    DATABASE_PATH=/tmp/bench.db python benchmarks/datagen.py --applications 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+SCALES = {
+    "small": {"employers": 50, "seekers": 2_000, "jobs": 1_000, "applications": 10_000},
+    "medium": {"employers": 500, "seekers": 20_000, "jobs": 10_000, "applications": 100_000},
+    "large": {"employers": 2_500, "seekers": 200_000, "jobs": 50_000, "applications": 1_000_000},
+}
+
+SKILLS = [
+    "python", "java", "javascript", "typescript", "go", "rust", "c++", "c#", "sql", "postgresql",
+    "mysql", "mongodb", "redis", "kafka", "docker", "kubernetes", "terraform", "aws", "gcp", "azure",
+    "linux", "bash", "git", "react", "vue", "angular", "node.js", "django", "fastapi", "flask",
+    "spring", "graphql", "rest", "grpc", "machine learning", "pytorch", "tensorflow", "pandas",
+    "numpy", "spark", "airflow", "dbt", "tableau", "excel", "figma", "scrum", "jira", "ci/cd",
+    "ansible", "prometheus", "grafana", "elasticsearch", "nginx", "rabbitmq", "security", "networking",
+    "swift", "kotlin", "android", "ios",
+]
+LOCATIONS = [
+    "Denver, CO", "Austin, TX", "Seattle, WA", "San Francisco, CA", "New York, NY", "Boston, MA",
+    "Chicago, IL", "Atlanta, GA", "Remote", "Portland, OR", "Miami, FL", "Los Angeles, CA",
+    "Boulder, CO", "Aurora, CO", "Round Rock, TX", "Bellevue, WA", "Oakland, CA", "Jersey City, NJ",
+]
+JOB_TYPES = ["full-time", "part-time", "contract", "internship"]
+TITLES = ["Backend Engineer", "Frontend Developer", "Data Engineer", "DevOps Engineer",
+          "ML Engineer", "Mobile Developer", "QA Engineer", "Product Designer", "Data Analyst"]
+WORDS = ("build operate scale design deliver maintain team product customer platform service "
+         "reliable fast secure cloud data pipeline api experience collaborate ship quality").split()
+APPLICATION_STATUSES = ["pending"] * 7 + ["reviewed", "accepted", "rejected"]
+JOB_STATUSES = ["open"] * 18 + ["closed", "filled"]
+
+BATCH_SIZE = 10_000
+
+def _timestamp(rng: random.Random, now: float) -> str:
+    """A timestamp within the past year, formatted like CURRENT_TIMESTAMP"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - rng.uniform(0, 365 * 86400)))
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+def _insert(cursor, sql: str, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+def generate(scale: dict, seed: int = 1) -> dict:
+    """Fill an empty database with the given number of rows per table"""
+    from database import get_db_connection, DATABASE_BACKEND
+    from skills import bulk_index_job_skills, bulk_index_seeker_skills
+    from geo import locate
+
+    employers, seekers, jobs, applications = (
+        scale["employers"], scale["seekers"], scale["jobs"], scale["applications"])
+    if applications > jobs * seekers:
+        raise ValueError("More applications than distinct (job, seeker) pairs")
+
+    rng = random.Random(seed)
+    now = time.time()
+    started = time.perf_counter()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM job_postings")
+        if cursor.fetchone()[0]:
+            raise RuntimeError("Database already has job postings; generate into an empty one")
+
+        _insert(cursor, """
+            INSERT INTO employers (id, company_name, email, phone, description, website, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, ((i, f"Company {i}", f"hr{i}@company{i}.example", "555-0100", _text(rng, 20),
+               f"https://company{i}.example", _timestamp(rng, now)) for i in range(1, employers + 1)))
+
+        seeker_skills = []
+        def seeker_rows():
+            for i in range(1, seekers + 1):
+                skills = rng.sample(SKILLS, rng.randint(2, 8))
+                seeker_skills.append((i, skills))
+                yield (i, f"Seeker {i}", f"seeker{i}@example.com", "555-0200", json.dumps(skills),
+                       rng.randint(0, 15), _timestamp(rng, now))
+        _insert(cursor, """
+            INSERT INTO job_seekers (id, name, email, phone, skills, experience_years, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, seeker_rows())
+        bulk_index_seeker_skills(cursor, seeker_skills)
+
+        job_skills = []
+        def job_rows():
+            for i in range(1, jobs + 1):
+                requirements = rng.sample(SKILLS, rng.randint(3, 6))
+                job_skills.append((i, requirements))
+                low = rng.randrange(40, 160, 5) * 1000
+                high = low + rng.randrange(10, 60, 5) * 1000
+                created_at = _timestamp(rng, now)
+                location = rng.choice(LOCATIONS)
+                yield (i, rng.randint(1, employers), rng.choice(TITLES), _text(rng, 40),
+                       json.dumps(requirements), location, *locate(location), f"${low:,} - ${high:,}",
+                       low, high, rng.choice(JOB_TYPES), rng.randint(0, 10), rng.choice(JOB_STATUSES),
+                       created_at, created_at)
+        _insert(cursor, """
+            INSERT INTO job_postings (id, employer_id, title, description, requirements, location,
+                                      latitude, longitude, geo_cell, salary_range, salary_min,
+                                      salary_max, job_type, experience_required, status,
+                                      created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, job_rows())
+        bulk_index_job_skills(cursor, job_skills)
+
+        # Application k pairs job k % J with a seeker unique for that job
+        _insert(cursor, """
+            INSERT INTO applications (id, job_id, seeker_id, cover_letter, status, applied_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, ((k + 1, k % jobs + 1, (k // jobs + (k % jobs) * 7919) % seekers + 1, _text(rng, 30),
+               rng.choice(APPLICATION_STATUSES), _timestamp(rng, now)) for k in range(applications)))
+
+        if DATABASE_BACKEND == "postgres":
+            # Explicit ids do not advance serial sequences
+            for table in ("employers", "job_seekers", "job_postings", "applications"):
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence(?, 'id'), MAX(id)) FROM {table}",
+                               (table,))
+
+    return {**scale, "seed": seed, "seconds": round(time.perf_counter() - started, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for table in ("employers", "seekers", "jobs", "applications"):
+        parser.add_argument(f"--{table}", type=int, help=f"override the number of {table}")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for table in scale:
+        if getattr(args, table) is not None:
+            scale[table] = getattr(args, table)
+
+    sys.path.insert(0, APP_DIR)
+    from database import init_db
+    init_db()
+    print(json.dumps(generate(scale, args.seed)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark list endpoint throughput: shared row mappers + orjson vs the
+previous per-route dict building + response_model validation.
+
+Usage (from job-portal-api/):
+    python benchmarks/list_endpoints.py --jobs 2000 --applications 5000 --requests 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+def seed(db_path: str, n_jobs: int, n_applications: int) -> None:
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        INSERT INTO employers (company_name, email, phone, description, website)
+        VALUES ('Bench Corp', 'bench@example.com', '555-0100', 'Benchmark employer', NULL)
+    """)
+    conn.executemany("""
+        INSERT INTO job_postings (employer_id, title, description, requirements, location,
+                                  salary_range, job_type, experience_required)
+        VALUES (1, ?, ?, ?, 'Denver, CO', '$90,000 - $120,000', 'full-time', 3)
+    """, [(f"Engineer {i}", "Build and operate APIs " * 10, json.dumps(["python", "sql", "docker"]))
+          for i in range(n_jobs)])
+    conn.executemany("""
+        INSERT INTO job_seekers (name, email, phone, skills, experience_years)
+        VALUES (?, ?, '555-0200', ?, 4)
+    """, [(f"Seeker {i}", f"seeker{i}@example.com", json.dumps(["python", "sql"]))
+          for i in range(n_applications)])
+    conn.executemany("""
+        INSERT INTO applications (job_id, seeker_id, cover_letter) VALUES (?, ?, ?)
+    """, [(1 + i % n_jobs, 1 + i, "I would love to join your team. " * 5)
+          for i in range(n_applications)])
+    conn.commit()
+    conn.close()
+
+def add_legacy_routes(app) -> None:
+    """Register the previous implementation of the list endpoints for comparison"""
+    from fastapi import APIRouter
+    from database import get_db_connection
+    from models import JobPostingWithLinks, ApplicationWithLinks
+
+    router = APIRouter(prefix="/legacy")
+
+    @router.get("/jobs", response_model=List[JobPostingWithLinks])
+    async def legacy_jobs(limit: int = 100):
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM job_postings ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            jobs = []
+            for row in rows:
+                job = {
+                    "id": row["id"],
+                    "employer_id": row["employer_id"],
+                    "title": row["title"],
+                    "description": row["description"],
+                    "requirements": json.loads(row["requirements"]),
+                    "location": row["location"],
+                    "salary_range": row["salary_range"],
+                    "job_type": row["job_type"],
+                    "experience_required": row["experience_required"],
+                    "status": row["status"],
+                    "created_at": row["created_at"],
+                    "updated_at": row["updated_at"]
+                }
+                job["links"] = {
+                    "self": f"http://localhost:8000/api/jobs/{job['id']}",
+                    "employer": f"http://localhost:8000/api/employers/{job['employer_id']}",
+                    "applications": f"http://localhost:8000/api/jobs/{job['id']}/applications",
+                    "apply": "http://localhost:8000/api/applications"
+                }
+                jobs.append(job)
+            return jobs
+
+    @router.get("/applications", response_model=List[ApplicationWithLinks])
+    async def legacy_applications():
+        with get_db_connection() as conn:
+            rows = conn.execute("SELECT * FROM applications ORDER BY applied_at DESC").fetchall()
+            applications = []
+            for row in rows:
+                application = {
+                    "id": row["id"],
+                    "job_id": row["job_id"],
+                    "seeker_id": row["seeker_id"],
+                    "cover_letter": row["cover_letter"],
+                    "resume_url": row["resume_url"],
+                    "status": row["status"],
+                    "applied_at": row["applied_at"]
+                }
+                application["links"] = {
+                    "self": f"http://localhost:8000/api/applications/{application['id']}",
+                    "job": f"http://localhost:8000/api/jobs/{application['job_id']}",
+                    "seeker": f"http://localhost:8000/api/seekers/{application['seeker_id']}",
+                    "update_status": f"http://localhost:8000/api/applications/{application['id']}/status"
+                }
+                applications.append(application)
+            return applications
+
+    app.include_router(router)
+
+def measure(client, path: str, requests: int) -> float:
+    """Requests per second for sequential GETs of one path"""
+    client.get(path)  # warm up
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+    return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--applications", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jobportal-bench-")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("STORAGE_DIR", os.path.join(workdir, "storage"))
+    sys.path.insert(0, APP_DIR)
+
+    from fastapi.testclient import TestClient
+    import main as app_main
+
+    seed(os.environ["DATABASE_PATH"], args.jobs, args.applications)
+    add_legacy_routes(app_main.app)
+    client = TestClient(app_main.app)
+
+    pairs = [
+        ("jobs (limit=100)", "/legacy/jobs?limit=100", "/api/jobs/?limit=100", args.requests),
+        (f"applications (all {args.applications})", "/legacy/applications", "/api/applications/",
+         max(args.requests // 20, 5)),
+    ]
+    print(f"{'endpoint':<32}{'before req/s':>14}{'after req/s':>14}{'speedup':>10}")
+    for name, before_path, after_path, requests in pairs:
+        before = measure(client, before_path, requests)
+        after = measure(client, after_path, requests)
+        print(f"{name:<32}{before:>14.1f}{after:>14.1f}{after / before:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Load-test the API in process: seed a synthetic dataset (datagen.py), drive
+main.app over an ASGI transport with concurrent clients and report per-endpoint
+throughput and latency percentiles. Results can be saved as JSON and compared
+against a baseline from another commit.
+
+Usage (from job-portal-api/):
+    python benchmarks/loadtest.py --scale small --save benchmarks/results/baseline.json
+    python benchmarks/loadtest.py --scale small --compare benchmarks/results/baseline.json
+
+    # Seed once, reuse the database across runs (writes modify it, so seed
+    # again before recording a baseline)
+    python benchmarks/loadtest.py --scale large --database /tmp/bench.db
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, "..", "app")
+
+def scenarios(scale: dict, rng: random.Random) -> dict:
+    """Endpoint name -> builder returning (method, url, json body) for one request"""
+    # Reads run before writes so every read scenario sees the seeded data
+    jobs, seekers = scale["jobs"], scale["seekers"]
+    employers, applications = scale["employers"], scale["applications"]
+    counter = iter(range(1, sys.maxsize))
+    return {
+        "GET /api/jobs": lambda: ("GET", "/api/jobs/?limit=100", None),
+        "GET /api/jobs?location": lambda: (
+            "GET", f"/api/jobs/?status=open&location={rng.choice(['denver', 'austin', 'remote'])}", None),
+        "GET /api/jobs?near": lambda: (
+            "GET", f"/api/jobs/?status=open&near={rng.choice(['Denver, CO', 'Seattle, WA', 'Austin, TX'])}"
+                   f"&radius={rng.choice([10, 25, 50])}", None),
+        "GET /api/jobs?salary&experience": lambda: (
+            "GET", f"/api/jobs/?status=open&min_salary={rng.randrange(60, 180, 10) * 1000}"
+                   f"&max_experience={rng.randint(0, 5)}", None),
+        "GET /api/jobs/{id}": lambda: ("GET", f"/api/jobs/{rng.randint(1, jobs)}", None),
+        "GET /api/jobs/{id}/applications": lambda: (
+            "GET", f"/api/jobs/{rng.randint(1, jobs)}/applications", None),
+        "GET /api/jobs/{id}/applications/ranked": lambda: (
+            "GET", f"/api/jobs/{rng.randint(1, jobs)}/applications/ranked", None),
+        "GET /api/jobs/{id}/candidates": lambda: (
+            "GET", f"/api/jobs/{rng.randint(1, jobs)}/candidates?limit=20", None),
+        "GET /api/seekers/{id}/matches": lambda: (
+            "GET", f"/api/seekers/{rng.randint(1, seekers)}/matches?limit=20", None),
+        "GET /api/employers/{id}/dashboard": lambda: (
+            "GET", f"/api/employers/{rng.randint(1, employers)}/dashboard", None),
+        "GET /api/applications/{id}": lambda: (
+            "GET", f"/api/applications/{rng.randint(1, applications)}", None),
+        "POST /api/seekers": lambda: ("POST", "/api/seekers/", {
+            "name": "Load Test", "email": f"load{next(counter)}@example.com", "phone": "555-0300",
+            "skills": ["python", "sql", "docker"], "experience_years": 3}),
+        "POST /api/applications": lambda: ("POST", "/api/applications/", {
+            "job_id": rng.randint(1, jobs), "seeker_id": rng.randint(1, seekers),
+            "cover_letter": "Load test application"}),
+        "PATCH /api/applications/{id}/status": lambda: (
+            "PATCH", f"/api/applications/{rng.randint(1, applications)}/status?status=reviewed", None),
+    }
+
+async def run_scenario(client, build, requests: int, concurrency: int) -> dict:
+    """Send ``requests`` requests from ``concurrency`` clients; summarize latencies"""
+    latencies = []
+    statuses = {}
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, body = build()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+async def run_load(app, scale: dict, args) -> dict:
+    import httpx
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, build in scenarios(scale, rng).items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            # Warm caches and lazily started workers outside the measurement
+            for _ in range(min(args.warmup, args.requests)):
+                method, url, body = build()
+                await client.request(method, url, json=body)
+            results[name] = await run_scenario(client, build, args.requests, args.concurrency)
+            print_result(name, results[name])
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_result(name: str, result: dict) -> None:
+    print(f"{name:<40} {result['rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+          f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}")
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print per-endpoint changes against a baseline; return the number of regressions"""
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} "
+          f"(regression threshold {threshold:.0f}%)")
+    regressions = 0
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<40} (new)")
+            continue
+        rps_change = (result["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        p99_change = ((result["p99_ms"] - before["p99_ms"]) / before["p99_ms"] * 100
+                      if before["p99_ms"] else 0.0)
+        regressed = rps_change < -threshold or p99_change > threshold
+        regressions += regressed
+        print(f"{name:<40} rps {before['rps']:>9.1f} -> {result['rps']:>9.1f} ({rps_change:+6.1f}%)  "
+              f"p99 {before['p99_ms']:>8.2f} -> {result['p99_ms']:>8.2f} ms ({p99_change:+6.1f}%)"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    from datagen import SCALES, generate
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for table in ("employers", "seekers", "jobs", "applications"):
+        parser.add_argument(f"--{table}", type=int, help=f"override the number of {table}")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="run endpoints whose name contains any of these")
+    parser.add_argument("--database", help="SQLite file to seed or reuse (default: a temporary one)")
+    parser.add_argument("--save", help="write results JSON to this path")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent rps drop or p99 rise reported as a regression")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for table in scale:
+        if getattr(args, table) is not None:
+            scale[table] = getattr(args, table)
+
+    # The app resolves paths relative to app/, so pin ours down first
+    for option in ("database", "save", "compare"):
+        if getattr(args, option):
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    tmp = tempfile.mkdtemp(prefix="jobportal-load-")
+    os.environ.setdefault("STORAGE_DIR", os.path.join(tmp, "storage"))
+    # Every simulated client shares one address, so per-client rate limits would
+    # turn the run into a 429 benchmark
+    os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+    if not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_PATH"] = args.database or os.path.join(tmp, "bench.db")
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+
+    from database import init_db, get_db_connection, DATABASE_BACKEND
+    init_db()
+    with get_db_connection() as conn:
+        seeded = conn.execute("SELECT COUNT(*) FROM job_postings").fetchone()[0]
+    if seeded:
+        print(f"Reusing existing dataset ({seeded} job postings)")
+    else:
+        print(f"Seeding {scale} ...")
+        print(f"Seeded in {generate(scale, args.seed)['seconds']}s")
+
+    from main import app
+    from writer import writer
+    print(f"\n{args.requests} requests per endpoint, {args.concurrency} concurrent clients, "
+          f"{DATABASE_BACKEND} backend\n")
+    try:
+        results = asyncio.run(run_load(app, scale, args))
+    finally:
+        writer.stop()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": DATABASE_BACKEND,
+            "scale": scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(args.save), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
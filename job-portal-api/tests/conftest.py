@@ -0,0 +1,116 @@
+import importlib
+import os
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+# Postgres runs only against a server given in DATABASE_URL; each session
+# creates a database of its own there and drops it afterwards
+POSTGRES_URL = os.getenv("DATABASE_URL", "")
+
+BACKENDS = [
+    "sqlite",
+    pytest.param("postgres", marks=pytest.mark.skipif(not POSTGRES_URL, reason="DATABASE_URL is not set")),
+]
+
+
+def _import_app():
+    """Import the app afresh: the backend is chosen when database.py is imported"""
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and Path(path).resolve().is_relative_to(APP_DIR):
+            del sys.modules[name]
+    return importlib.import_module("main")
+
+
+def _run_autocommit(statement: str) -> None:
+    import psycopg2
+
+    conn = psycopg2.connect(POSTGRES_URL)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(statement)
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope="session", params=BACKENDS)
+def backend(request, tmp_path_factory):
+    """The app imported against SQLite or Postgres, with its modules at hand"""
+    tmp_path = tmp_path_factory.mktemp(request.param)
+    environ = dict(os.environ)
+    os.environ.update({
+        "DATABASE_PATH": str(tmp_path / "jobportal.db"),
+        "STORAGE_DIR": str(tmp_path / "storage"),
+        "RATE_LIMIT_PER_SECOND": "0",
+    })
+    os.environ.pop("DATABASE_URL", None)
+
+    database_name = None
+    if request.param == "postgres":
+        database_name = f"jobportal_test_{uuid.uuid4().hex[:12]}"
+        _run_autocommit(f"CREATE DATABASE {database_name}")
+        os.environ["DATABASE_URL"] = urlunsplit(urlsplit(POSTGRES_URL)._replace(path=f"/{database_name}"))
+
+    main = _import_app()
+    yield SimpleNamespace(
+        name=request.param,
+        main=main,
+        database=sys.modules["database"],
+        outbox=sys.modules["outbox"],
+        writer=sys.modules["writer"],
+        job_cache=sys.modules["job_cache"],
+    )
+
+    sys.modules["writer"].writer.stop()
+    sys.modules["database"].close_db()
+    os.environ.clear()
+    os.environ.update(environ)
+    if database_name is not None:
+        _run_autocommit(f"DROP DATABASE {database_name}")
+
+
+@pytest.fixture
+def client(backend):
+    from fastapi.testclient import TestClient
+
+    return TestClient(backend.main.app)
+
+
+@pytest.fixture
+def employer(client):
+    response = client.post("/api/employers/", json={
+        "company_name": "Acme", "email": f"{uuid.uuid4().hex}@example.com", "phone": "555-0100",
+        "description": "Widgets",
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.fixture
+def job(client, employer):
+    response = client.post("/api/jobs/", json={
+        "employer_id": employer["id"], "title": "Backend Engineer", "description": "Python APIs",
+        "requirements": ["python", "sql"], "location": "Denver, CO", "salary_range": "$80,000 - $100,000",
+        "job_type": "full-time", "experience_required": 2,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.fixture
+def seeker(client):
+    response = client.post("/api/seekers/", json={
+        "name": "Sam", "email": f"{uuid.uuid4().hex}@example.com", "phone": "555-0101",
+        "skills": ["python"], "experience_years": 3,
+    })
+    assert response.status_code == 201
+    return response.json()
@@ -0,0 +1,139 @@
+import uuid
+
+import pytest
+
+
+def insert_employer(cursor, email=None):
+    cursor.execute("""
+        INSERT INTO employers (company_name, email, phone, description)
+        VALUES (?, ?, ?, ?)
+        RETURNING id, company_name, email
+    """, ("Acme", email or f"{uuid.uuid4().hex}@example.com", "555-0100", "Widgets"))
+    return cursor.fetchone()
+
+
+class TestQmarkTranslation:
+    def test_placeholders_become_psycopg2_ones(self):
+        postgres = pytest.importorskip("postgres")
+
+        assert postgres.translate("SELECT * FROM jobs WHERE id = ? AND status = ?") == \
+            "SELECT * FROM jobs WHERE id = %s AND status = %s"
+
+    def test_literals_keep_question_marks_and_escape_percent(self):
+        postgres = pytest.importorskip("postgres")
+
+        assert postgres.translate("SELECT '?', 'it''s ?' WHERE title LIKE '50%' AND id = ?") == \
+            "SELECT '?', 'it''s ?' WHERE title LIKE '50%%' AND id = %s"
+
+    def test_percent_outside_literals_is_escaped(self):
+        postgres = pytest.importorskip("postgres")
+
+        assert postgres.translate("SELECT id % ? FROM jobs") == "SELECT id %% %s FROM jobs"
+
+    def test_qmark_sql_runs_on_the_backend(self, backend):
+        with backend.database.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ? AS value, '?' AS mark, '50%' AS share, 7 % ? AS remainder", (42, 4))
+            row = cursor.fetchone()
+
+        assert (row["value"], row["mark"], row["share"], row["remainder"]) == (42, "?", "50%", 3)
+
+
+class TestReturning:
+    def test_insert_returning(self, backend):
+        with backend.database.get_db_connection() as conn:
+            row = insert_employer(conn.cursor(), "returning@example.com")
+
+        assert row["id"] > 0
+        assert (row["company_name"], row["email"]) == ("Acme", "returning@example.com")
+
+    def test_update_and_delete_returning(self, backend):
+        with backend.database.get_db_connection() as conn:
+            cursor = conn.cursor()
+            employer_id = insert_employer(cursor)["id"]
+            cursor.execute("UPDATE employers SET phone = ? WHERE id = ? RETURNING phone", ("555-0199", employer_id))
+            updated = cursor.fetchone()
+            cursor.execute("DELETE FROM employers WHERE id = ? RETURNING id", (employer_id,))
+            deleted = cursor.fetchall()
+
+        assert updated["phone"] == "555-0199"
+        assert [row["id"] for row in deleted] == [employer_id]
+
+    def test_returning_through_the_writer(self, backend, client, job, seeker):
+        response = client.post("/api/applications/", json={
+            "job_id": job["id"], "seeker_id": seeker["id"], "cover_letter": "Hello",
+        })
+
+        assert response.status_code == 201
+        assert response.json()["job_id"] == job["id"]
+        assert response.json()["status"] == "pending"
+
+
+class TestIntegrityError:
+    def test_unique_violation_raises_the_backend_integrity_error(self, backend):
+        with backend.database.get_db_connection() as conn:
+            insert_employer(conn.cursor(), "unique@example.com")
+
+        with pytest.raises(backend.database.IntegrityError):
+            with backend.database.get_db_connection() as conn:
+                insert_employer(conn.cursor(), "unique@example.com")
+
+    def test_failed_transaction_is_rolled_back(self, backend):
+        email = f"{uuid.uuid4().hex}@example.com"
+        with pytest.raises(backend.database.IntegrityError):
+            with backend.database.get_db_connection() as conn:
+                cursor = conn.cursor()
+                insert_employer(cursor, email)
+                insert_employer(cursor, email)
+
+        with backend.database.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM employers WHERE email = ?", (email,))
+            assert cursor.fetchone()[0] == 0
+
+    def test_duplicate_application_is_a_400(self, client, job, seeker):
+        application = {"job_id": job["id"], "seeker_id": seeker["id"], "cover_letter": "Hello"}
+        assert client.post("/api/applications/", json=application).status_code == 201
+
+        response = client.post("/api/applications/", json=application)
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "You have already applied to this job"}
+
+
+class TestStreamQuery:
+    def test_rows_arrive_in_chunks(self, backend):
+        with backend.database.get_db_connection() as conn:
+            cursor = conn.cursor()
+            ids = [insert_employer(cursor)["id"] for _ in range(5)]
+
+        chunks = list(backend.database.stream_query(
+            f"SELECT id FROM employers WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id", ids, chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [row["id"] for chunk in chunks for row in chunk] == ids
+
+    def test_postgres_reads_through_a_named_cursor(self, backend):
+        if backend.name != "postgres":
+            pytest.skip("server-side cursors are Postgres only")
+        with backend.database.get_db_connection() as conn:
+            cursor = conn.cursor()
+            for _ in range(3):
+                insert_employer(cursor)
+
+        stream = backend.database.stream_query("SELECT id FROM employers", chunk_size=1)
+        first = next(stream)
+        try:
+            # The generator's connection is fetching from the server-side cursor
+            with backend.database.get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT query FROM pg_stat_activity
+                    WHERE datname = current_database() AND pid <> pg_backend_pid()
+                """)
+                queries = [row["query"] for row in cursor.fetchall()]
+        finally:
+            stream.close()
+
+        assert len(first) == 1
+        assert any(query.startswith('FETCH FORWARD 1 FROM "stream_query"') for query in queries)
@@ -0,0 +1,88 @@
+import pytest
+
+from geo import CELLS_PER_ROW, distance_miles, grid_cell, near_filter, resolve_location
+
+DENVER = (39.7392, -104.9903)
+
+
+class TestResolveLocation:
+    @pytest.mark.parametrize("text", ["Denver, CO", "denver, co", "Denver, Colorado", "Denver, CO 80202", "Denver"])
+    def test_city_forms(self, text):
+        assert resolve_location(text) == DENVER
+
+    def test_saint_is_spelled_either_way(self):
+        assert resolve_location("St. Louis, MO") == resolve_location("Saint Louis, MO") == (38.6270, -90.1994)
+
+    def test_coordinates(self):
+        assert resolve_location("39.5, -105") == (39.5, -105.0)
+        assert resolve_location("91, 0") is None
+        assert resolve_location("0, 181") is None
+
+    def test_known_state_never_takes_a_namesake_elsewhere(self):
+        # The gazetteer has Springfield, MO and IL but not MA
+        assert resolve_location("Springfield, IL") == (39.7817, -89.6501)
+        assert resolve_location("Springfield, MA") is None
+
+    def test_bare_or_unknown_state_city_is_its_most_populous_namesake(self):
+        assert resolve_location("Portland") == resolve_location("Portland, OR")
+        assert resolve_location("Springfield, Narnia") == resolve_location("Springfield, MO")
+
+    def test_unknown_places(self):
+        assert resolve_location("Nowhereville, CO") is None
+        assert resolve_location("Remote") is None
+        assert resolve_location("") is None
+
+
+PLACES = {
+    "boulder": (40.0150, -105.2705),
+    "colorado springs": (38.8339, -104.8214),
+    "salt lake city": (40.7608, -111.8910),
+    "taveuni": (-16.85, 179.95),
+    "vanua levu east": (-16.60, -179.90),
+    "nadi": (-17.78, 177.44),
+    "north pole camp": (89.9, 10.0),
+    "far side of the pole": (89.7, -170.0),
+    "svalbard": (78.22, 15.65),
+}
+
+
+def near(backend, origin, radius):
+    """Names of PLACES the near_filter condition matches, run on the backend's SQL"""
+    condition, params = near_filter(*origin, radius)
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE places (name TEXT, latitude REAL, longitude REAL, geo_cell INTEGER)")
+        try:
+            cursor.executemany("INSERT INTO places VALUES (?, ?, ?, ?)",
+                               [(name, *place, grid_cell(*place)) for name, place in PLACES.items()])
+            cursor.execute(f"SELECT name FROM places WHERE {condition}", params)
+            return sorted(row["name"] for row in cursor.fetchall())
+        finally:
+            cursor.execute("DROP TABLE places")
+
+
+class TestNearFilter:
+    def test_matches_within_the_radius(self, backend):
+        assert near(backend, DENVER, 30) == ["boulder"]
+        assert near(backend, DENVER, 80) == ["boulder", "colorado springs"]
+
+    def test_matches_across_the_antimeridian(self, backend):
+        taveuni = PLACES["taveuni"]
+        assert distance_miles(*taveuni, *PLACES["vanua levu east"]) < 25
+
+        assert near(backend, taveuni, 25) == ["taveuni", "vanua levu east"]
+        assert near(backend, PLACES["vanua levu east"], 25) == ["taveuni", "vanua levu east"]
+        assert near(backend, taveuni, 250) == ["nadi", "taveuni", "vanua levu east"]
+
+    def test_polar_search_scans_whole_rows_as_one_range(self, backend):
+        condition, params = near_filter(89.8, 0.0, 50)
+
+        assert condition.startswith("geo_cell BETWEEN ? AND ?")
+        assert params[1] - params[0] + 1 == 2 * CELLS_PER_ROW
+        assert near(backend, (89.8, 0.0), 50) == ["far side of the pole", "north pole camp"]
+
+    def test_cells_stay_few_away_from_the_poles(self):
+        condition, params = near_filter(*DENVER, 250)
+
+        assert condition.startswith("geo_cell IN (")
+        assert len(params) < 400
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def job_cache(backend, monkeypatch):
+    """The job caches, synced with the change log on every request"""
+    monkeypatch.setattr(backend.job_cache, "CACHE_SYNC_SECONDS", 0)
+    return backend.job_cache
+
+
+def rename_elsewhere(backend, job_id, title):
+    """Update a posting the way another worker process would"""
+    with backend.database.get_db_connection() as conn:
+        conn.cursor().execute("UPDATE job_postings SET title = ? WHERE id = ?", (title, job_id))
+
+
+def change_count(backend):
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM job_changes")
+        return cursor.fetchone()[0]
+
+
+def test_change_by_another_worker_is_picked_up(backend, job_cache, client, job):
+    assert client.get(f"/api/jobs/{job['id']}").json()["title"] == job["title"]
+
+    rename_elsewhere(backend, job["id"], "Renamed")
+
+    assert client.get(f"/api/jobs/{job['id']}").json()["title"] == "Renamed"
+
+
+def test_sync_reads_only_rows_after_the_last_applied(backend, job_cache, client, job):
+    client.get(f"/api/jobs/{job['id']}")
+    rename_elsewhere(backend, job["id"], "Renamed once")
+    client.get(f"/api/jobs/{job['id']}")
+    invalidations = job_cache.job_details.invalidations
+
+    # Nothing changed since: the cached response stays
+    client.get(f"/api/jobs/{job['id']}")
+    client.get(f"/api/jobs/{job['id']}")
+
+    assert job_cache.job_details.invalidations == invalidations
+    assert job_cache._gaps == []
+
+
+def test_change_committed_out_of_order_is_not_missed(backend, job_cache, client, employer, job):
+    if backend.name != "postgres":
+        pytest.skip("SQLite commits change log rows in order")
+    other = client.post("/api/jobs/", json={**job, "employer_id": employer["id"]}).json()
+    client.get(f"/api/jobs/{job['id']}")
+    client.get(f"/api/jobs/{other['id']}")
+
+    with backend.database.get_db_connection() as slow:
+        # Takes the lower sequence number but commits last
+        slow.cursor().execute("UPDATE job_postings SET title = ? WHERE id = ?", ("Slow", job["id"]))
+        rename_elsewhere(backend, other["id"], "Fast")
+        assert client.get(f"/api/jobs/{other['id']}").json()["title"] == "Fast"
+        assert len(job_cache._gaps) == 1
+
+    assert client.get(f"/api/jobs/{job['id']}").json()["title"] == "Slow"
+    assert job_cache._gaps == []
+
+
+def test_gaps_are_given_up_after_a_while(backend, job_cache, client, job, monkeypatch):
+    if backend.name != "postgres":
+        pytest.skip("SQLite commits change log rows in order")
+    client.get(f"/api/jobs/{job['id']}")
+    with pytest.raises(RuntimeError):
+        with backend.database.get_db_connection() as conn:
+            # A rolled-back change never fills its sequence number
+            conn.cursor().execute("UPDATE job_postings SET title = ? WHERE id = ?", ("Rolled back", job["id"]))
+            raise RuntimeError("change failed")
+    rename_elsewhere(backend, job["id"], "Renamed")
+    client.get(f"/api/jobs/{job['id']}")
+    assert len(job_cache._gaps) == 1
+
+    monkeypatch.setattr(job_cache, "CHANGE_GAP_SECONDS", 0)
+    client.get(f"/api/jobs/{job['id']}")
+
+    assert job_cache._gaps == []
+
+
+def test_bulk_import_logs_one_change_per_batch(backend, job_cache, client, employer, job):
+    postings = [{**job, "employer_id": employer["id"], "title": f"Imported {n}"} for n in range(5)]
+    before = change_count(backend)
+
+    response = client.post("/api/jobs/bulk", content="\n".join(json.dumps(posting) for posting in postings))
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 5
+    assert change_count(backend) == before + 1
+
+
+def test_new_posting_from_another_worker_reaches_listings(backend, job_cache, client, employer, job):
+    location = "Changeville, CO"
+    assert client.get("/api/jobs/", params={"location": location}).json() == []
+
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO job_postings (employer_id, title, description, requirements, location,
+                                      salary_range, job_type, experience_required)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (employer["id"], "Elsewhere", "Posted by another worker", "[]", location, "DOE", "full-time", 0))
+        job_cache.record_new_jobs(cursor)
+
+    assert [posting["title"] for posting in client.get("/api/jobs/", params={"location": location}).json()] == \
+        ["Elsewhere"]
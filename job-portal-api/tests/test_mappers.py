@@ -0,0 +1,24 @@
+from mappers import compile_mapper
+
+
+def test_mapper_converts_columns_in_order():
+    to_dict = compile_mapper(("id", "skills", "created_at", "name"), json_columns=("skills",),
+                             timestamp_columns=("created_at",), links=lambda item: {"self": f"/{item['id']}"})
+
+    item = to_dict({"name": "Sam", "created_at": "2026-01-02 03:04:05", "skills": '["python"]', "id": 7, "extra": 1})
+
+    assert list(item) == ["id", "skills", "created_at", "name", "links"]
+    assert item == {"id": 7, "skills": ["python"], "created_at": "2026-01-02T03:04:05", "name": "Sam",
+                    "links": {"self": "/7"}}
+
+
+def test_mapper_reads_backend_rows(backend, seeker):
+    import mappers
+
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM job_seekers WHERE id = ?", (seeker["id"],))
+        item = mappers.map_seeker(cursor.fetchone())
+
+    assert list(item) == list(seeker)
+    assert (item["id"], item["skills"]) == (seeker["id"], ["python"])
@@ -0,0 +1,133 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def application_row(application_id=1, job_id=10, seeker_id=20, status="pending"):
+    return {"id": application_id, "job_id": job_id, "seeker_id": seeker_id, "status": status}
+
+
+def sequence(backend):
+    """Number queued events the way the dispatcher does (a no-op on SQLite)"""
+    if backend.name == "postgres":
+        with backend.database.get_db_connection() as conn:
+            backend.outbox.sequence_events(conn.cursor())
+
+
+def read_events(backend, since):
+    sequence(backend)
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, application_id FROM events WHERE id > ? ORDER BY id", (since,))
+        return [(row["id"], row["application_id"]) for row in cursor.fetchall()]
+
+
+def last_event_id(backend):
+    sequence(backend)
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM events")
+        return cursor.fetchone()[0]
+
+
+def test_events_are_written_in_the_callers_transaction(backend):
+    rows = [application_row(1), application_row(2, status="reviewed")]
+    last_id = last_event_id(backend)
+    with backend.database.get_db_connection() as conn:
+        backend.outbox.record_events(conn.cursor(), "application.status_changed", rows)
+    sequence(backend)
+
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT event_type, application_id, payload FROM events WHERE id > ? ORDER BY id", (last_id,))
+        events = cursor.fetchall()
+
+    assert [(event["event_type"], event["application_id"]) for event in events] == [
+        ("application.status_changed", 1), ("application.status_changed", 2)]
+    assert json.loads(events[1]["payload"]) == {"job_id": 10, "seeker_id": 20, "status": "reviewed"}
+
+
+def test_events_roll_back_with_the_change(backend):
+    before = last_event_id(backend)
+
+    with pytest.raises(RuntimeError):
+        with backend.database.get_db_connection() as conn:
+            backend.outbox.record_events(conn.cursor(), "application.created", [application_row()])
+            raise RuntimeError("change failed")
+
+    assert read_events(backend, before) == []
+
+
+def test_postgres_writers_do_not_wait_for_each_other(backend):
+    if backend.name != "postgres":
+        pytest.skip("SQLite has a single writer")
+
+    def other_writer():
+        with backend.database.get_db_connection() as conn:
+            backend.outbox.record_events(conn.cursor(), "application.created", [application_row(2)])
+
+    with backend.database.get_db_connection() as conn:
+        backend.outbox.record_events(conn.cursor(), "application.created", [application_row(1)])
+        # The first transaction is still open; the second commits regardless
+        writer = threading.Thread(target=other_writer)
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+
+
+def test_event_committed_late_is_not_skipped(backend):
+    """An event committed after a reader moved past its neighbours still sorts after them"""
+    if backend.name != "postgres":
+        pytest.skip("SQLite has a single writer")
+    since = last_event_id(backend)
+
+    with backend.database.get_db_connection() as slow:
+        backend.outbox.record_events(slow.cursor(), "application.created", [application_row(1)])
+        with backend.database.get_db_connection() as fast:
+            backend.outbox.record_events(fast.cursor(), "application.created", [application_row(2)])
+        first = read_events(backend, since)
+    second = read_events(backend, first[-1][0])
+
+    assert [application_id for _, application_id in first] == [2]
+    assert [application_id for _, application_id in second] == [1]
+
+
+def test_concurrent_writers_are_each_seen_once(backend):
+    if backend.name != "postgres":
+        pytest.skip("SQLite has a single writer")
+    since = last_event_id(backend)
+    writers, events_each = 8, 25
+
+    def write(writer):
+        for n in range(events_each):
+            with backend.database.get_db_connection() as conn:
+                backend.outbox.record_events(conn.cursor(), "application.created",
+                                             [application_row(writer * 1000 + n)])
+
+    seen = []
+    with ThreadPoolExecutor(writers) as pool:
+        done = [pool.submit(write, writer) for writer in range(writers)]
+        # Read like a sink while the writers run, always from the last id seen
+        while not all(future.done() for future in done):
+            batch = read_events(backend, seen[-1][0] if seen else since)
+            seen.extend(batch)
+        for future in done:
+            future.result()
+    seen.extend(read_events(backend, seen[-1][0] if seen else since))
+
+    application_ids = [application_id for _, application_id in seen]
+    assert sorted(application_ids) == sorted(w * 1000 + n for w in range(writers) for n in range(events_each))
+
+
+def test_sequencing_an_empty_queue_takes_no_lock(backend):
+    if backend.name != "postgres":
+        pytest.skip("the advisory lock is Postgres only")
+
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        backend.outbox.sequence_events(cursor)
+        backend.outbox.record_events(cursor, "application.created", [])
+        cursor.execute("SELECT COUNT(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()")
+        assert cursor.fetchone()[0] == 0
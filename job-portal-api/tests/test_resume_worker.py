@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def resume_worker(backend):
+    import resume_worker
+
+    with backend.database.get_db_connection() as conn:
+        conn.cursor().execute("DELETE FROM resume_jobs")
+    return resume_worker
+
+
+def enqueue(backend, resume_worker):
+    digest = uuid.uuid4().hex
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        resume_worker.enqueue_extraction(cursor, digest)
+        # TIMESTAMP(0) on Postgres can round the default up past the claim's clock
+        cursor.execute("UPDATE resume_jobs SET available_at = ? WHERE digest = ?",
+                       (backend.database.utc_timestamp(-1), digest))
+    return digest
+
+
+def claim(backend, resume_worker, limit=10):
+    with backend.database.get_db_connection() as conn:
+        return resume_worker._claim_jobs(conn.cursor(), limit)
+
+
+def expire_leases(backend):
+    with backend.database.get_db_connection() as conn:
+        conn.cursor().execute("UPDATE resume_jobs SET leased_until = ? WHERE status = 'processing'",
+                              (backend.database.utc_timestamp(-1),))
+
+
+def job_row(backend, digest):
+    with backend.database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, attempts, leased_until FROM resume_jobs WHERE digest = ?", (digest,))
+        return cursor.fetchone()
+
+
+def test_claimed_job_is_leased_to_one_worker(backend, resume_worker):
+    digest = enqueue(backend, resume_worker)
+
+    first = claim(backend, resume_worker)
+    second = claim(backend, resume_worker)
+
+    assert [job["digest"] for job in first] == [digest]
+    assert second == []
+    assert str(job_row(backend, digest)["leased_until"]) > backend.database.utc_timestamp()
+
+
+def test_expired_lease_is_claimed_again(backend, resume_worker):
+    digest = enqueue(backend, resume_worker)
+    claim(backend, resume_worker)
+
+    expire_leases(backend)
+    reclaimed = claim(backend, resume_worker)
+
+    assert [(job["digest"], job["attempts"]) for job in reclaimed] == [(digest, 2)]
+    assert job_row(backend, digest)["status"] == "processing"
+
+
+def test_job_out_of_attempts_fails_when_its_lease_expires(backend, resume_worker):
+    digest = enqueue(backend, resume_worker)
+    for _ in range(resume_worker.RESUME_MAX_ATTEMPTS):
+        assert claim(backend, resume_worker)
+        expire_leases(backend)
+
+    assert claim(backend, resume_worker) == []
+    assert job_row(backend, digest)["status"] == "failed"
+
+
+def test_finished_job_gives_up_its_lease(backend, resume_worker):
+    digest = enqueue(backend, resume_worker)
+    job, = claim(backend, resume_worker)
+
+    with backend.database.get_db_connection() as conn:
+        resume_worker._fail_job(conn.cursor(), job, "ValueError: bad PDF")
+
+    row = job_row(backend, digest)
+    assert (row["status"], row["leased_until"]) == ("queued", None)
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from salary import parse_salary_range
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$90,000 - $120,000", (90000, 120000)),
+    ("$120-150k", (120000, 150000)),
+    ("100k-120k", (100000, 120000)),
+    ("90k to 110k", (90000, 110000)),
+    ("$150k-$120k", (120000, 150000)),
+    ("120,000 - 150,000 USD", (120000, 150000)),
+    ("80k+", (80000, None)),
+    ("up to 90k", (90000, 90000)),
+    ("£50k", (50000, 50000)),
+    ("$1.2m", (1200000, 1200000)),
+    ("$45/hr", (93600, 93600)),
+    ("$40 - $50 per hour", (83200, 104000)),
+    ("$1,500 weekly", (78000, 78000)),
+    ("$8,000/month", (96000, 96000)),
+    ("$9k monthly", (108000, 108000)),
+    ("Competitive", (None, None)),
+    ("DOE", (None, None)),
+    ("2 positions, great team", (None, None)),
+    ("", (None, None)),
+])
+def test_parse_salary_range(text, expected):
+    assert parse_salary_range(text) == expected
+
+
+def test_min_salary_filter_matches_ranges_reaching_it(client, employer):
+    location = f"Salaryville {uuid.uuid4().hex[:8]}, CO"
+    for salary_range in ("$60,000 - $80,000", "$90-110k", "100k+", "$45/hr", "Competitive"):
+        response = client.post("/api/jobs/", json={
+            "employer_id": employer["id"], "title": "Engineer", "description": "Builds things",
+            "requirements": ["python"], "location": location, "salary_range": salary_range,
+            "job_type": "full-time", "experience_required": 1,
+        })
+        assert response.status_code == 201
+
+    response = client.get("/api/jobs/", params={"location": location, "min_salary": 95000})
+
+    assert response.status_code == 200
+    assert sorted(job["salary_range"] for job in response.json()) == ["$90-110k", "100k+"]
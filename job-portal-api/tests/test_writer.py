@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def writer(backend, tmp_path):
+    """A group-commit writer of its own on a fresh SQLite file"""
+    if backend.name != "sqlite":
+        pytest.skip("the group-commit writer is SQLite only")
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE notes (body TEXT NOT NULL)")
+    conn.close()
+    writer = backend.writer.GroupCommitWriter(path)
+    yield writer
+    writer.stop()
+
+
+def notes(writer):
+    conn = sqlite3.connect(writer.database_path)
+    try:
+        return sorted(body for body, in conn.execute("SELECT body FROM notes"))
+    finally:
+        conn.close()
+
+
+def insert(body):
+    def operation(cursor):
+        cursor.execute("INSERT INTO notes (body) VALUES (?)", (body,))
+        return body
+    return operation
+
+
+def failing(body):
+    def operation(cursor):
+        cursor.execute("INSERT INTO notes (body) VALUES (?)", (body,))
+        raise ValueError(body)
+    return operation
+
+
+def submit_as_one_batch(writer, operations):
+    """Queue operations behind a blocked one so the writer applies them together"""
+    running, release = threading.Event(), threading.Event()
+
+    def block(cursor):
+        running.set()
+        release.wait(5)
+
+    blocker = writer.submit(block)
+    assert running.wait(5)
+    futures = [writer.submit(operation) for operation in operations]
+    commits = writer.commits
+    release.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.exception(timeout=5)
+    assert writer.commits == commits + 2
+    return futures
+
+
+def test_failing_operation_does_not_roll_back_its_batch_mates(writer):
+    submit_as_one_batch(writer, [insert("a"), failing("b"), insert("c")])
+
+    assert notes(writer) == ["a", "c"]
+
+
+def test_exception_reaches_only_the_failing_caller(writer):
+    first, broken, last = submit_as_one_batch(writer, [insert("a"), failing("b"), insert("c")])
+
+    assert first.result() == "a"
+    assert last.result() == "c"
+    with pytest.raises(ValueError, match="b"):
+        broken.result()
+
+
+def test_stop_applies_queued_writes(writer):
+    futures = [writer.submit(insert(str(n))) for n in range(20)]
+
+    writer.stop()
+
+    assert all(future.done() for future in futures)
+    assert [future.result() for future in futures] == [str(n) for n in range(20)]
+    assert len(notes(writer)) == 20
+
+
+def test_writes_after_stop_start_the_writer_again(writer):
+    writer.submit(insert("before")).result(timeout=5)
+    writer.stop()
+
+    assert writer.submit(insert("after")).result(timeout=5) == "after"
+    assert notes(writer) == ["after", "before"]
+
+
+def test_run_write_raises_in_the_caller(backend, writer, monkeypatch):
+    monkeypatch.setattr(backend.writer, "writer", writer)
+
+    async def write():
+        with pytest.raises(ValueError, match="b"):
+            await backend.writer.run_write(failing("b"))
+        return await backend.writer.run_write(insert("a"))
+
+    assert asyncio.run(write()) == "a"
+    assert notes(writer) == ["a"]